@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,10 +55,14 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.PerfilSQLMiddleware',
 ]
 
 HTTPS_ENABLED = env.bool('HTTPS_ENABLED', default=True)
 
+# Prometheus scrapes granian directly, without the proxy's X-Forwarded-Proto header
+SECURE_REDIRECT_EXEMPT = [r'^metrics$']
+
 if HTTPS_ENABLED:
     # --- PROXY AND SSL SETTINGS ---
     SECURE_SSL_REDIRECT = True
@@ -93,10 +98,47 @@ LOGGING = {
             "level": env("DJANGO_LOG_LEVEL", default="INFO"),
             "propagate": False,
         },
+        "core.perfil_sql": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        "core.contencao": {
+            "handlers": ["console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
     },
 }
 
 
+ALOCACAO_PRIORIDADE = env('ALOCACAO_PRIORIDADE', default='data_evento')
+ESTOQUE_ATUALIZACAO_CONDICIONAL = env.bool('ESTOQUE_ATUALIZACAO_CONDICIONAL', default=False)
+
+TRANSACOES_PARTICIONAMENTO = env('TRANSACOES_PARTICIONAMENTO', default='mensal')
+TRANSACOES_PARTICOES_ANTECIPADAS = env.int('TRANSACOES_PARTICOES_ANTECIPADAS', default=3)
+TRANSACOES_COMPACTACAO_DIR = env.path('TRANSACOES_COMPACTACAO_DIR', default=BASE_DIR / 'arquivos' / 'transacoes')
+
+PLANILHAS_CACHE_DIR = env.path('PLANILHAS_CACHE_DIR', default=BASE_DIR / 'cache' / 'planilhas')
+PLANILHAS_CACHE_TAMANHO_MAXIMO = env.int('PLANILHAS_CACHE_TAMANHO_MAXIMO', default=200 * 1024 * 1024)
+
+RELATORIOS_DIR = env.path('RELATORIOS_DIR', default=BASE_DIR / 'relatorios')
+RELATORIOS_TEMPO_MAXIMO = env.int('RELATORIOS_TEMPO_MAXIMO', default=15 * 60)
+RELATORIOS_RETENCAO_DIAS = env.int('RELATORIOS_RETENCAO_DIAS', default=7)
+RELATORIOS_PROCESSOS = env.int('RELATORIOS_PROCESSOS', default=2)
+
+PERFIL_SQL_HABILITADO = env.bool('PERFIL_SQL_HABILITADO', default=False)
+PERFIL_SQL_LIMITE_LENTO_MS = env.float('PERFIL_SQL_LIMITE_LENTO_MS', default=100)
+PERFIL_SQL_LIMITE_REPETICOES = env.int('PERFIL_SQL_LIMITE_REPETICOES', default=5)
+PERFIL_SQL_EXPLAIN = env.int('PERFIL_SQL_EXPLAIN', default=1)
+PERFIL_SQL_HISTORICO = env.int('PERFIL_SQL_HISTORICO', default=20)
+
+CONTENCAO_LIMITE_ESPERA_MS = env.float('CONTENCAO_LIMITE_ESPERA_MS', default=200)
+CONTENCAO_LIMITE_RETENCAO_MS = env.float('CONTENCAO_LIMITE_RETENCAO_MS', default=1000)
+CONTENCAO_LINHAS_MONITORADAS = env.int('CONTENCAO_LINHAS_MONITORADAS', default=1000)
+
+METRICAS_TOKEN = env('METRICAS_TOKEN', default='')
+
 ROOT_URLCONF = 'backstage_control.urls'
 
 TEMPLATES = [
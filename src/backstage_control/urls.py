@@ -17,6 +17,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import metricas
+
 urlpatterns = [
+    path('metrics', metricas, name='metricas'),
+    path('', include('core.urls')),
     path('', admin.site.urls)
 ]
@@ -1,14 +1,39 @@
+import io
+
 from django.contrib import admin, messages
-from django.core.exceptions import ValidationError
+from django.contrib.admin import helpers
+from django.core.exceptions import PermissionDenied, ValidationError
 from django.db import models
-from django.http import HttpResponse
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
 
 from rangefilter.filters import DateTimeRangeFilter, DateRangeFilter
 
-from .planilhas import gerar_checklist, gerar_lista_compras, gerar_custo_evento
-from .models import Evento, TransacaoEstoque, SolicitacaoEvento, Item
-from .services import alocar_quantidade_disponivel_estoque_solicitacoes, retornar_item_de_evento, alocar_item_para_evento
-from .forms import TransacaoEstoqueAdminForm
+from .cache_planilhas import obter_planilha_em_cache
+from .importacao import ler_planilha
+from .planilhas import gerar_posicao_estoque, gerar_analise_periodo
+from .listagem import ListagemPorCursor
+from .relatorios import (
+    chave_relatorio, nome_arquivo_relatorio, enfileirar_relatorio, enfileirar_pacote_eventos, caminho_arquivo_tarefa
+)
+from .models import (
+    Evento, TransacaoEstoque, SolicitacaoEvento, Item, SumarioItemEvento, TarefaRelatorio, CompactacaoTransacoes,
+    PosicaoEstoque, ResumoDiarioTransacoes
+)
+from .services import (
+    alocar_quantidade_disponivel_estoque_solicitacoes_sql, retornar_item_de_evento, alocar_item_para_evento,
+    distribuir_estoque_entre_eventos, retornar_itens_de_evento, importar_transacoes_estoque,
+    importar_solicitacoes_evento, copiar_solicitacoes_evento, posicao_estoque_em, analise_periodo,
+    consolidar_resumos_pendentes, COLUNAS_IMPORTACAO_TRANSACOES, COLUNAS_IMPORTACAO_SOLICITACOES, TIPOS_IMPORTACAO_ENTRADA, TIPOS_IMPORTACAO_SAIDA
+)
+from .forms import (
+    TransacaoEstoqueAdminForm, ImportacaoPlanilhaForm, ImportacaoSolicitacoesForm, CopiaSolicitacoesForm, RetornoItensForm,
+    ConsultaPosicaoEstoqueForm, AnalisePeriodoForm
+)
 
 admin.site.disable_action('delete_selected')
 admin.site.site_header = 'Ju Miranda Produções'
@@ -16,6 +41,8 @@ admin.site.site_title = 'Administração de Camarins'
 admin.site.index_title = 'Administração de Camarins'
 admin.site.site_url = None
 
+ERROS_IMPORTACAO_EXIBIDOS = 100
+
 def obter_id_evento_unico(queryset):
     lista_eventos = queryset.order_by().values_list('evento_id', flat=True).distinct()
 
@@ -25,12 +52,74 @@ def obter_id_evento_unico(queryset):
     return lista_eventos.first()
 
 
+CONTENT_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def gerar_resposta_planilha(request, tipo_relatorio, id_evento, queryset):
+    evento = Evento.objects.get(id=id_evento)
+    chave = chave_relatorio(tipo_relatorio, evento, queryset)
+
+    planilha = obter_planilha_em_cache(chave)
+    if planilha is not None:
+        return FileResponse(
+            planilha,
+            as_attachment=True,
+            filename=nome_arquivo_relatorio(tipo_relatorio, evento),
+            content_type=CONTENT_TYPE_XLSX
+        )
+
+    tarefa = enfileirar_relatorio(tipo_relatorio, evento, queryset, request.user, chave)
+    messages.info(
+        request,
+        format_html(
+            'A planilha {} está sendo gerada. Baixe-a em <a href="{}">Tarefas de Relatórios</a> quando estiver pronta.',
+            tarefa,
+            reverse('admin:core_tarefarelatorio_changelist')
+        )
+    )
+
+
+def gerar_resposta_importacao(model_admin, request, form_class, importar, titulo, **contexto):
+    if not model_admin.has_add_permission(request):
+        raise PermissionDenied
+
+    opts = model_admin.opts
+    form = form_class(request.POST or None, request.FILES or None)
+    if request.method == 'POST' and form.is_valid():
+        try:
+            mensagem = importar(form.cleaned_data)
+        except ValidationError as e:
+            erros = e.messages
+            if len(erros) > ERROS_IMPORTACAO_EXIBIDOS:
+                erros = [
+                    *erros[:ERROS_IMPORTACAO_EXIBIDOS],
+                    f'... e mais {len(erros) - ERROS_IMPORTACAO_EXIBIDOS} erro(s)'
+                ]
+            form.add_error(None, erros)
+        else:
+            model_admin.message_user(request, mensagem, messages.SUCCESS)
+            return redirect(f'admin:{opts.app_label}_{opts.model_name}_changelist')
+
+    return TemplateResponse(
+        request,
+        f'admin/{opts.app_label}/{opts.model_name}/importar.html',
+        {
+            **model_admin.admin_site.each_context(request),
+            'title': titulo,
+            'opts': opts,
+            'form': form,
+            **contexto,
+        }
+    )
+
+
 @admin.register(Evento)
 class EventoAdmin(admin.ModelAdmin):
     search_fields = ('nome',)
     list_display = ('nome', 'data', 'custo_total')
     date_hierarchy = 'data'
     list_filter = ['status', ('data', DateRangeFilter)]
+    actions = ('retornar_itens_alocados', 'baixar_pacote_planilhas', 'copiar_solicitacoes')
 
     def change_view(self, request, object_id, form_url='', extra_context=None):
         sumario_itens_evento = SolicitacaoEvento.objects.com_sumario_de_itens(
@@ -54,17 +143,71 @@ class EventoAdmin(admin.ModelAdmin):
 
         return True
 
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-
-        return qs.com_custo_total()
-
     def get_exclude(self, request, obj=None):
         if obj is None:
             return ('status',)
 
         return ()
 
+    @admin.action(description='Retornar todos os itens alocados')
+    def retornar_itens_alocados(self, request, queryset):
+        for evento in queryset:
+            try:
+                transacoes = retornar_itens_de_evento(evento.id, request.user)
+            except ValidationError as e:
+                self.message_user(request, f'{evento}: {' '.join(e.messages)}', messages.ERROR)
+                continue
+
+            self.message_user(request, f'{evento}: {len(transacoes)} retorno(s) registrado(s)', messages.SUCCESS)
+
+    @admin.action(description='Gerar pacote de planilhas dos eventos (ZIP)')
+    def baixar_pacote_planilhas(self, request, queryset):
+        tarefa = enfileirar_pacote_eventos(queryset, request.user)
+        self.message_user(
+            request,
+            format_html(
+                'O pacote {} está sendo gerado. Baixe-o em <a href="{}">Tarefas de Relatórios</a> quando estiver pronto.',
+                tarefa,
+                reverse('admin:core_tarefarelatorio_changelist')
+            )
+        )
+
+    @admin.action(description='Copiar solicitações de outro evento')
+    def copiar_solicitacoes(self, request, queryset):
+        form = CopiaSolicitacoesForm(request.POST if 'copiar' in request.POST else None)
+        if form.is_valid():
+            evento_origem = form.cleaned_data['evento_origem']
+            for evento in queryset:
+                try:
+                    quantidade_copiadas = copiar_solicitacoes_evento(
+                        evento_origem.id,
+                        evento.id,
+                        form.cleaned_data['fator']
+                    )
+                except ValidationError as e:
+                    self.message_user(request, f'{evento}: {' '.join(e.messages)}', messages.ERROR)
+                    continue
+
+                self.message_user(
+                    request,
+                    f'{evento}: {quantidade_copiadas} solicitação(ões) copiada(s) de {evento_origem}',
+                    messages.SUCCESS
+                )
+            return
+
+        return TemplateResponse(
+            request,
+            'admin/core/evento/copiar_solicitacoes.html',
+            {
+                **self.admin_site.each_context(request),
+                'title': 'Copiar solicitações de outro evento',
+                'opts': self.opts,
+                'form': form,
+                'eventos': queryset,
+                'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            }
+        )
+
 
 class EventosEmAndamentoFilter(admin.SimpleListFilter):
     title = 'Eventos em Andamento'
@@ -93,8 +236,13 @@ class TransacaoEstoqueAdmin(admin.ModelAdmin):
     list_display = ('tipo', 'evento', 'item', 'quantidade', 'preco_unidade', 'valor_total')
     list_filter = ('tipo', EventosEmAndamentoFilter, ('timestamp', DateTimeRangeFilter))
     date_hierarchy = 'timestamp'
+    sortable_by = ()
+    show_full_result_count = False
     actions = ('baixar_planilha_custo_evento',)
 
+    def get_changelist(self, request, **kwargs):
+        return ListagemPorCursor
+
     def has_delete_permission(self, request, obj=None):
         return False
 
@@ -123,6 +271,34 @@ class TransacaoEstoqueAdmin(admin.ModelAdmin):
                     return
         super().save_model(request, obj, form, change)
 
+    def get_urls(self):
+        return [
+            path(
+                'importar/',
+                self.admin_site.admin_view(self.importar_view),
+                name='core_transacaoestoque_importar'
+            ),
+            *super().get_urls()
+        ]
+
+    def importar_view(self, request):
+        def importar(dados):
+            transacoes = importar_transacoes_estoque(
+                ler_planilha(dados['arquivo'], COLUNAS_IMPORTACAO_TRANSACOES),
+                request.user
+            )
+            return f'{len(transacoes)} transação(ões) importada(s)'
+
+        return gerar_resposta_importacao(
+            self,
+            request,
+            ImportacaoPlanilhaForm,
+            importar,
+            'Importar transações de estoque',
+            tipos_entrada=TIPOS_IMPORTACAO_ENTRADA,
+            tipos_saida=TIPOS_IMPORTACAO_SAIDA
+        )
+
     @admin.action(description='Gerar planilha de custos do evento')
     def baixar_planilha_custo_evento(self, request, queryset):
         try:
@@ -131,20 +307,7 @@ class TransacaoEstoqueAdmin(admin.ModelAdmin):
             self.message_user(request, e.message, messages.ERROR)
             return
 
-        evento = Evento.objects.get(id=id_evento)
-        titulo = evento.__str__()
-
-        lista_itens = queryset.get_itens_consumidos_com_preco()
-
-        planilha_custo_evento = gerar_custo_evento(lista_itens, titulo)
-
-        return HttpResponse(
-            planilha_custo_evento,
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            headers={
-                'Content-Disposition': f'attachment; filename=Custo Evento {titulo.replace('/', '-')}.xlsx'
-            }
-        )
+        return gerar_resposta_planilha(request, 'custo_evento', id_evento, queryset)
 
 
 @admin.register(SolicitacaoEvento)
@@ -152,12 +315,44 @@ class SolicitacaoEventoAdmin(admin.ModelAdmin):
     autocomplete_fields = ('evento', 'item')
     list_display = ('evento', 'item', 'quantidade_solicitada' ,'quantidade_alocada')
     list_filter = (EventosEmAndamentoFilter,)
-    actions = ('alocar_estoque', 'baixar_checklist_producao', 'baixar_lista_compras')
+    actions = (
+        'alocar_estoque', 'distribuir_estoque', 'retornar_itens_alocados', 'baixar_checklist_producao',
+        'baixar_lista_compras'
+    )
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         return queryset.filter(evento__status=Evento.Status.EM_ANDAMENTO)
 
+    def get_urls(self):
+        return [
+            path(
+                'importar/',
+                self.admin_site.admin_view(self.importar_view),
+                name='core_solicitacaoevento_importar'
+            ),
+            *super().get_urls()
+        ]
+
+    def importar_view(self, request):
+        def importar(dados):
+            quantidade_criadas, quantidade_atualizadas = importar_solicitacoes_evento(
+                dados['evento'].id,
+                ler_planilha(dados['arquivo'], COLUNAS_IMPORTACAO_SOLICITACOES)
+            )
+            return (
+                f'{dados['evento']}: {quantidade_criadas} solicitação(ões) criada(s), '
+                f'{quantidade_atualizadas} atualizada(s)'
+            )
+
+        return gerar_resposta_importacao(
+            self,
+            request,
+            ImportacaoSolicitacoesForm,
+            importar,
+            'Importar solicitações de evento'
+        )
+
     def has_delete_permission(self, request, obj=None):
         if obj and obj.quantidade_alocada > 0:
             return False
@@ -178,22 +373,7 @@ class SolicitacaoEventoAdmin(admin.ModelAdmin):
             self.message_user(request, e.message, messages.ERROR)
             return
 
-        evento = Evento.objects.get(id=id_evento)
-        titulo = evento.__str__()
-
-        lista_itens = queryset.filter(
-            quantidade_alocada__gt=0
-        ).values_list(
-            'quantidade_alocada',
-            'item__nome'
-        )
-
-        planilha = gerar_checklist(lista_itens, titulo)
-        return HttpResponse(
-            planilha,
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            headers={'Content-Disposition': f'attachment; filename=Checklist {titulo.replace('/', '-')}.xlsx'}
-        )
+        return gerar_resposta_planilha(request, 'checklist', id_evento, queryset)
 
     @admin.action(description='Alocar quantidade disponível no estoque')
     def alocar_estoque(self, request, queryset):
@@ -202,48 +382,115 @@ class SolicitacaoEventoAdmin(admin.ModelAdmin):
         except ValidationError as e:
             self.message_user(request, e.message, messages.ERROR)
             return
-        alocar_quantidade_disponivel_estoque_solicitacoes(queryset, request.user)
+        alocar_quantidade_disponivel_estoque_solicitacoes_sql(queryset, request.user)
+
+    @admin.action(description='Distribuir estoque disponível entre eventos')
+    def distribuir_estoque(self, request, queryset):
+        eventos = distribuir_estoque_entre_eventos(request.user, queryset)
+
+        for evento in eventos:
+            self.message_user(
+                request,
+                f'{evento}: {evento.quantidade_alocada} de {evento.quantidade_solicitada} itens alocados '
+                f'({evento.quantidade_alocada / evento.quantidade_solicitada:.0%})',
+                messages.SUCCESS if evento.quantidade_alocada == evento.quantidade_solicitada else messages.WARNING
+            )
 
-    @admin.action(description='Gerar lista de compras')
-    def baixar_lista_compras(self, request, queryset):
+    @admin.action(description='Retornar itens alocados')
+    def retornar_itens_alocados(self, request, queryset):
         try:
             id_evento = obter_id_evento_unico(queryset)
         except ValidationError as e:
             self.message_user(request, e.message, messages.ERROR)
             return
 
-        evento = Evento.objects.get(id=id_evento)
-        titulo = evento.__str__()
-
-        itens_para_compra = queryset.filter(
-            quantidade_faltando__gt=0
-        ).annotate(
-            nome=models.F('item__nome'),
-            ultimo_preco_unidade_pago=models.Subquery(
-                TransacaoEstoque.objects.ultimo_preco_unidade_pago(models.OuterRef('item_id'))
+        sumarios = list(
+            SumarioItemEvento.objects.filter(
+                evento_id=id_evento,
+                item_id__in=queryset.values('item_id'),
+                quantidade_liquida__gt=0
+            ).select_related(
+                'evento',
+                'item'
+            ).order_by(
+                'item__nome'
             )
-        ).values_list(
-            'quantidade_faltando',
-            'nome',
-            'ultimo_preco_unidade_pago'
         )
+        if not sumarios:
+            self.message_user(request, 'Nenhum dos itens selecionados está alocado ao evento', messages.WARNING)
+            return
+
+        form = RetornoItensForm(request.POST if 'retornar' in request.POST else None, sumarios=sumarios)
+        if form.is_valid():
+            try:
+                transacoes = retornar_itens_de_evento(id_evento, request.user, form.quantidades())
+            except ValidationError as e:
+                self.message_user(request, ' '.join(e.messages), messages.ERROR)
+                return
 
-        planilha_lista_compras = gerar_lista_compras(itens_para_compra, titulo)
+            self.message_user(request, f'{len(transacoes)} retorno(s) registrado(s)', messages.SUCCESS)
+            return
 
-        return HttpResponse(
-            planilha_lista_compras,
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            headers={
-                'Content-Disposition': f'attachment; filename=Lista Compras {titulo.replace('/', '-')}.xlsx'
+        return TemplateResponse(
+            request,
+            'admin/core/solicitacaoevento/retornar_itens.html',
+            {
+                **self.admin_site.each_context(request),
+                'title': 'Retornar itens alocados',
+                'opts': self.opts,
+                'form': form,
+                'evento': sumarios[0].evento,
+                'solicitacoes': queryset,
+                'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
             }
         )
 
+    @admin.action(description='Gerar lista de compras')
+    def baixar_lista_compras(self, request, queryset):
+        try:
+            id_evento = obter_id_evento_unico(queryset)
+        except ValidationError as e:
+            self.message_user(request, e.message, messages.ERROR)
+            return
+
+        return gerar_resposta_planilha(request, 'lista_compras', id_evento, queryset)
+
 
 @admin.register(Item)
 class ItemAdmin(admin.ModelAdmin):
     search_fields = ('nome',)
-    list_display = ('nome', 'quantidade_em_estoque', 'valor_total')
-    ordering = ('-quantidade_em_estoque',)
+    list_display = ('nome', 'quantidade_estoque', 'valor_estoque', 'ultimo_preco_compra', 'data_ultima_compra')
+
+    def get_queryset(self, request):
+        return super().get_queryset(
+            request
+        ).com_estoque_total(
+        ).annotate(
+            preco_ultima_compra=models.F('ultima_compra__preco_unidade'),
+            timestamp_ultima_compra=models.F('ultima_compra__timestamp')
+        ).order_by(
+            '-quantidade_total_em_estoque'
+        )
+
+    @admin.display(description='Quantidade em estoque', ordering='quantidade_total_em_estoque')
+    def quantidade_estoque(self, obj):
+        return obj.quantidade_total_em_estoque
+
+    @admin.display(description='Valor total', ordering='valor_total_em_estoque')
+    def valor_estoque(self, obj):
+        return obj.valor_total_em_estoque
+
+    @admin.display(description='Preço médio')
+    def preco_medio_estoque(self, obj):
+        return obj.preco_medio_total
+
+    @admin.display(description='Último preço de compra', ordering='preco_ultima_compra')
+    def ultimo_preco_compra(self, obj):
+        return obj.preco_ultima_compra
+
+    @admin.display(description='Data da última compra', ordering='timestamp_ultima_compra')
+    def data_ultima_compra(self, obj):
+        return obj.timestamp_ultima_compra
 
     def has_delete_permission(self, request, obj: Item=None):
         if obj and obj.transacaoestoque_set.exists():
@@ -253,6 +500,219 @@ class ItemAdmin(admin.ModelAdmin):
 
     def get_readonly_fields(self, request, obj=None):
         if obj is not None:
-            return 'quantidade_em_estoque', 'valor_total'
+            return (
+                'quantidade_estoque', 'valor_estoque', 'preco_medio_estoque', 'ultimo_preco_compra', 'data_ultima_compra'
+            )
 
         return ()
+
+
+@admin.register(TarefaRelatorio)
+class TarefaRelatorioAdmin(admin.ModelAdmin):
+    list_display = ('nome_arquivo', 'status', 'solicitante', 'criado_em', 'concluido_em', 'link_download')
+    list_filter = ('status',)
+    ordering = ('-id',)
+    exclude = ('chave', 'ids_selecionados', 'iniciado_em')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:object_id>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='core_tarefarelatorio_download'
+            ),
+            *super().get_urls()
+        ]
+
+    @admin.display(description='Download')
+    def link_download(self, obj):
+        if obj.status != TarefaRelatorio.Status.CONCLUIDA:
+            return '-'
+
+        return format_html(
+            '<a href="{}">Baixar</a>',
+            reverse('admin:core_tarefarelatorio_download', args=(obj.id,))
+        )
+
+    def download_view(self, request, object_id):
+        if not self.has_view_permission(request):
+            raise Http404
+
+        tarefa = get_object_or_404(TarefaRelatorio, id=object_id, status=TarefaRelatorio.Status.CONCLUIDA)
+
+        try:
+            planilha = open(caminho_arquivo_tarefa(tarefa), 'rb')
+        except FileNotFoundError:
+            raise Http404
+
+        return FileResponse(planilha, as_attachment=True, filename=tarefa.nome_arquivo)
+
+
+@admin.register(CompactacaoTransacoes)
+class CompactacaoTransacoesAdmin(admin.ModelAdmin):
+    list_display = ('nome_arquivo', 'corte', 'transacoes_arquivadas', 'criado_em', 'restaurado_em')
+    ordering = ('-id',)
+    exclude = ('ids_entradas',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PosicaoEstoque)
+class PosicaoEstoqueAdmin(admin.ModelAdmin):
+    list_display = ('data', 'item', 'quantidade', 'preco_medio', 'valor_total')
+    list_filter = (('data', DateRangeFilter),)
+    list_select_related = ('item',)
+    search_fields = ('item__nome',)
+    ordering = ('-data', 'item__nome')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                'consultar/',
+                self.admin_site.admin_view(self.consultar_view),
+                name='core_posicaoestoque_consultar'
+            ),
+            *super().get_urls()
+        ]
+
+    def consultar_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+
+        form = ConsultaPosicaoEstoqueForm(request.GET if 'data' in request.GET else None)
+        linhas = None
+        data_base = None
+        if form.is_valid():
+            data = form.cleaned_data['data']
+            try:
+                linhas, data_base = posicao_estoque_em(data)
+            except ValidationError as e:
+                form.add_error('data', e.messages)
+            else:
+                if 'exportar' in request.GET:
+                    planilha = gerar_posicao_estoque(
+                        [
+                            (linha.quantidade_na_data, linha.nome, linha.preco_medio_na_data, linha.valor_na_data)
+                            for linha in linhas
+                        ],
+                        f'Posição de Estoque em {data:%d/%m/%Y}'
+                    )
+                    return FileResponse(
+                        io.BytesIO(planilha),
+                        as_attachment=True,
+                        filename=f'posicao_estoque_{data:%Y_%m_%d}.xlsx',
+                        content_type=CONTENT_TYPE_XLSX
+                    )
+
+        return TemplateResponse(
+            request,
+            'admin/core/posicaoestoque/consultar.html',
+            {
+                **self.admin_site.each_context(request),
+                'title': 'Consultar posição de estoque',
+                'opts': self.opts,
+                'form': form,
+                'linhas': linhas,
+                'data_base': data_base,
+                'valor_total': sum(linha.valor_na_data for linha in linhas or ()),
+            }
+        )
+
+
+@admin.register(ResumoDiarioTransacoes)
+class ResumoDiarioTransacoesAdmin(admin.ModelAdmin):
+    list_display = ('dia', 'tipo', 'item', 'quantidade', 'valor_total', 'transacoes')
+    list_filter = ('tipo', ('dia', DateRangeFilter))
+    list_select_related = ('item',)
+    search_fields = ('item__nome',)
+    ordering = ('-dia', 'tipo', 'item__nome')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        consolidar_resumos_pendentes()
+        return super().changelist_view(request, extra_context)
+
+    def get_urls(self):
+        return [
+            path(
+                'analise/',
+                self.admin_site.admin_view(self.analise_view),
+                name='core_resumodiariotransacoes_analise'
+            ),
+            *super().get_urls()
+        ]
+
+    def analise_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+
+        if 'inicio' in request.GET:
+            form = AnalisePeriodoForm(request.GET)
+        else:
+            hoje = timezone.localdate()
+            form = AnalisePeriodoForm({'inicio': hoje.replace(year=hoje.year - 1, day=1), 'fim': hoje})
+
+        gastos_por_tipo = custos_eventos = itens_mais_consumidos = None
+        if form.is_valid():
+            inicio = form.cleaned_data['inicio']
+            fim = form.cleaned_data['fim']
+            gastos_por_tipo, custos_eventos, itens_mais_consumidos = analise_periodo(inicio, fim)
+
+            if 'exportar' in request.GET:
+                planilha = gerar_analise_periodo(
+                    gastos_por_tipo,
+                    custos_eventos,
+                    itens_mais_consumidos,
+                    f'Análise de {inicio:%d/%m/%Y} a {fim:%d/%m/%Y}'
+                )
+                return FileResponse(
+                    io.BytesIO(planilha),
+                    as_attachment=True,
+                    filename=f'analise_{inicio:%Y_%m_%d}_{fim:%Y_%m_%d}.xlsx',
+                    content_type=CONTENT_TYPE_XLSX
+                )
+
+        return TemplateResponse(
+            request,
+            'admin/core/resumodiariotransacoes/analise.html',
+            {
+                **self.admin_site.each_context(request),
+                'title': 'Análise por período',
+                'opts': self.opts,
+                'form': form,
+                'gastos_por_tipo': gastos_por_tipo,
+                'custos_eventos': custos_eventos,
+                'custo_total_eventos': sum(custo for _, _, custo in custos_eventos or ()),
+                'itens_mais_consumidos': itens_mais_consumidos,
+            }
+        )
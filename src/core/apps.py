@@ -1,4 +1,6 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
 
 class CoreConfig(AppConfig):
@@ -6,4 +8,10 @@ class CoreConfig(AppConfig):
     name = 'core'
 
     def ready(self):
-        pass
\ No newline at end of file
+        from .services import PrioridadeAlocacao
+
+        if settings.ALOCACAO_PRIORIDADE not in PrioridadeAlocacao.values:
+            raise ImproperlyConfigured(
+                f'ALOCACAO_PRIORIDADE deve ser um de: {', '.join(PrioridadeAlocacao.values)} '
+                f'(recebido "{settings.ALOCACAO_PRIORIDADE}")'
+            )
@@ -0,0 +1,235 @@
+import statistics
+import time
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import connection, models, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from .models import Evento, Item, SolicitacaoEvento, SumarioItemEvento, TransacaoEstoque
+from .planilhas import gerar_checklist, gerar_lista_compras, gerar_custo_evento
+from .relatorios import TAMANHO_LOTE_CURSOR_PLANILHA, linhas_checklist, linhas_lista_compras, linhas_custo_evento
+from .services import (
+    alocar_quantidade_disponivel_estoque_solicitacoes, alocar_quantidade_disponivel_estoque_solicitacoes_sql,
+    retornar_item_de_evento
+)
+
+QUANTIDADE_FRACOES = 8
+
+
+def selecionar_alvos():
+    evento = Evento.objects.annotate(
+        quantidade_transacoes=models.Count('transacoes')
+    ).order_by(
+        '-quantidade_transacoes',
+        'id'
+    ).first()
+
+    evento_em_andamento = Evento.objects.filter(
+        status=Evento.Status.EM_ANDAMENTO
+    ).annotate(
+        solicitacoes_abertas=models.Count('solicitacoes', filter=models.Q(solicitacoes__quantidade_faltando__gt=0))
+    ).filter(
+        solicitacoes_abertas__gt=0
+    ).order_by(
+        '-solicitacoes_abertas',
+        'id'
+    ).first()
+
+    sumario = SumarioItemEvento.objects.filter(
+        quantidade_liquida__gt=0
+    ).select_related(
+        'item'
+    ).order_by(
+        '-quantidade_liquida',
+        'id'
+    ).first()
+
+    item = Item.objects.order_by('-quantidade_em_estoque', 'id').first()
+
+    usuario, _ = get_user_model().objects.get_or_create(username='benchmark')
+
+    return {
+        'evento': evento,
+        'evento_em_andamento': evento_em_andamento,
+        'sumario': sumario,
+        'item_alocado': sumario.item if sumario else None,
+        'item': item,
+        'usuario': usuario,
+    }
+
+
+def _fracionar_item(alvos):
+    item = Item.objects.get(pk=alvos['item'].pk)
+    item.quantidade_fracoes = QUANTIDADE_FRACOES
+    item.save(update_fields=['quantidade_fracoes'])
+
+
+def _creditar_item(alvos, alvo):
+    TransacaoEstoque(
+        item_id=alvos[alvo].pk,
+        tipo=TransacaoEstoque.Tipo.COMPRA,
+        quantidade=10,
+        preco_unidade=10,
+        responsavel=alvos['usuario']
+    ).save()
+
+
+def _debitar_item(alvos):
+    TransacaoEstoque(
+        item_id=alvos['item'].pk,
+        tipo=TransacaoEstoque.Tipo.CONSUMO_INTERNO,
+        quantidade=1,
+        responsavel=alvos['usuario']
+    ).save()
+
+
+def _creditar_item_condicional(alvos):
+    with override_settings(ESTOQUE_ATUALIZACAO_CONDICIONAL=True):
+        _creditar_item(alvos, 'item')
+
+
+def _debitar_item_condicional(alvos):
+    with override_settings(ESTOQUE_ATUALIZACAO_CONDICIONAL=True):
+        _debitar_item(alvos)
+
+
+def _retornar_item(alvos):
+    sumario = alvos['sumario']
+    retornar_item_de_evento(sumario.item_id, sumario.quantidade_liquida, sumario.evento_id, alvos['usuario'])
+
+
+def _alocar_estoque(alvos):
+    alocar_quantidade_disponivel_estoque_solicitacoes(
+        SolicitacaoEvento.objects.filter(evento=alvos['evento_em_andamento']),
+        alvos['usuario']
+    )
+
+
+def _alocar_estoque_sql(alvos):
+    alocar_quantidade_disponivel_estoque_solicitacoes_sql(
+        SolicitacaoEvento.objects.filter(evento=alvos['evento_em_andamento']),
+        alvos['usuario']
+    )
+
+
+def _sumario_de_itens(alvos):
+    list(SolicitacaoEvento.objects.com_sumario_de_itens(alvos['evento'].id))
+
+
+def _custo_total_calculado(alvos):
+    list(Evento.objects.com_custo_total_calculado().values_list('id', 'custo_total_calculado'))
+
+
+def _planilha_checklist(alvos):
+    linhas = linhas_checklist(SolicitacaoEvento.objects.filter(evento=alvos['evento']))
+    gerar_checklist(linhas.iterator(chunk_size=TAMANHO_LOTE_CURSOR_PLANILHA), str(alvos['evento']))
+
+
+def _planilha_lista_compras(alvos):
+    linhas = linhas_lista_compras(SolicitacaoEvento.objects.filter(evento=alvos['evento_em_andamento']))
+    gerar_lista_compras(linhas.iterator(chunk_size=TAMANHO_LOTE_CURSOR_PLANILHA), str(alvos['evento_em_andamento']))
+
+
+def _planilha_custo_evento(alvos):
+    linhas = linhas_custo_evento(TransacaoEstoque.objects.filter(evento=alvos['evento']))
+    gerar_custo_evento(linhas.iterator(chunk_size=TAMANHO_LOTE_CURSOR_PLANILHA), str(alvos['evento']))
+
+
+CENARIOS = {
+    'TransacaoEstoque.save': partial(_creditar_item, alvo='item_alocado'),
+    'TransacaoEstoque.save_condicional_credito': _creditar_item_condicional,
+    'TransacaoEstoque.save_condicional_debito': _debitar_item_condicional,
+    'TransacaoEstoque.save_fracionado_credito': partial(_creditar_item, alvo='item'),
+    'TransacaoEstoque.save_fracionado_debito': _debitar_item,
+    'retornar_item_de_evento': _retornar_item,
+    'alocar_quantidade_disponivel_estoque_solicitacoes': _alocar_estoque,
+    'alocar_quantidade_disponivel_estoque_solicitacoes_sql': _alocar_estoque_sql,
+    'com_sumario_de_itens': _sumario_de_itens,
+    'com_custo_total_calculado': _custo_total_calculado,
+    'gerar_checklist': _planilha_checklist,
+    'gerar_lista_compras': _planilha_lista_compras,
+    'gerar_custo_evento': _planilha_custo_evento,
+}
+
+PREPARACOES = {
+    'TransacaoEstoque.save_fracionado_credito': _fracionar_item,
+    'TransacaoEstoque.save_fracionado_debito': _fracionar_item,
+}
+
+ALVOS_CENARIOS = {
+    'TransacaoEstoque.save': ('item_alocado',),
+    'TransacaoEstoque.save_condicional_credito': ('item',),
+    'TransacaoEstoque.save_condicional_debito': ('item',),
+    'TransacaoEstoque.save_fracionado_credito': ('item',),
+    'TransacaoEstoque.save_fracionado_debito': ('item',),
+    'retornar_item_de_evento': ('sumario',),
+    'alocar_quantidade_disponivel_estoque_solicitacoes': ('evento_em_andamento',),
+    'alocar_quantidade_disponivel_estoque_solicitacoes_sql': ('evento_em_andamento',),
+    'com_sumario_de_itens': ('evento',),
+    'gerar_checklist': ('evento',),
+    'gerar_lista_compras': ('evento_em_andamento',),
+    'gerar_custo_evento': ('evento',),
+}
+
+
+def alvos_ausentes(nome, alvos):
+    return [alvo for alvo in ALVOS_CENARIOS.get(nome, ()) if alvos[alvo] is None]
+
+
+def medir_cenario(cenario, alvos, repeticoes, preparar=None):
+    tempos = []
+    for _ in range(repeticoes):
+        with transaction.atomic():
+            if preparar is not None:
+                preparar(alvos)
+
+            with CaptureQueriesContext(connection) as consultas:
+                inicio = time.perf_counter()
+                cenario(alvos)
+                tempos.append((time.perf_counter() - inicio) * 1000)
+
+            transaction.set_rollback(True)
+
+    return {
+        'mediana_ms': round(statistics.median(tempos), 3),
+        'minimo_ms': round(min(tempos), 3),
+        'consultas': len(consultas),
+    }
+
+
+def executar_benchmarks(repeticoes, cenarios=None):
+    alvos = selecionar_alvos()
+
+    resultados = {}
+    for nome in cenarios or CENARIOS:
+        ausentes = alvos_ausentes(nome, alvos)
+        if ausentes:
+            resultados[nome] = {'alvos_ausentes': ausentes}
+            continue
+
+        resultados[nome] = medir_cenario(CENARIOS[nome], alvos, repeticoes, PREPARACOES.get(nome))
+
+    return resultados
+
+
+def comparar_resultados(resultados, referencia, tolerancia):
+    regressoes = []
+    for tamanho, resultados_tamanho in resultados.items():
+        for nome, resultado in resultados_tamanho.items():
+            resultado_referencia = referencia.get(tamanho, {}).get(nome)
+            if resultado_referencia is None or 'alvos_ausentes' in resultado or 'alvos_ausentes' in resultado_referencia:
+                continue
+
+            if resultado['mediana_ms'] > resultado_referencia['mediana_ms'] * (1 + tolerancia):
+                regressoes.append(
+                    f'{nome} ({tamanho} transações): {resultado['mediana_ms']} ms, '
+                    f'referência {resultado_referencia['mediana_ms']} ms'
+                )
+            if resultado['consultas'] > resultado_referencia['consultas']:
+                regressoes.append(
+                    f'{nome} ({tamanho} transações): {resultado['consultas']} consultas, '
+                    f'referência {resultado_referencia['consultas']}'
+                )
+
+    return regressoes
@@ -0,0 +1,65 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+
+def _diretorio_cache():
+    return Path(settings.PLANILHAS_CACHE_DIR)
+
+
+def _caminho_planilha(chave):
+    return _diretorio_cache() / f'{hashlib.sha256(chave.encode()).hexdigest()}.xlsx'
+
+
+def obter_planilha_em_cache(chave):
+    caminho = _caminho_planilha(chave)
+
+    try:
+        arquivo = open(caminho, 'rb')
+    except FileNotFoundError:
+        return None
+
+    os.utime(caminho)
+    return arquivo
+
+
+def gravar_planilha_em_cache(chave, gerar_planilha):
+    diretorio = _diretorio_cache()
+    diretorio.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.NamedTemporaryFile(dir=diretorio, suffix='.tmp', delete=False) as arquivo_temporario:
+        try:
+            gerar_planilha(arquivo_temporario)
+        except BaseException:
+            os.unlink(arquivo_temporario.name)
+            raise
+
+    caminho = _caminho_planilha(chave)
+    os.replace(arquivo_temporario.name, caminho)
+    arquivo = open(caminho, 'rb')
+
+    _expurgar_cache(diretorio)
+
+    return arquivo
+
+
+def _expurgar_cache(diretorio):
+    planilhas = []
+    for caminho in diretorio.glob('*.xlsx'):
+        try:
+            estado = caminho.stat()
+        except FileNotFoundError:
+            continue
+        planilhas.append((estado.st_mtime, estado.st_size, caminho))
+
+    tamanho_total = sum(tamanho for _, tamanho, _ in planilhas)
+
+    for _, tamanho, caminho in sorted(planilhas):
+        if tamanho_total <= settings.PLANILHAS_CACHE_TAMANHO_MAXIMO:
+            break
+
+        caminho.unlink(missing_ok=True)
+        tamanho_total -= tamanho
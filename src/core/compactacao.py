@@ -0,0 +1,316 @@
+import csv
+import gzip
+from datetime import datetime, time
+from decimal import Decimal, ROUND_DOWN
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import (
+    CompactacaoTransacoes, DiaTransacaoEstoque, Evento, TipoTransacao, TransacaoEstoque, UltimaCompraItem,
+    TIPOS_ENTRADA_ESTOQUE
+)
+from .particoes import colunas_gravaveis
+
+CASAS_DECIMAIS = Decimal('0.0001')
+TAMANHO_BLOCO_ARQUIVO = 64 * 1024
+EVENTOS_EXIBIDOS = 10
+
+
+def caminho_arquivo_compactacao(compactacao):
+    return Path(settings.TRANSACOES_COMPACTACAO_DIR) / compactacao.nome_arquivo
+
+
+def _travar_compactacoes(cursor):
+    cursor.execute(f'LOCK TABLE {CompactacaoTransacoes._meta.db_table} IN EXCLUSIVE MODE')
+
+
+def _reconstruir_dias_ate(corte):
+    DiaTransacaoEstoque.objects.filter(dia__lt=timezone.localdate(corte)).delete()
+    DiaTransacaoEstoque.objects.preencher(TransacaoEstoque.objects.filter(timestamp__lt=corte))
+
+
+def _validar_eventos_concluidos(corte):
+    eventos_em_andamento = [
+        str(evento)
+        for evento in Evento.objects.select_for_update(
+            no_key=True
+        ).filter(
+            id__in=TransacaoEstoque.objects.filter(timestamp__lt=corte, evento__isnull=False).values('evento_id')
+        ).order_by(
+            'id'
+        )
+        if evento.status != Evento.Status.CONCLUIDO
+    ]
+
+    if eventos_em_andamento:
+        raise ValidationError(
+            f'{len(eventos_em_andamento)} evento(s) em andamento possuem transações anteriores à data de corte: '
+            f'{', '.join(eventos_em_andamento[:EVENTOS_EXIBIDOS])}'
+        )
+
+
+def _remover_transacoes_compactaveis(cursor, tabela, corte):
+    cursor.execute(
+        'CREATE TEMPORARY TABLE limites_compactacao ON COMMIT DROP AS '
+        'SELECT DISTINCT ON (transacao.item_id) transacao.item_id, transacao."timestamp", transacao.id '
+        f'FROM {tabela} transacao '
+        f'JOIN {UltimaCompraItem._meta.db_table} ultima_compra ON ultima_compra.item_id = transacao.item_id '
+        'WHERE transacao.tipo = %(compra)s AND transacao."timestamp" < %(corte)s '
+        'AND ultima_compra."timestamp" < %(corte)s '
+        'ORDER BY transacao.item_id, transacao."timestamp" DESC, transacao.id DESC',
+        {'compra': TipoTransacao.COMPRA, 'corte': corte}
+    )
+    cursor.execute(
+        'CREATE TEMPORARY TABLE transacoes_compactadas ON COMMIT DROP AS '
+        'WITH removidas AS ('
+        f'DELETE FROM {tabela} transacao WHERE transacao."timestamp" < %(corte)s AND NOT EXISTS ('
+        'SELECT 1 FROM limites_compactacao limite WHERE limite.item_id = transacao.item_id '
+        'AND (transacao."timestamp", transacao.id) >= (limite."timestamp", limite.id)'
+        ') RETURNING transacao.*'
+        ') SELECT * FROM removidas',
+        {'corte': corte}
+    )
+
+
+def _entradas_saldo_inicial(quantidade, valor):
+    preco_unidade = (valor / quantidade).quantize(CASAS_DECIMAIS, rounding=ROUND_DOWN)
+    if preco_unidade * quantidade == valor:
+        return [(quantidade, preco_unidade)]
+
+    return [(quantidade - 1, preco_unidade), (1, valor - (quantidade - 1) * preco_unidade)]
+
+
+def _calcular_saldos_iniciais(cursor, corte):
+    cursor.execute(
+        'SELECT compactada.item_id, COALESCE(limite."timestamp", %(corte)s) - interval \'1 microsecond\', '
+        'SUM(CASE WHEN compactada.tipo = ANY(%(entradas)s) THEN compactada.quantidade ELSE -compactada.quantidade END) '
+        'FILTER (WHERE compactada.evento_id IS NULL), '
+        'SUM(CASE WHEN compactada.tipo = ANY(%(entradas)s) THEN compactada.valor_total ELSE -compactada.valor_total END) '
+        'FILTER (WHERE compactada.evento_id IS NULL) '
+        'FROM transacoes_compactadas compactada LEFT JOIN limites_compactacao limite USING (item_id) '
+        'GROUP BY compactada.item_id, limite."timestamp" '
+        'ORDER BY compactada.item_id',
+        {'corte': corte, 'entradas': list(TIPOS_ENTRADA_ESTOQUE)}
+    )
+
+    entradas = []
+    ids_itens_mantidos = []
+    for id_item, momento, quantidade, valor in cursor.fetchall():
+        quantidade = quantidade or 0
+        valor = valor or Decimal(0)
+
+        if quantidade < 0 or valor < 0 or (quantidade == 0 and valor != 0):
+            ids_itens_mantidos.append(id_item)
+            continue
+
+        if quantidade:
+            entradas.extend(
+                (id_item, momento, quantidade_entrada, preco_unidade)
+                for quantidade_entrada, preco_unidade in _entradas_saldo_inicial(quantidade, valor)
+            )
+
+    return entradas, ids_itens_mantidos
+
+
+def _gravar_arquivo(cursor, caminho, formato):
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+
+    if formato == CompactacaoTransacoes.Formato.CSV:
+        with (
+            gzip.open(caminho, 'wb') as arquivo,
+            cursor.copy(
+                'COPY (SELECT * FROM transacoes_compactadas ORDER BY "timestamp", id) TO STDOUT WITH (FORMAT csv, HEADER)'
+            ) as copia
+        ):
+            for bloco in copia:
+                arquivo.write(bloco)
+        return
+
+    with (
+        gzip.open(caminho, 'wt', encoding='utf-8') as arquivo,
+        cursor.copy(
+            'COPY (SELECT row_to_json(compactada)::text FROM transacoes_compactadas compactada '
+            'ORDER BY compactada."timestamp", compactada.id) TO STDOUT'
+        ) as copia
+    ):
+        copia.set_types(['text'])
+        for linha, in copia.rows():
+            arquivo.write(f'{linha}\n')
+
+
+def _ler_arquivo(cursor, caminho, formato, colunas_tabela):
+    if formato == CompactacaoTransacoes.Formato.CSV:
+        with gzip.open(caminho, 'rt', encoding='utf-8', newline='') as arquivo:
+            colunas = next(csv.reader([arquivo.readline()]), [])
+            if not colunas or not set(colunas) <= colunas_tabela:
+                raise ValidationError(f'O cabeçalho do arquivo {caminho.name} não corresponde às transações de estoque')
+
+            colunas = ', '.join(f'"{coluna}"' for coluna in colunas)
+            with cursor.copy(f'COPY transacoes_restauradas ({colunas}) FROM STDIN WITH (FORMAT csv)') as copia:
+                while bloco := arquivo.read(TAMANHO_BLOCO_ARQUIVO):
+                    copia.write(bloco)
+        return
+
+    cursor.execute('CREATE TEMPORARY TABLE transacoes_restauradas_json (linha jsonb) ON COMMIT DROP')
+    with (
+        gzip.open(caminho, 'rt', encoding='utf-8') as arquivo,
+        cursor.copy('COPY transacoes_restauradas_json (linha) FROM STDIN') as copia
+    ):
+        for linha in arquivo:
+            if linha.strip():
+                copia.write_row((linha,))
+
+    cursor.execute(
+        'INSERT INTO transacoes_restauradas '
+        'SELECT (jsonb_populate_record(NULL::transacoes_restauradas, linha)).* FROM transacoes_restauradas_json'
+    )
+
+
+def compactar_transacoes(data_corte, formato=CompactacaoTransacoes.Formato.JSONL):
+    corte = timezone.make_aware(datetime.combine(data_corte, time.min))
+    if data_corte > timezone.localdate():
+        raise ValidationError('A data de corte não pode ser posterior ao dia atual')
+
+    tabela = TransacaoEstoque._meta.db_table
+    caminho = None
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            _travar_compactacoes(cursor)
+
+            ultima_compactacao = CompactacaoTransacoes.objects.filter(
+                restaurado_em__isnull=True
+            ).order_by(
+                '-id'
+            ).first()
+            if ultima_compactacao is not None and ultima_compactacao.corte >= corte:
+                raise ValidationError(
+                    'A data de corte deve ser posterior à da última compactação '
+                    f'({timezone.localdate(ultima_compactacao.corte):%d/%m/%Y})'
+                )
+
+            _validar_eventos_concluidos(corte)
+
+            compactacao = CompactacaoTransacoes.objects.create(corte=corte, formato=formato)
+            compactacao.nome_arquivo = f'transacoes_{compactacao.id}_ate_{data_corte:%Y-%m-%d}.{formato}.gz'
+
+            _remover_transacoes_compactaveis(cursor, tabela, corte)
+            entradas, ids_itens_mantidos = _calcular_saldos_iniciais(cursor, corte)
+
+            if ids_itens_mantidos:
+                colunas = ', '.join(colunas_gravaveis(cursor, tabela))
+                cursor.execute(
+                    f'INSERT INTO {tabela} ({colunas}) SELECT {colunas} FROM transacoes_compactadas '
+                    'WHERE item_id = ANY(%s)',
+                    [ids_itens_mantidos]
+                )
+                cursor.execute('DELETE FROM transacoes_compactadas WHERE item_id = ANY(%s)', [ids_itens_mantidos])
+
+            cursor.execute('SELECT count(*) FROM transacoes_compactadas')
+            compactacao.transacoes_arquivadas = cursor.fetchone()[0]
+            if not compactacao.transacoes_arquivadas:
+                raise ValidationError('Não há transações a compactar antes da data de corte')
+
+            cursor.execute(
+                f'INSERT INTO {tabela} (item_id, tipo, "timestamp", quantidade, preco_unidade, nota) '
+                'SELECT entrada.item_id, %(tipo)s, entrada.momento, entrada.quantidade, entrada.preco_unidade, %(nota)s '
+                'FROM unnest(%(ids_itens)s::bigint[], %(momentos)s::timestamptz[], %(quantidades)s::integer[], '
+                '%(precos)s::numeric[]) AS entrada(item_id, momento, quantidade, preco_unidade) '
+                'RETURNING id',
+                {
+                    'tipo': TipoTransacao.SALDO_INICIAL,
+                    'nota': f'Saldo inicial da compactação {compactacao.id}',
+                    'ids_itens': [entrada[0] for entrada in entradas],
+                    'momentos': [entrada[1] for entrada in entradas],
+                    'quantidades': [entrada[2] for entrada in entradas],
+                    'precos': [entrada[3] for entrada in entradas],
+                }
+            )
+            ids_entradas = [id_transacao for id_transacao, in cursor.fetchall()]
+
+            cursor.execute(
+                f'INSERT INTO {tabela} (item_id, evento_id, tipo, "timestamp", quantidade, preco_unidade, nota) '
+                'SELECT item_id, evento_id, CASE WHEN liquida > 0 THEN %(alocacao)s ELSE %(retorno)s END, momento, '
+                'abs(liquida), preco_unidade, %(nota)s '
+                'FROM ('
+                'SELECT compactada.item_id, compactada.evento_id, compactada.preco_unidade, '
+                'COALESCE(limite."timestamp", %(corte)s) - interval \'1 microsecond\' AS momento, '
+                'SUM(CASE WHEN compactada.tipo = %(alocacao)s THEN compactada.quantidade ELSE -compactada.quantidade END) '
+                'AS liquida '
+                'FROM transacoes_compactadas compactada LEFT JOIN limites_compactacao limite USING (item_id) '
+                'WHERE compactada.evento_id IS NOT NULL '
+                'GROUP BY compactada.item_id, compactada.evento_id, compactada.preco_unidade, limite."timestamp"'
+                ') consolidada '
+                'WHERE liquida <> 0 '
+                'RETURNING id',
+                {
+                    'alocacao': TipoTransacao.ALOCACAO_EVENTO,
+                    'retorno': TipoTransacao.RETORNO_EVENTO,
+                    'nota': f'Consolidado da compactação {compactacao.id}',
+                    'corte': corte,
+                }
+            )
+            ids_entradas.extend(id_transacao for id_transacao, in cursor.fetchall())
+
+            caminho = caminho_arquivo_compactacao(compactacao)
+            _gravar_arquivo(cursor, caminho, formato)
+
+            compactacao.ids_entradas = ids_entradas
+            compactacao.save(update_fields=('nome_arquivo', 'transacoes_arquivadas', 'ids_entradas'))
+            _reconstruir_dias_ate(corte)
+    except BaseException:
+        if caminho is not None:
+            caminho.unlink(missing_ok=True)
+        raise
+
+    return compactacao, ids_itens_mantidos
+
+
+def restaurar_compactacao(compactacao):
+    tabela = TransacaoEstoque._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        _travar_compactacoes(cursor)
+        compactacao.refresh_from_db()
+
+        if compactacao.restaurado_em is not None:
+            raise ValidationError(f'A compactação {compactacao.id} já foi restaurada')
+        if CompactacaoTransacoes.objects.filter(restaurado_em__isnull=True, id__gt=compactacao.id).exists():
+            raise ValidationError('Restaure antes as compactações posteriores, da mais recente para a mais antiga')
+
+        caminho = caminho_arquivo_compactacao(compactacao)
+        if not caminho.exists():
+            raise ValidationError(f'Arquivo {caminho} não encontrado')
+
+        cursor.execute(
+            f'DELETE FROM {tabela} WHERE "timestamp" < %s AND id = ANY(%s)',
+            [compactacao.corte, compactacao.ids_entradas]
+        )
+        if cursor.rowcount != len(compactacao.ids_entradas):
+            raise ValidationError(
+                f'Os saldos iniciais da compactação {compactacao.id} foram alterados ou removidos. '
+                'Não é possível restaurá-la'
+            )
+
+        cursor.execute(
+            'CREATE TEMPORARY TABLE transacoes_restauradas ON COMMIT DROP AS '
+            f'SELECT * FROM {tabela} WITH NO DATA'
+        )
+        colunas_tabela = {coluna.strip('"') for coluna in colunas_gravaveis(cursor, tabela)}
+        _ler_arquivo(cursor, caminho, compactacao.formato, colunas_tabela | {'valor_total'})
+
+        colunas = ', '.join(colunas_gravaveis(cursor, tabela))
+        cursor.execute(f'INSERT INTO {tabela} ({colunas}) SELECT {colunas} FROM transacoes_restauradas')
+        if cursor.rowcount != compactacao.transacoes_arquivadas:
+            raise ValidationError(
+                f'O arquivo {caminho.name} possui {cursor.rowcount} transação(ões), '
+                f'mas a compactação arquivou {compactacao.transacoes_arquivadas}'
+            )
+
+        compactacao.restaurado_em = timezone.now()
+        compactacao.save(update_fields=('restaurado_em',))
+        _reconstruir_dias_ate(compactacao.corte)
+
+    return compactacao
@@ -0,0 +1,104 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import models, transaction
+
+from .metricas import Contador, Histograma
+
+logger = logging.getLogger('core.contencao')
+
+espera_travamento = Histograma(
+    'backstage_travamento_espera_segundos',
+    'Tempo de espera para adquirir travas de linha com select_for_update',
+    rotulos=('secao', 'modelo')
+)
+retencao_travamento = Histograma(
+    'backstage_travamento_retencao_segundos',
+    'Tempo entre a aquisição das travas de linha e o commit da transação',
+    rotulos=('secao', 'modelo')
+)
+linhas_travadas = Contador(
+    'backstage_travamento_linhas_total',
+    'Quantidade de linhas travadas com select_for_update',
+    rotulos=('secao', 'modelo')
+)
+
+_espera_por_linha = Counter()
+_travamentos_por_linha = Counter()
+_trava_linhas = threading.Lock()
+
+
+def _identificadores(resultado):
+    if isinstance(resultado, models.Model):
+        return [resultado.pk]
+    if isinstance(resultado, dict):
+        return list(resultado)
+
+    return [
+        linha.pk if isinstance(linha, models.Model) else linha[0] if isinstance(linha, tuple) else linha
+        for linha in resultado
+    ]
+
+
+def _registrar_espera_por_linha(modelo, identificadores, espera):
+    with _trava_linhas:
+        for identificador in identificadores:
+            _espera_por_linha[(modelo, identificador)] += espera
+            _travamentos_por_linha[(modelo, identificador)] += 1
+
+        if len(_espera_por_linha) > settings.CONTENCAO_LINHAS_MONITORADAS * 2:
+            for chave, _ in _espera_por_linha.most_common()[settings.CONTENCAO_LINHAS_MONITORADAS:]:
+                del _espera_por_linha[chave]
+                del _travamentos_por_linha[chave]
+
+
+def linhas_mais_disputadas(quantidade):
+    with _trava_linhas:
+        return [
+            (modelo, identificador, espera, _travamentos_por_linha[(modelo, identificador)])
+            for (modelo, identificador), espera in _espera_por_linha.most_common(quantidade)
+        ]
+
+
+def _registrar_excesso(evento, secao, modelo, identificadores, duracao, limite_ms):
+    if duracao * 1000 < limite_ms:
+        return
+
+    logger.warning(json.dumps({
+        'evento': evento,
+        'secao': secao,
+        'modelo': modelo,
+        'linhas': len(identificadores),
+        'ids': identificadores[:20],
+        'duracao_ms': round(duracao * 1000, 3),
+    }))
+
+
+def travar(secao, modelo, consulta):
+    inicio = time.perf_counter()
+    resultado = consulta()
+    adquirido = time.perf_counter()
+
+    nome_modelo = modelo._meta.label
+    identificadores = _identificadores(resultado)
+    espera = adquirido - inicio
+
+    espera_travamento.observar(espera, secao=secao, modelo=nome_modelo)
+    linhas_travadas.incrementar(len(identificadores), secao=secao, modelo=nome_modelo)
+    _registrar_espera_por_linha(nome_modelo, identificadores, espera)
+    _registrar_excesso('espera', secao, nome_modelo, identificadores, espera, settings.CONTENCAO_LIMITE_ESPERA_MS)
+
+    def _registrar_retencao():
+        retencao = time.perf_counter() - adquirido
+        retencao_travamento.observar(retencao, secao=secao, modelo=nome_modelo)
+        _registrar_excesso(
+            'retencao', secao, nome_modelo, identificadores, retencao, settings.CONTENCAO_LIMITE_RETENCAO_MS
+        )
+
+    transaction.on_commit(_registrar_retencao)
+
+    return resultado
@@ -0,0 +1,269 @@
+import random
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from .models import (
+    Item, FracaoEstoque, Evento, SolicitacaoEvento, TransacaoEstoque, SumarioItemEvento, LoteAlocacao, TarefaRelatorio,
+    DiaTransacaoEstoque, CompactacaoTransacoes, PosicaoEstoque, ResumoDiarioTransacoes, ResumoDiarioEvento,
+    ResumoDiarioTransacoesPendente, ResumoDiarioEventoPendente, UltimaCompraItem, TipoTransacao
+)
+from .particoes import criar_particoes
+
+ESTOQUE_MAXIMO_ITEM = 1000
+SOLICITACOES_POR_EVENTO = 20
+PERIODO_TRANSACOES = timedelta(days=730)
+INICIO_TRANSACOES = datetime(2024, 1, 1, tzinfo=timezone.utc)
+INICIO_EVENTOS = date(2024, 1, 1)
+CASAS_DECIMAIS = Decimal('0.0001')
+
+MODELOS_SINTETICOS = (
+    TarefaRelatorio, CompactacaoTransacoes, PosicaoEstoque, ResumoDiarioTransacoes, ResumoDiarioEvento,
+    ResumoDiarioTransacoesPendente, ResumoDiarioEventoPendente,
+    DiaTransacaoEstoque, LoteAlocacao, SumarioItemEvento, TransacaoEstoque, SolicitacaoEvento, Evento, FracaoEstoque,
+    UltimaCompraItem, Item
+)
+
+
+def banco_possui_dados():
+    return Item.objects.exists() or Evento.objects.exists()
+
+
+def limpar_dados():
+    tabelas = ', '.join(modelo._meta.db_table for modelo in MODELOS_SINTETICOS)
+    with connection.cursor() as cursor:
+        cursor.execute(f'TRUNCATE {tabelas} RESTART IDENTITY CASCADE')
+
+
+def _copiar(cursor, tabela, colunas, linhas):
+    with cursor.copy(f'COPY {tabela} ({', '.join(colunas)}) FROM STDIN') as copia:
+        for linha in linhas:
+            copia.write_row(linha)
+
+
+def _atualizar_a_partir_de(cursor, modelo, colunas, linhas):
+    tabela = modelo._meta.db_table
+    tabela_temporaria = f'{tabela}_sintetico'
+    cursor.execute(
+        f'CREATE TEMPORARY TABLE {tabela_temporaria} ON COMMIT DROP AS '
+        f'SELECT {', '.join(colunas)} FROM {tabela} WITH NO DATA'
+    )
+    _copiar(cursor, tabela_temporaria, colunas, linhas)
+    cursor.execute(
+        f'UPDATE {tabela} SET {', '.join(f'{coluna} = origem.{coluna}' for coluna in colunas[1:])} '
+        f'FROM {tabela_temporaria} origem WHERE {tabela}.id = origem.id'
+    )
+
+
+def gerar_dados_sinteticos(quantidade_itens, quantidade_eventos, quantidade_transacoes, semente=0):
+    aleatorio = random.Random(semente)
+
+    itens = [[0, Decimal(0), None, None] for _ in range(quantidade_itens)]
+    solicitacoes = []
+    for indice_evento in range(quantidade_eventos):
+        for indice_item in aleatorio.sample(range(quantidade_itens), min(SOLICITACOES_POR_EVENTO, quantidade_itens)):
+            solicitacoes.append([indice_evento, indice_item, aleatorio.randint(10, 100), 0])
+
+    solicitacoes_abertas = list(range(len(solicitacoes)))
+    lotes = {}
+    sumarios = {}
+    alocacoes_abertas = []
+    intervalo = PERIODO_TRANSACOES / max(quantidade_transacoes, 1)
+
+    def _transacoes():
+        for indice_transacao in range(quantidade_transacoes):
+            timestamp = INICIO_TRANSACOES + intervalo * indice_transacao
+            sorteio = aleatorio.random()
+            indice_item = aleatorio.randrange(quantidade_itens)
+
+            if sorteio < 0.35 and solicitacoes_abertas:
+                posicao = aleatorio.randrange(len(solicitacoes_abertas))
+                solicitacao = solicitacoes[solicitacoes_abertas[posicao]]
+                indice_evento, indice_item = solicitacao[0], solicitacao[1]
+                estoque = itens[indice_item]
+
+                if estoque[0] > 1:
+                    quantidade = min(aleatorio.randint(1, 20), estoque[0] - 1, solicitacao[2] - solicitacao[3])
+                    preco = (estoque[1] / estoque[0]).quantize(CASAS_DECIMAIS, ROUND_HALF_UP)
+                    estoque[0] -= quantidade
+                    estoque[1] -= quantidade * preco
+
+                    solicitacao[3] += quantidade
+                    if solicitacao[3] == solicitacao[2]:
+                        solicitacoes_abertas[posicao] = solicitacoes_abertas[-1]
+                        solicitacoes_abertas.pop()
+
+                    chave = (indice_evento, indice_item)
+                    if chave not in lotes:
+                        lotes[chave] = deque()
+                        sumarios[chave] = [0, 0, Decimal(0)]
+                    if not lotes[chave]:
+                        alocacoes_abertas.append(chave)
+                    lotes[chave].append([quantidade, preco])
+                    sumarios[chave][0] += quantidade
+                    sumarios[chave][2] += quantidade * preco
+
+                    yield indice_item, TipoTransacao.ALOCACAO_EVENTO, timestamp, quantidade, preco, indice_evento
+                    continue
+
+            if sorteio < 0.5 and alocacoes_abertas:
+                posicao = aleatorio.randrange(len(alocacoes_abertas))
+                chave = alocacoes_abertas[posicao]
+                indice_evento, indice_item = chave
+                lotes_chave = lotes[chave]
+                quantidade = aleatorio.randint(1, 10)
+                estoque = itens[indice_item]
+
+                while quantidade and lotes_chave:
+                    lote = lotes_chave[0]
+                    quantidade_lote = min(quantidade, lote[0])
+                    lote[0] -= quantidade_lote
+                    quantidade -= quantidade_lote
+                    if not lote[0]:
+                        lotes_chave.popleft()
+
+                    estoque[0] += quantidade_lote
+                    estoque[1] += quantidade_lote * lote[1]
+                    sumarios[chave][1] += quantidade_lote
+                    sumarios[chave][2] -= quantidade_lote * lote[1]
+
+                    yield indice_item, TipoTransacao.RETORNO_EVENTO, timestamp, quantidade_lote, lote[1], indice_evento
+
+                if not lotes_chave:
+                    alocacoes_abertas[posicao] = alocacoes_abertas[-1]
+                    alocacoes_abertas.pop()
+                continue
+
+            estoque = itens[indice_item]
+            if estoque[0] < ESTOQUE_MAXIMO_ITEM:
+                tipo = TipoTransacao.COMPRA if sorteio < 0.9 else TipoTransacao.PATROCINIO
+                quantidade = aleatorio.randint(10, 100)
+                preco = Decimal(aleatorio.randint(100, 5000)) / 100 if tipo == TipoTransacao.COMPRA else Decimal(0)
+                estoque[0] += quantidade
+                estoque[1] += quantidade * preco
+                if tipo == TipoTransacao.COMPRA:
+                    estoque[2:] = preco, timestamp
+            else:
+                tipo = TipoTransacao.CONSUMO_INTERNO
+                quantidade = aleatorio.randint(10, 100)
+                preco = (estoque[1] / estoque[0]).quantize(CASAS_DECIMAIS, ROUND_HALF_UP)
+                estoque[0] -= quantidade
+                estoque[1] -= quantidade * preco
+
+            yield indice_item, tipo, timestamp, quantidade, preco, None
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        _copiar(
+            cursor,
+            Item._meta.db_table,
+            ('id', 'nome', 'quantidade_fracoes', 'quantidade_em_estoque', 'valor_total'),
+            ((indice + 1, f'Item {indice + 1:06d}', 0, 0, 0) for indice in range(quantidade_itens))
+        )
+        _copiar(
+            cursor,
+            Evento._meta.db_table,
+            ('id', 'nome', 'data', 'status', 'custo_total', 'versao'),
+            (
+                (
+                    indice + 1,
+                    f'Evento {indice + 1:06d}',
+                    INICIO_EVENTOS + PERIODO_TRANSACOES * indice / max(quantidade_eventos, 1),
+                    Evento.Status.CONCLUIDO if indice < quantidade_eventos * 0.9 else Evento.Status.EM_ANDAMENTO,
+                    0,
+                    0
+                )
+                for indice in range(quantidade_eventos)
+            )
+        )
+        _copiar(
+            cursor,
+            SolicitacaoEvento._meta.db_table,
+            ('id', 'evento_id', 'item_id', 'quantidade_solicitada', 'quantidade_alocada'),
+            (
+                (indice + 1, indice_evento + 1, indice_item + 1, quantidade_solicitada, 0)
+                for indice, (indice_evento, indice_item, quantidade_solicitada, _) in enumerate(solicitacoes)
+            )
+        )
+        criar_particoes(
+            cursor,
+            TransacaoEstoque._meta.db_table,
+            INICIO_TRANSACOES,
+            INICIO_TRANSACOES + PERIODO_TRANSACOES,
+            settings.TRANSACOES_PARTICIONAMENTO
+        )
+        _copiar(
+            cursor,
+            TransacaoEstoque._meta.db_table,
+            ('item_id', 'tipo', 'timestamp', 'quantidade', 'preco_unidade', 'evento_id'),
+            (
+                (indice_item + 1, tipo, timestamp, quantidade, preco, None if indice_evento is None else indice_evento + 1)
+                for indice_item, tipo, timestamp, quantidade, preco, indice_evento in _transacoes()
+            )
+        )
+
+        _atualizar_a_partir_de(
+            cursor,
+            Item,
+            ('id', 'quantidade_em_estoque', 'valor_total'),
+            ((indice + 1, quantidade, valor) for indice, (quantidade, valor, _, _) in enumerate(itens))
+        )
+        _copiar(
+            cursor,
+            UltimaCompraItem._meta.db_table,
+            ('item_id', 'preco_unidade', 'timestamp'),
+            (
+                (indice + 1, preco_unidade, timestamp)
+                for indice, (_, _, preco_unidade, timestamp) in enumerate(itens)
+                if timestamp is not None
+            )
+        )
+        _atualizar_a_partir_de(
+            cursor,
+            SolicitacaoEvento,
+            ('id', 'quantidade_alocada'),
+            ((indice + 1, solicitacao[3]) for indice, solicitacao in enumerate(solicitacoes) if solicitacao[3])
+        )
+
+        custos_eventos = {}
+        for (indice_evento, _), (_, _, custo) in sumarios.items():
+            custos_eventos[indice_evento] = custos_eventos.get(indice_evento, Decimal(0)) + custo
+        _atualizar_a_partir_de(
+            cursor,
+            Evento,
+            ('id', 'custo_total'),
+            ((indice_evento + 1, custo) for indice_evento, custo in sorted(custos_eventos.items()))
+        )
+
+        _copiar(
+            cursor,
+            SumarioItemEvento._meta.db_table,
+            ('evento_id', 'item_id', 'quantidade_alocada', 'quantidade_retornada', 'custo_liquido'),
+            (
+                (indice_evento + 1, indice_item + 1, quantidade_alocada, quantidade_retornada, custo)
+                for (indice_evento, indice_item), (quantidade_alocada, quantidade_retornada, custo) in sorted(sumarios.items())
+            )
+        )
+        _copiar(
+            cursor,
+            LoteAlocacao._meta.db_table,
+            ('evento_id', 'item_id', 'quantidade_restante', 'preco_unidade'),
+            (
+                (indice_evento + 1, indice_item + 1, quantidade, preco)
+                for (indice_evento, indice_item), lotes_chave in sorted(lotes.items())
+                for quantidade, preco in lotes_chave
+            )
+        )
+        DiaTransacaoEstoque.objects.preencher()
+        ResumoDiarioTransacoes.objects.preencher()
+        ResumoDiarioEvento.objects.preencher()
+
+        for comando in connection.ops.sequence_reset_sql(no_style(), MODELOS_SINTETICOS):
+            cursor.execute(comando)
+
+    with connection.cursor() as cursor:
+        for modelo in MODELOS_SINTETICOS:
+            cursor.execute(f'ANALYZE {modelo._meta.db_table}')
@@ -1,8 +1,11 @@
+from decimal import Decimal
+
 from django import forms
 from django.db import models
 from django.core.exceptions import ValidationError
 
-from .models import TransacaoEstoque, SolicitacaoEvento, TipoTransacao
+from .importacao import EXTENSOES_PLANILHA
+from .models import TransacaoEstoque, SolicitacaoEvento, TipoTransacao, Evento
 
 
 class TransacaoEstoqueAdminForm(forms.ModelForm):
@@ -12,6 +15,13 @@ class TransacaoEstoqueAdminForm(forms.ModelForm):
         model = TransacaoEstoque
         fields = '__all__'
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'tipo' in self.fields:
+            self.fields['tipo'].choices = [
+                escolha for escolha in self.fields['tipo'].choices if escolha[0] != TipoTransacao.SALDO_INICIAL
+            ]
+
     def clean(self):
         cleaned_data = super().clean()
         if cleaned_data.get('tipo') == TipoTransacao.ALOCACAO_EVENTO:
@@ -41,4 +51,83 @@ class TransacaoEstoqueAdminForm(forms.ModelForm):
                         'Tem certeza que deseja continuar?'
                     )
 
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+
+class ImportacaoPlanilhaForm(forms.Form):
+    arquivo = forms.FileField(
+        label='Planilha',
+        widget=forms.ClearableFileInput(attrs={'accept': ','.join(EXTENSOES_PLANILHA)})
+    )
+
+    def clean_arquivo(self):
+        arquivo = self.cleaned_data['arquivo']
+        if not arquivo.name.lower().endswith(EXTENSOES_PLANILHA):
+            raise ValidationError(f'Envie um arquivo {' ou '.join(EXTENSOES_PLANILHA)}')
+
+        return arquivo
+
+
+class ImportacaoSolicitacoesForm(ImportacaoPlanilhaForm):
+    evento = forms.ModelChoiceField(queryset=Evento.objects.filter(status=Evento.Status.EM_ANDAMENTO))
+
+    field_order = ('evento', 'arquivo')
+
+
+class CopiaSolicitacoesForm(forms.Form):
+    evento_origem = forms.ModelChoiceField(queryset=Evento.objects.order_by('-data'), label='Evento de origem')
+    fator = forms.DecimalField(
+        initial=1,
+        min_value=Decimal('0.01'),
+        max_digits=6,
+        decimal_places=2,
+        help_text='As quantidades solicitadas são multiplicadas pelo fator e arredondadas para cima'
+    )
+
+
+class RetornoItensForm(forms.Form):
+    def __init__(self, *args, sumarios, **kwargs):
+        super().__init__(*args, **kwargs)
+        for sumario in sumarios:
+            self.fields[f'item_{sumario.item_id}'] = forms.IntegerField(
+                label=sumario.item.nome,
+                initial=sumario.quantidade_liquida,
+                min_value=0,
+                max_value=sumario.quantidade_liquida,
+                help_text=f'{sumario.quantidade_liquida} alocado(s)'
+            )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not self.errors and not any(cleaned_data.values()):
+            raise ValidationError('Informe a quantidade a retornar de pelo menos um item')
+
+        return cleaned_data
+
+    def quantidades(self):
+        return {
+            int(campo.removeprefix('item_')): quantidade
+            for campo, quantidade in self.cleaned_data.items()
+            if quantidade
+        }
+
+
+class ConsultaPosicaoEstoqueForm(forms.Form):
+    data = forms.DateField(
+        widget=forms.DateInput(attrs={'type': 'date'}),
+        help_text='A posição considera todas as transações até o fim do dia'
+    )
+
+
+class AnalisePeriodoForm(forms.Form):
+    inicio = forms.DateField(label='Início', widget=forms.DateInput(attrs={'type': 'date'}))
+    fim = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        inicio = cleaned_data.get('inicio')
+        fim = cleaned_data.get('fim')
+        if inicio and fim and inicio > fim:
+            raise ValidationError('O início do período não pode ser posterior ao fim')
+
+        return cleaned_data
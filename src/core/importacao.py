@@ -0,0 +1,116 @@
+import csv
+import io
+import re
+import unicodedata
+import zipfile
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+EXTENSOES_PLANILHA = ('.csv', '.xlsx')
+TAMANHO_AMOSTRA_CSV = 4096
+NUMERO_COM_SEPARADOR_MILHAR = re.compile(r'[-+]?[1-9]\d{0,2}(\.\d{3})+')
+
+
+def normalizar_texto(texto):
+    texto = unicodedata.normalize('NFKD', str(texto).strip().lower())
+    texto = ''.join(caractere for caractere in texto if not unicodedata.combining(caractere))
+
+    return '_'.join(texto.replace('-', ' ').split())
+
+
+def converter_inteiro(valor):
+    if isinstance(valor, int):
+        return valor
+
+    numero = converter_decimal(valor)
+    if numero != numero.to_integral_value():
+        raise ValueError(valor)
+
+    return int(numero)
+
+
+def converter_decimal(valor):
+    if isinstance(valor, (int, Decimal)):
+        numero = Decimal(valor)
+    elif isinstance(valor, float):
+        numero = Decimal(str(valor))
+    else:
+        numero = _converter_texto_decimal(valor)
+
+    if not numero.is_finite():
+        raise ValueError(valor)
+
+    return numero
+
+
+def _converter_texto_decimal(valor):
+    texto = str(valor).replace('R$', '').replace(' ', '').strip()
+    if ',' in texto:
+        parte_inteira, _, parte_decimal = texto.rpartition(',')
+        if ',' in parte_inteira or '.' in parte_decimal:
+            raise ValueError(valor)
+        texto = f'{parte_inteira.replace('.', '')}.{parte_decimal}'
+    elif NUMERO_COM_SEPARADOR_MILHAR.fullmatch(texto):
+        raise ValueError(valor)
+
+    try:
+        return Decimal(texto)
+    except InvalidOperation:
+        raise ValueError(valor)
+
+
+def _linhas_csv(arquivo):
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+    try:
+        amostra = texto.read(TAMANHO_AMOSTRA_CSV)
+        texto.seek(0)
+
+        try:
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=',;\t')
+        except csv.Error:
+            dialeto = csv.excel
+
+        yield from csv.reader(texto, dialeto)
+    except UnicodeDecodeError:
+        raise ValidationError('O arquivo CSV deve estar codificado em UTF-8')
+
+
+def _linhas_xlsx(arquivo):
+    try:
+        planilha = load_workbook(arquivo, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError):
+        raise ValidationError('O arquivo enviado não é uma planilha XLSX válida')
+
+    try:
+        yield from planilha.active.iter_rows(values_only=True)
+    finally:
+        planilha.close()
+
+
+def ler_planilha(arquivo, colunas_obrigatorias):
+    if Path(arquivo.name).suffix.lower() == '.xlsx':
+        linhas = _linhas_xlsx(arquivo)
+    else:
+        linhas = _linhas_csv(arquivo)
+
+    cabecalho = [normalizar_texto(coluna) if coluna is not None else '' for coluna in next(linhas, ())]
+
+    colunas_faltando = [coluna for coluna in colunas_obrigatorias if coluna not in cabecalho]
+    if colunas_faltando:
+        raise ValidationError(f'Coluna(s) obrigatória(s) ausente(s) no cabeçalho: {', '.join(colunas_faltando)}')
+
+    for numero_linha, linha in enumerate(linhas, start=2):
+        valores = {
+            coluna: valor.strip() if isinstance(valor, str) else valor
+            for coluna, valor in zip(cabecalho, linha)
+            if coluna
+        }
+
+        if all(valor in (None, '') for valor in valores.values()):
+            continue
+
+        yield numero_linha, valores
@@ -0,0 +1,172 @@
+import datetime
+import json
+
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.db import models
+from django.utils import formats
+from django.utils.dateparse import parse_datetime
+from django.utils.text import capfirst
+
+from .models import DiaTransacaoEstoque
+
+VAR_APOS = 'apos'
+VAR_ANTES = 'antes'
+
+
+def estimar_quantidade(queryset):
+    plano = json.loads(queryset.order_by().explain(format='json'))
+    return plano[0]['Plan']['Plan Rows']
+
+
+def _codificar_cursor(objeto):
+    return f'{objeto.timestamp.isoformat()}_{objeto.pk}'
+
+
+def _decodificar_cursor(cursor):
+    timestamp, _, id_objeto = cursor.rpartition('_')
+    try:
+        timestamp = parse_datetime(timestamp)
+        id_objeto = int(id_objeto)
+    except ValueError:
+        timestamp = None
+
+    if timestamp is None:
+        raise IncorrectLookupParameters
+
+    return timestamp, id_objeto
+
+
+class ListagemPorCursor(ChangeList):
+    parametros_hierarquia_resumida = {'tipo__exact', 'timestamp__year', 'timestamp__month', 'timestamp__day'}
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor_apos = request.GET.get(VAR_APOS)
+        self.cursor_antes = request.GET.get(VAR_ANTES)
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(VAR_APOS, None)
+        lookup_params.pop(VAR_ANTES, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        return super().get_query_string(new_params, [*(remove or ()), VAR_APOS, VAR_ANTES])
+
+    def get_ordering(self, request, queryset):
+        return ['-timestamp', '-pk']
+
+    def get_results(self, request):
+        queryset = self.queryset
+        if self.cursor_antes:
+            timestamp, id_objeto = _decodificar_cursor(self.cursor_antes)
+            queryset = queryset.filter(
+                timestamp__gte=timestamp
+            ).filter(
+                models.Q(timestamp__gt=timestamp) | models.Q(pk__gt=id_objeto)
+            ).order_by(
+                'timestamp',
+                'pk'
+            )
+        elif self.cursor_apos:
+            timestamp, id_objeto = _decodificar_cursor(self.cursor_apos)
+            queryset = queryset.filter(
+                timestamp__lte=timestamp
+            ).filter(
+                models.Q(timestamp__lt=timestamp) | models.Q(pk__lt=id_objeto)
+            )
+
+        resultados = list(queryset[:self.list_per_page + 1])
+        possui_mais = len(resultados) > self.list_per_page
+        resultados = resultados[:self.list_per_page]
+
+        if self.cursor_antes:
+            resultados.reverse()
+            possui_anterior, possui_proxima = possui_mais, True
+        else:
+            possui_anterior, possui_proxima = bool(self.cursor_apos), possui_mais
+
+        self.result_count = estimar_quantidade(self.queryset)
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.result_list = resultados
+        self.can_show_all = False
+        self.multi_page = possui_anterior or possui_proxima
+        self.paginator = None
+        self.link_inicio = self.get_query_string() if possui_anterior else None
+        self.link_anterior = (
+            self.get_query_string({VAR_ANTES: _codificar_cursor(resultados[0])}) if possui_anterior and resultados else None
+        )
+        self.link_proxima = (
+            self.get_query_string({VAR_APOS: _codificar_cursor(resultados[-1])}) if possui_proxima and resultados else None
+        )
+
+    def hierarquia_datas(self):
+        if self.query or not set(self.get_filters_params()) <= self.parametros_hierarquia_resumida:
+            return None
+
+        dias = DiaTransacaoEstoque.objects.all()
+        if 'tipo__exact' in self.params:
+            dias = dias.filter(tipo=self.params['tipo__exact'])
+
+        ano = self.params.get('timestamp__year')
+        mes = self.params.get('timestamp__month')
+        dia = self.params.get('timestamp__day')
+
+        def link(filtros):
+            return self.get_query_string(filtros, ['timestamp__'])
+
+        if not (ano or mes or dia):
+            intervalo = dias.aggregate(primeiro=models.Min('dia'), ultimo=models.Max('dia'))
+            if intervalo['primeiro'] and intervalo['primeiro'].year == intervalo['ultimo'].year:
+                ano = intervalo['primeiro'].year
+                if intervalo['primeiro'].month == intervalo['ultimo'].month:
+                    mes = intervalo['primeiro'].month
+
+        if ano and mes and dia:
+            data = datetime.date(int(ano), int(mes), int(dia))
+            return {
+                'show': True,
+                'back': {
+                    'link': link({'timestamp__year': ano, 'timestamp__month': mes}),
+                    'title': capfirst(formats.date_format(data, 'YEAR_MONTH_FORMAT')),
+                },
+                'choices': [{'title': capfirst(formats.date_format(data, 'MONTH_DAY_FORMAT'))}],
+            }
+
+        if ano and mes:
+            return {
+                'show': True,
+                'back': {'link': link({'timestamp__year': ano}), 'title': str(ano)},
+                'choices': [
+                    {
+                        'link': link({'timestamp__year': ano, 'timestamp__month': mes, 'timestamp__day': data.day}),
+                        'title': capfirst(formats.date_format(data, 'MONTH_DAY_FORMAT')),
+                    }
+                    for data in dias.filter(dia__year=ano, dia__month=mes).dates('dia', 'day')
+                ],
+            }
+
+        if ano:
+            return {
+                'show': True,
+                'back': {'link': link({}), 'title': 'Todas as datas'},
+                'choices': [
+                    {
+                        'link': link({'timestamp__year': ano, 'timestamp__month': data.month}),
+                        'title': capfirst(formats.date_format(data, 'YEAR_MONTH_FORMAT')),
+                    }
+                    for data in dias.filter(dia__year=ano).dates('dia', 'month')
+                ],
+            }
+
+        return {
+            'show': True,
+            'back': None,
+            'choices': [
+                {'link': link({'timestamp__year': str(data.year)}), 'title': str(data.year)}
+                for data in dias.dates('dia', 'year')
+            ],
+        }
@@ -0,0 +1,105 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.benchmarks import CENARIOS, comparar_resultados, executar_benchmarks
+from core.dados_sinteticos import gerar_dados_sinteticos, limpar_dados
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede tempo e quantidade de consultas dos caminhos críticos em um banco descartável '
+        'populado com dados sintéticos de diferentes tamanhos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanhos',
+            type=int,
+            nargs='+',
+            default=[10000, 100000, 1000000],
+            help='Quantidades de transações de estoque geradas para cada rodada'
+        )
+        parser.add_argument('--repeticoes', type=int, default=5, help='Execuções de cada cenário por tamanho')
+        parser.add_argument('--semente', type=int, default=0, help='Semente do gerador de dados sintéticos')
+        parser.add_argument('--cenarios', nargs='+', choices=list(CENARIOS), help='Executa somente estes cenários')
+        parser.add_argument('--saida', help='Grava os resultados em um arquivo JSON')
+        parser.add_argument(
+            '--comparar',
+            help='Arquivo JSON de uma execução anterior. Falha se algum cenário ficar mais lento ou fizer mais consultas'
+        )
+        parser.add_argument(
+            '--tolerancia',
+            type=float,
+            default=0.25,
+            help='Aumento relativo de tempo aceito na comparação'
+        )
+        parser.add_argument(
+            '--manter-banco',
+            action='store_true',
+            help='Reaproveita o banco de testes em vez de criá-lo e destruí-lo a cada execução'
+        )
+
+    def handle(self, *args, tamanhos, repeticoes, semente, cenarios, saida, comparar, tolerancia, manter_banco, **options):
+        referencia = None
+        if comparar:
+            with open(comparar) as arquivo:
+                referencia = json.load(arquivo)['resultados']
+
+        nome_banco_original = settings.DATABASES['default']['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=manter_banco)
+
+        resultados = {}
+        try:
+            for tamanho in tamanhos:
+                limpar_dados()
+                gerar_dados_sinteticos(
+                    quantidade_itens=max(100, tamanho // 1000),
+                    quantidade_eventos=max(20, tamanho // 250),
+                    quantidade_transacoes=tamanho,
+                    semente=semente
+                )
+
+                resultados[str(tamanho)] = executar_benchmarks(repeticoes, cenarios)
+                self._escrever_resultados(tamanho, resultados[str(tamanho)])
+        finally:
+            connection.creation.destroy_test_db(nome_banco_original, verbosity=0, keepdb=manter_banco)
+
+        if saida:
+            with open(saida, 'w') as arquivo:
+                json.dump(
+                    {'semente': semente, 'repeticoes': repeticoes, 'resultados': resultados},
+                    arquivo,
+                    indent=2,
+                    ensure_ascii=False
+                )
+
+        if referencia is not None:
+            regressoes = comparar_resultados(resultados, referencia, tolerancia)
+            for regressao in regressoes:
+                self.stdout.write(self.style.ERROR(regressao))
+
+            if regressoes:
+                raise CommandError(f'{len(regressoes)} regressão(ões) em relação a {comparar}')
+
+            self.stdout.write(self.style.SUCCESS(f'Nenhuma regressão em relação a {comparar}'))
+
+    def _escrever_resultados(self, tamanho, resultados):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{tamanho} transações de estoque'))
+        largura = max(len(nome) for nome in resultados)
+        self.stdout.write(f'{'cenário':<{largura}}  {'mediana (ms)':>12}  {'mínimo (ms)':>12}  {'consultas':>9}')
+        for nome, resultado in resultados.items():
+            if 'alvos_ausentes' in resultado:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f'{nome:<{largura}}  não aplicável: os dados não têm {', '.join(resultado['alvos_ausentes'])}'
+                    )
+                )
+                continue
+
+            self.stdout.write(
+                f'{nome:<{largura}}  {resultado['mediana_ms']:>12.3f}  {resultado['minimo_ms']:>12.3f}  '
+                f'{resultado['consultas']:>9}'
+            )
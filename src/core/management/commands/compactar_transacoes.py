@@ -0,0 +1,50 @@
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from core.compactacao import caminho_arquivo_compactacao, compactar_transacoes
+from core.models import CompactacaoTransacoes
+
+
+class Command(BaseCommand):
+    help = (
+        'Arquiva em disco as transações de estoque anteriores à data de corte e as substitui por saldos iniciais '
+        'por item e por consolidados dos eventos concluídos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ate',
+            type=date.fromisoformat,
+            required=True,
+            help='Data de corte (AAAA-MM-DD). As transações anteriores a essa data são compactadas'
+        )
+        parser.add_argument(
+            '--formato',
+            choices=CompactacaoTransacoes.Formato.values,
+            default=CompactacaoTransacoes.Formato.JSONL,
+            help='Formato do arquivo compactado com gzip'
+        )
+
+    def handle(self, *args, ate, formato, **options):
+        try:
+            compactacao, ids_itens_mantidos = compactar_transacoes(ate, formato)
+        except ValidationError as e:
+            raise CommandError(' '.join(e.messages))
+
+        if ids_itens_mantidos:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'{len(ids_itens_mantidos)} item(ns) mantidos sem compactação por não ser possível representar '
+                    'o saldo inicial exatamente'
+                )
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Compactação {compactacao.id}: {compactacao.transacoes_arquivadas} transação(ões) arquivada(s) em '
+                f'{caminho_arquivo_compactacao(compactacao)} e substituída(s) por '
+                f'{len(compactacao.ids_entradas)} saldo(s) e consolidado(s)'
+            )
+        )
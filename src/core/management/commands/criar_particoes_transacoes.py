@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import TransacaoEstoque
+from core.particoes import (
+    GRANULARIDADES, criar_particoes, fim_antecipado, linhas_particao_padrao, primeiro_timestamp_particao_padrao
+)
+
+
+class Command(BaseCommand):
+    help = 'Cria as partições das transações de estoque do período atual e dos próximos períodos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--periodos',
+            type=int,
+            default=settings.TRANSACOES_PARTICOES_ANTECIPADAS,
+            help='Quantidade de períodos futuros para os quais as partições são criadas com antecedência'
+        )
+
+    def handle(self, *args, periodos, **options):
+        granularidade = settings.TRANSACOES_PARTICIONAMENTO
+        if granularidade not in GRANULARIDADES:
+            raise CommandError(f'TRANSACOES_PARTICIONAMENTO deve ser um de: {', '.join(GRANULARIDADES)}')
+        if periodos < 0:
+            raise CommandError('A quantidade de períodos não pode ser negativa')
+
+        tabela = TransacaoEstoque._meta.db_table
+        with transaction.atomic(), connection.cursor() as cursor:
+            inicio = timezone.now()
+            primeiro_timestamp_padrao = primeiro_timestamp_particao_padrao(cursor, tabela)
+            if primeiro_timestamp_padrao:
+                inicio = min(inicio, primeiro_timestamp_padrao)
+
+            criadas = criar_particoes(
+                cursor,
+                tabela,
+                inicio,
+                fim_antecipado(periodos, granularidade),
+                granularidade
+            )
+            linhas_padrao = linhas_particao_padrao(cursor, tabela)
+
+        for particao, linhas_movidas in criadas:
+            self.stdout.write(f'{particao}: criada, {linhas_movidas} transação(ões) movida(s) da partição padrão')
+
+        if linhas_padrao:
+            self.stdout.write(
+                self.style.WARNING(f'{linhas_padrao} transação(ões) permanecem na partição padrão, fora dos períodos criados')
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'{len(criadas)} partição(ões) criada(s)'))
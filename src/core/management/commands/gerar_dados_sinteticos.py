@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.dados_sinteticos import banco_possui_dados, gerar_dados_sinteticos, limpar_dados
+
+
+class Command(BaseCommand):
+    help = 'Gera de forma determinística itens, eventos, solicitações e transações de estoque sintéticos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--itens', type=int, default=1000, help='Quantidade de itens')
+        parser.add_argument('--eventos', type=int, default=4000, help='Quantidade de eventos')
+        parser.add_argument('--transacoes', type=int, default=1000000, help='Quantidade de transações de estoque')
+        parser.add_argument('--semente', type=int, default=0, help='Semente do gerador pseudoaleatório')
+        parser.add_argument(
+            '--limpar',
+            action='store_true',
+            help='Apaga itens, eventos, solicitações, transações e tarefas existentes antes de gerar os dados'
+        )
+
+    def handle(self, *args, itens, eventos, transacoes, semente, limpar=False, **options):
+        if limpar:
+            limpar_dados()
+        elif banco_possui_dados():
+            raise CommandError('O banco já possui itens ou eventos. Use --limpar para apagá-los antes de gerar os dados')
+
+        gerar_dados_sinteticos(itens, eventos, transacoes, semente)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Gerados {itens} itens, {eventos} eventos e até {transacoes} transações de estoque')
+        )
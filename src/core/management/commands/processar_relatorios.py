@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.relatorios import processar_proxima_tarefa, reenfileirar_tarefas_interrompidas, remover_tarefas_expiradas
+from core.services import consolidar_resumos_pendentes
+
+
+class Command(BaseCommand):
+    help = (
+        'Processa a fila de tarefas de relatórios enfileiradas pelo admin e, quando a fila está vazia, '
+        'consolida os resumos diários pendentes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2,
+            help='Segundos de espera entre consultas quando a fila está vazia'
+        )
+        parser.add_argument(
+            '--uma-vez',
+            action='store_true',
+            help='Processa as tarefas pendentes e encerra em vez de aguardar novas tarefas'
+        )
+
+    def handle(self, *args, intervalo=2, uma_vez=False, **options):
+        while True:
+            reenfileirar_tarefas_interrompidas()
+
+            tarefa = processar_proxima_tarefa()
+            if tarefa is not None:
+                self.stdout.write(f'{tarefa}: {tarefa.get_status_display()}')
+                continue
+
+            remover_tarefas_expiradas()
+            consolidar_resumos_pendentes()
+
+            if uma_vez:
+                return
+
+            time.sleep(intervalo)
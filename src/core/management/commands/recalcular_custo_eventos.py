@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Evento, TransacaoEstoque
+
+
+class Command(BaseCommand):
+    help = 'Recalcula o custo total persistido dos eventos a partir das transações de estoque'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Somente compara o custo persistido com o calculado a partir das transações, sem alterar nada'
+        )
+
+    def handle(self, *args, verificar=False, **options):
+        with transaction.atomic():
+            eventos = Evento.objects.com_custo_total_calculado()
+
+            if not verificar:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LOCK TABLE {TransacaoEstoque._meta.db_table} IN SHARE MODE')
+                eventos = eventos.select_for_update()
+
+            eventos_divergentes = []
+            for evento in eventos:
+                custo_calculado = evento.custo_total_calculado or Decimal(0)
+                if evento.custo_total != custo_calculado:
+                    eventos_divergentes.append((evento, custo_calculado))
+
+            if verificar:
+                for evento, custo_calculado in eventos_divergentes:
+                    self.stdout.write(f'{evento}: persistido {evento.custo_total}, calculado {custo_calculado}')
+
+                if eventos_divergentes:
+                    raise CommandError(f'{len(eventos_divergentes)} evento(s) com custo total divergente')
+
+                self.stdout.write(self.style.SUCCESS('O custo total de todos os eventos confere com as transações'))
+                return
+
+            for evento, custo_calculado in eventos_divergentes:
+                evento.custo_total = custo_calculado
+
+            Evento.objects.bulk_update([evento for evento, _ in eventos_divergentes], ['custo_total'])
+
+        self.stdout.write(self.style.SUCCESS(f'Custo total recalculado para {len(eventos_divergentes)} evento(s)'))
@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Item, TransacaoEstoque, UltimaCompraItem
+
+
+class Command(BaseCommand):
+    help = 'Recalcula o último preço e a data da última compra dos itens a partir das transações de estoque'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Somente compara a última compra persistida com a calculada a partir das transações, sem alterar nada'
+        )
+
+    def handle(self, *args, verificar=False, **options):
+        with transaction.atomic():
+            if not verificar:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LOCK TABLE {TransacaoEstoque._meta.db_table} IN SHARE MODE')
+                    cursor.execute(f'LOCK TABLE {UltimaCompraItem._meta.db_table} IN SHARE ROW EXCLUSIVE MODE')
+
+            ultimas_compras = {
+                id_item: (preco_unidade, timestamp)
+                for id_item, preco_unidade, timestamp in TransacaoEstoque.objects.filter(
+                    tipo=TransacaoEstoque.Tipo.COMPRA
+                ).order_by(
+                    'item_id',
+                    '-timestamp',
+                    '-id'
+                ).distinct(
+                    'item_id'
+                ).values_list(
+                    'item_id',
+                    'preco_unidade',
+                    'timestamp'
+                )
+            }
+            persistidas = {
+                id_item: (preco_unidade, timestamp)
+                for id_item, preco_unidade, timestamp in UltimaCompraItem.objects.values_list(
+                    'item_id',
+                    'preco_unidade',
+                    'timestamp'
+                )
+            }
+
+            ids_itens_divergentes = sorted(
+                id_item
+                for id_item in ultimas_compras.keys() | persistidas.keys()
+                if ultimas_compras.get(id_item) != persistidas.get(id_item)
+            )
+
+            if verificar:
+                itens = Item.objects.in_bulk(ids_itens_divergentes)
+                for id_item in ids_itens_divergentes:
+                    preco_persistido, timestamp_persistido = persistidas.get(id_item, (None, None))
+                    preco_unidade, timestamp = ultimas_compras.get(id_item, (None, None))
+                    self.stdout.write(
+                        f'{itens[id_item]}: persistido {preco_persistido} em {timestamp_persistido}, '
+                        f'calculado {preco_unidade} em {timestamp}'
+                    )
+
+                if ids_itens_divergentes:
+                    raise CommandError(f'{len(ids_itens_divergentes)} item(ns) com última compra divergente')
+
+                self.stdout.write(self.style.SUCCESS('A última compra de todos os itens confere com as transações'))
+                return
+
+            UltimaCompraItem.objects.filter(
+                item_id__in=[id_item for id_item in ids_itens_divergentes if id_item not in ultimas_compras]
+            ).delete()
+            UltimaCompraItem.objects.bulk_create(
+                [
+                    UltimaCompraItem(
+                        item_id=id_item,
+                        preco_unidade=ultimas_compras[id_item][0],
+                        timestamp=ultimas_compras[id_item][1]
+                    )
+                    for id_item in ids_itens_divergentes
+                    if id_item in ultimas_compras
+                ],
+                update_conflicts=True,
+                unique_fields=['item'],
+                update_fields=['preco_unidade', 'timestamp'],
+                batch_size=1000
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Última compra recalculada para {len(ids_itens_divergentes)} item(ns)'))
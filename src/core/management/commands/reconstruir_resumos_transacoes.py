@@ -0,0 +1,37 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from core.services import reconstruir_resumos_transacoes
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstrói, a partir das transações de estoque, os resumos diários usados na análise por período. '
+        'Os dias já compactados são mantidos como estão'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde',
+            type=date.fromisoformat,
+            help='Primeiro dia reconstruído (AAAA-MM-DD). Por padrão, todos os dias não compactados'
+        )
+
+    def handle(self, *args, desde, **options):
+        reconstruido_desde = reconstruir_resumos_transacoes(desde)
+
+        if reconstruido_desde is None:
+            self.stdout.write(self.style.SUCCESS('Resumos diários reconstruídos para todo o histórico'))
+            return
+
+        if desde is not None and reconstruido_desde != desde:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'Os dias anteriores a {reconstruido_desde:%d/%m/%Y} estão compactados e foram mantidos'
+                )
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Resumos diários reconstruídos a partir de {reconstruido_desde:%d/%m/%Y}')
+        )
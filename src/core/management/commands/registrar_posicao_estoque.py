@@ -0,0 +1,31 @@
+from datetime import date, timedelta
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.services import registrar_posicao_estoque
+
+
+class Command(BaseCommand):
+    help = 'Registra a posição de estoque de cada item ao fim do dia informado'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data',
+            type=date.fromisoformat,
+            help='Dia da posição (AAAA-MM-DD). Por padrão, o último dia do mês anterior'
+        )
+
+    def handle(self, *args, data, **options):
+        if data is None:
+            data = timezone.localdate().replace(day=1) - timedelta(days=1)
+
+        try:
+            quantidade_itens = registrar_posicao_estoque(data)
+        except ValidationError as e:
+            raise CommandError(' '.join(e.messages))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Posição de estoque de {data:%d/%m/%Y} registrada para {quantidade_itens} item(ns)')
+        )
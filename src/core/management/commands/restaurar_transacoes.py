@@ -0,0 +1,26 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from core.compactacao import restaurar_compactacao
+from core.models import CompactacaoTransacoes
+
+
+class Command(BaseCommand):
+    help = 'Restaura as transações de estoque arquivadas por uma compactação, removendo seus saldos e consolidados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('compactacao', type=int, help='Identificador da compactação a restaurar')
+
+    def handle(self, *args, compactacao, **options):
+        try:
+            compactacao = restaurar_compactacao(CompactacaoTransacoes.objects.get(id=compactacao))
+        except CompactacaoTransacoes.DoesNotExist:
+            raise CommandError(f'Compactação {compactacao} não encontrada')
+        except ValidationError as e:
+            raise CommandError(' '.join(e.messages))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Compactação {compactacao.id}: {compactacao.transacoes_arquivadas} transação(ões) restaurada(s)'
+            )
+        )
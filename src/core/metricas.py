@@ -0,0 +1,165 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REGISTRO = []
+
+
+class Metrica:
+    tipo = None
+
+    def __init__(self, nome, descricao, rotulos=()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._valores = {}
+        self._trava = threading.Lock()
+        REGISTRO.append(self)
+
+    def _chave(self, rotulos):
+        return tuple(str(rotulos[rotulo]) for rotulo in self.rotulos)
+
+    def valores(self):
+        with self._trava:
+            return {chave: self._copiar_valor(valor) for chave, valor in self._valores.items()}
+
+    def _copiar_valor(self, valor):
+        return valor
+
+
+class Contador(Metrica):
+    tipo = 'counter'
+
+    def incrementar(self, valor=1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._trava:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+
+class Medidor(Metrica):
+    tipo = 'gauge'
+
+    def __init__(self, nome, descricao, rotulos=(), tipo='gauge'):
+        super().__init__(nome, descricao, rotulos)
+        self.tipo = tipo
+
+    def definir(self, valor, **rotulos):
+        chave = self._chave(rotulos)
+        with self._trava:
+            self._valores[chave] = valor
+
+
+class Histograma(Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nome, descricao, rotulos=(), buckets=BUCKETS_SEGUNDOS):
+        super().__init__(nome, descricao, rotulos)
+        self.buckets = tuple(buckets)
+
+    def observar(self, valor, **rotulos):
+        chave = self._chave(rotulos)
+        with self._trava:
+            contagens, soma, total = self._valores.get(chave, ([0] * len(self.buckets), 0, 0))
+            indice = bisect_left(self.buckets, valor)
+            if indice < len(self.buckets):
+                contagens[indice] += 1
+            self._valores[chave] = (contagens, soma + valor, total + 1)
+
+    def _copiar_valor(self, valor):
+        contagens, soma, total = valor
+        return list(contagens), soma, total
+
+    def quantil(self, quantil, valor):
+        contagens, _, total = valor
+        acumulado = 0
+        for limite, contagem in zip(self.buckets, contagens):
+            acumulado += contagem
+            if acumulado >= quantil * total:
+                return limite
+
+        return float('inf')
+
+
+def _escapar_rotulo(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatar_rotulos(nomes, valores, extras=()):
+    pares = [*zip(nomes, valores), *extras]
+    if not pares:
+        return ''
+
+    return '{' + ','.join(f'{nome}="{_escapar_rotulo(valor)}"' for nome, valor in pares) + '}'
+
+
+def exportar_prometheus():
+    linhas = []
+    for metrica in REGISTRO:
+        linhas.append(f'# HELP {metrica.nome} {metrica.descricao}')
+        linhas.append(f'# TYPE {metrica.nome} {metrica.tipo}')
+
+        for chave, valor in sorted(metrica.valores().items()):
+            if metrica.tipo != 'histogram':
+                linhas.append(f'{metrica.nome}{_formatar_rotulos(metrica.rotulos, chave)} {valor}')
+                continue
+
+            contagens, soma, total = valor
+            acumulado = 0
+            for limite, contagem in zip(metrica.buckets, contagens):
+                acumulado += contagem
+                rotulos = _formatar_rotulos(metrica.rotulos, chave, (('le', limite),))
+                linhas.append(f'{metrica.nome}_bucket{rotulos} {acumulado}')
+            rotulos = _formatar_rotulos(metrica.rotulos, chave, (('le', '+Inf'),))
+            linhas.append(f'{metrica.nome}_bucket{rotulos} {total}')
+            linhas.append(f'{metrica.nome}_sum{_formatar_rotulos(metrica.rotulos, chave)} {soma}')
+            linhas.append(f'{metrica.nome}_count{_formatar_rotulos(metrica.rotulos, chave)} {total}')
+
+    return '\n'.join(linhas) + '\n'
+
+
+chamadas_funcao = Contador(
+    'backstage_funcao_chamadas_total',
+    'Chamadas dos serviços e geradores de planilhas',
+    rotulos=('funcao', 'resultado')
+)
+duracao_funcao = Histograma(
+    'backstage_funcao_duracao_segundos',
+    'Duração dos serviços e geradores de planilhas',
+    rotulos=('funcao',)
+)
+
+
+def medir_funcao(funcao):
+    @functools.wraps(funcao)
+    def funcao_medida(*args, **kwargs):
+        inicio = time.perf_counter()
+        resultado = 'erro'
+        try:
+            retorno = funcao(*args, **kwargs)
+            resultado = 'sucesso'
+            return retorno
+        finally:
+            duracao_funcao.observar(time.perf_counter() - inicio, funcao=funcao.__name__)
+            chamadas_funcao.incrementar(funcao=funcao.__name__, resultado=resultado)
+
+    return funcao_medida
+
+
+transacoes_estoque = Contador(
+    'backstage_transacoes_estoque_total',
+    'Transações de estoque gravadas por tipo',
+    rotulos=('tipo',)
+)
+duracao_requisicao = Histograma(
+    'backstage_requisicao_duracao_segundos',
+    'Duração das requisições por view',
+    rotulos=('view', 'metodo', 'status')
+)
+
+
+def contar_transacoes_estoque(quantidades_por_tipo):
+    for tipo, quantidade in quantidades_por_tipo.items():
+        transacoes_estoque.incrementar(quantidade, tipo=tipo)
@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+
+from .metricas import duracao_requisicao
+from .perfil_sql import CHAVE_SESSAO_ATIVO, PerfilSQL, registrar_perfil
+
+
+class PerfilSQLMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self._deve_perfilar(request):
+            return self.get_response(request)
+
+        perfil = PerfilSQL()
+        with connection.execute_wrapper(perfil):
+            response = self.get_response(request)
+
+        registrar_perfil(request, perfil.resumo(request, response))
+
+        return response
+
+    def _deve_perfilar(self, request):
+        return (
+            settings.PERFIL_SQL_HABILITADO
+            and request.user.is_staff
+            and request.session.get(CHAVE_SESSAO_ATIVO, False)
+            and request.path != reverse('core:perfil_sql')
+        )
+
+
+class MetricasMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inicio = time.perf_counter()
+        response = self.get_response(request)
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        duracao_requisicao.observar(
+            time.perf_counter() - inicio,
+            view=resolver_match.view_name if resolver_match else 'nao_encontrada',
+            metodo=request.method,
+            status=f'{response.status_code // 100}xx'
+        )
+
+        return response
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:05
+
+import django.db.models.deletion
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SumarioItemEvento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantidade_alocada', models.IntegerField(default=0)),
+                ('quantidade_retornada', models.IntegerField(default=0)),
+                ('quantidade_liquida', models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('quantidade_alocada'), '-', models.F('quantidade_retornada')), output_field=models.IntegerField())),
+                ('custo_liquido', models.DecimalField(decimal_places=4, default=0, max_digits=10)),
+                ('evento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sumarios_itens', to='core.evento')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.item')),
+            ],
+            options={
+                'verbose_name': 'Sumário de Item do Evento',
+                'verbose_name_plural': 'Sumários de Itens dos Eventos',
+                'constraints': [models.UniqueConstraint(fields=('evento', 'item'), name='unique_sumario_item_evento')],
+            },
+        ),
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO core_sumarioitemevento (
+                    evento_id, item_id, quantidade_alocada, quantidade_retornada, custo_liquido
+                )
+                SELECT
+                    evento_id,
+                    item_id,
+                    COALESCE(SUM(quantidade) FILTER (WHERE tipo = 'alocacao'), 0),
+                    COALESCE(SUM(quantidade) FILTER (WHERE tipo = 'retorno'), 0),
+                    COALESCE(SUM(CASE WHEN tipo = 'retorno' THEN -valor_total ELSE valor_total END), 0)
+                FROM core_transacaoestoque
+                WHERE evento_id IS NOT NULL AND tipo IN ('alocacao', 'retorno')
+                GROUP BY evento_id, item_id
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_sumarioitemevento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evento',
+            name='custo_total',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=10),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE core_evento
+                SET custo_total = COALESCE((
+                    SELECT SUM(custo_liquido)
+                    FROM core_sumarioitemevento
+                    WHERE core_sumarioitemevento.evento_id = core_evento.id
+                ), 0)
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+    ]
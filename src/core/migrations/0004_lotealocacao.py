@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_evento_custo_total'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoteAlocacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantidade_restante', models.IntegerField()),
+                ('preco_unidade', models.DecimalField(decimal_places=4, max_digits=10)),
+                ('evento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lotes_alocacao', to='core.evento')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.item')),
+            ],
+            options={
+                'verbose_name': 'Lote de Alocação',
+                'verbose_name_plural': 'Lotes de Alocação',
+                'indexes': [models.Index(fields=['evento', 'item', 'id'], name='lote_alocacao_evento_item_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('quantidade_restante__gt', 0)), name='lote_quantidade_restante_maior_que_zero')],
+            },
+        ),
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO core_lotealocacao (evento_id, item_id, quantidade_restante, preco_unidade)
+                SELECT evento_id, item_id, LEAST(quantidade, quantidade_acumulada - quantidade_retornada), preco_unidade
+                FROM (
+                    SELECT
+                        alocacao.evento_id,
+                        alocacao.item_id,
+                        alocacao.quantidade,
+                        alocacao.preco_unidade,
+                        alocacao.timestamp,
+                        alocacao.id,
+                        sumario.quantidade_retornada,
+                        SUM(alocacao.quantidade) OVER (
+                            PARTITION BY alocacao.evento_id, alocacao.item_id
+                            ORDER BY alocacao.timestamp, alocacao.id
+                        ) AS quantidade_acumulada
+                    FROM core_transacaoestoque alocacao
+                    JOIN core_sumarioitemevento sumario
+                        ON sumario.evento_id = alocacao.evento_id AND sumario.item_id = alocacao.item_id
+                    WHERE alocacao.tipo = 'alocacao'
+                ) alocacoes
+                WHERE quantidade_acumulada > quantidade_retornada
+                ORDER BY timestamp, id
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+    ]
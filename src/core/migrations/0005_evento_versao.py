@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_lotealocacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evento',
+            name='versao',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_evento_versao'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TarefaRelatorio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=30)),
+                ('chave', models.CharField(db_index=True, max_length=64)),
+                ('ids_selecionados', models.JSONField(default=list)),
+                ('nome_arquivo', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('executando', 'Executando'), ('concluida', 'Concluída'), ('erro', 'Erro')], default='pendente', max_length=20)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('iniciado_em', models.DateTimeField(null=True)),
+                ('concluido_em', models.DateTimeField(null=True)),
+                ('erro', models.TextField(blank=True)),
+                ('evento', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tarefas_relatorio', to='core.evento')),
+                ('solicitante', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Tarefa de Relatório',
+                'verbose_name_plural': 'Tarefas de Relatórios',
+                'indexes': [models.Index(fields=['status', 'id'], name='tarefa_relatorio_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_tarefarelatorio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='quantidade_fracoes',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Frações de estoque'),
+        ),
+        migrations.CreateModel(
+            name='FracaoEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('indice', models.PositiveSmallIntegerField()),
+                ('quantidade_em_estoque', models.IntegerField(default=0)),
+                ('valor_total', models.DecimalField(decimal_places=4, default=0, max_digits=10)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fracoes_estoque', to='core.item')),
+            ],
+            options={
+                'verbose_name': 'Fração de Estoque',
+                'verbose_name_plural': 'Frações de Estoque',
+                'constraints': [models.UniqueConstraint(fields=('item', 'indice'), name='unique_fracao_estoque_item_indice'), models.CheckConstraint(condition=models.Q(('quantidade_em_estoque__gte', 0)), name='fracao_quantidade_em_estoque_gte_zero'), models.CheckConstraint(condition=models.Q(('valor_total__gte', 0)), name='fracao_valor_total_gte_zero')],
+            },
+        ),
+    ]
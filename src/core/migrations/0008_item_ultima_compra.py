@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_fracaoestoque'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='data_ultima_compra',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Data da última compra'),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='ultimo_preco_compra',
+            field=models.DecimalField(blank=True, decimal_places=4, editable=False, max_digits=10, null=True, verbose_name='Último preço de compra'),
+        ),
+    ]
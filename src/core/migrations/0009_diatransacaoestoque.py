@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_item_ultima_compra'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiaTransacaoEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('tipo', models.CharField(choices=[('compra', 'Compra'), ('alocacao', 'Alocação para Evento'), ('retorno', 'Retorno de Evento'), ('remocao', 'Remoção Manual'), ('adicao', 'Adição Manual'), ('patrocinio', 'Patrocínio'), ('consumo', 'Consumo Interno')], max_length=20)),
+            ],
+            options={
+                'verbose_name': 'Dia com Transações de Estoque',
+                'verbose_name_plural': 'Dias com Transações de Estoque',
+            },
+        ),
+        migrations.AlterField(
+            model_name='transacaoestoque',
+            name='timestamp',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AddIndex(
+            model_name='transacaoestoque',
+            index=models.Index(fields=['timestamp', 'id'], name='transacao_timestamp_id_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='diatransacaoestoque',
+            constraint=models.UniqueConstraint(fields=('dia', 'tipo'), name='unique_dia_tipo_transacao'),
+        ),
+        migrations.RunSQL(
+            sql=f"""
+                INSERT INTO core_diatransacaoestoque (dia, tipo)
+                SELECT DISTINCT (timestamp AT TIME ZONE '{settings.TIME_ZONE}')::date, tipo
+                FROM core_transacaoestoque
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+    ]
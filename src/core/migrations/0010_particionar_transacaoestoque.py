@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+from core.particoes import colunas_gravaveis, criar_particoes, fim_antecipado, nome_particao_padrao
+
+TABELA = 'core_transacaoestoque'
+TABELA_ANTERIOR = f'{TABELA}_anterior'
+
+
+def particionar_transacoes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s',
+            [TABELA, f'{TABELA}_pkey']
+        )
+        indices = [definicao for definicao, in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABELA]
+        )
+        chaves_estrangeiras = cursor.fetchall()
+        cursor.execute(f'SELECT min("timestamp") FROM {TABELA}')
+        inicio = cursor.fetchone()[0] or timezone.now()
+
+        cursor.execute(f'ALTER TABLE {TABELA} RENAME TO {TABELA_ANTERIOR}')
+        cursor.execute(
+            f'CREATE TABLE {TABELA} '
+            f'(LIKE {TABELA_ANTERIOR} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE ("timestamp")'
+        )
+        cursor.execute(f'CREATE TABLE {nome_particao_padrao(TABELA)} PARTITION OF {TABELA} DEFAULT')
+        criar_particoes(
+            cursor,
+            TABELA,
+            inicio,
+            fim_antecipado(settings.TRANSACOES_PARTICOES_ANTECIPADAS, settings.TRANSACOES_PARTICIONAMENTO),
+            settings.TRANSACOES_PARTICIONAMENTO
+        )
+
+        colunas = ', '.join(colunas_gravaveis(cursor, TABELA))
+        cursor.execute(f'INSERT INTO {TABELA} ({colunas}) SELECT {colunas} FROM {TABELA_ANTERIOR}')
+        cursor.execute(f'DROP TABLE {TABELA_ANTERIOR}')
+
+        cursor.execute(f'ALTER TABLE {TABELA} ADD CONSTRAINT {TABELA}_pkey PRIMARY KEY (id, "timestamp")')
+        for definicao in indices:
+            cursor.execute(definicao)
+        for nome, definicao in chaves_estrangeiras:
+            cursor.execute(f'ALTER TABLE {TABELA} ADD CONSTRAINT {nome} {definicao}')
+
+        cursor.execute(f'CREATE SEQUENCE {TABELA}_id_seq OWNED BY {TABELA}.id')
+        cursor.execute(f"ALTER TABLE {TABELA} ALTER COLUMN id SET DEFAULT nextval('{TABELA}_id_seq')")
+        cursor.execute(f"SELECT setval('{TABELA}_id_seq', COALESCE(max(id), 0) + 1, false) FROM {TABELA}")
+        cursor.execute(f'ANALYZE {TABELA}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_diatransacaoestoque'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar_transacoes, migrations.RunPython.noop),
+    ]
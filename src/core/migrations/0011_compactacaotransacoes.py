@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_particionar_transacaoestoque'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompactacaoTransacoes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('corte', models.DateTimeField()),
+                ('formato', models.CharField(choices=[('jsonl', 'JSON Lines'), ('csv', 'CSV')], max_length=10)),
+                ('nome_arquivo', models.CharField(max_length=255)),
+                ('transacoes_arquivadas', models.PositiveIntegerField(default=0)),
+                ('ids_entradas', models.JSONField(default=list)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('restaurado_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Compactação de Transações',
+                'verbose_name_plural': 'Compactações de Transações',
+            },
+        ),
+        migrations.AlterField(
+            model_name='diatransacaoestoque',
+            name='tipo',
+            field=models.CharField(choices=[('compra', 'Compra'), ('alocacao', 'Alocação para Evento'), ('retorno', 'Retorno de Evento'), ('remocao', 'Remoção Manual'), ('adicao', 'Adição Manual'), ('patrocinio', 'Patrocínio'), ('consumo', 'Consumo Interno'), ('saldo_inicial', 'Saldo Inicial')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='transacaoestoque',
+            name='tipo',
+            field=models.CharField(choices=[('compra', 'Compra'), ('alocacao', 'Alocação para Evento'), ('retorno', 'Retorno de Evento'), ('remocao', 'Remoção Manual'), ('adicao', 'Adição Manual'), ('patrocinio', 'Patrocínio'), ('consumo', 'Consumo Interno'), ('saldo_inicial', 'Saldo Inicial')], db_index=True, max_length=20),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:57
+
+import django.db.models.deletion
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_compactacaotransacoes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PosicaoEstoque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('quantidade', models.IntegerField()),
+                ('valor_total', models.DecimalField(decimal_places=4, max_digits=10)),
+                ('preco_medio', models.GeneratedField(db_persist=True, expression=models.Case(models.When(quantidade=0, then=models.Value('0.00')), default=django.db.models.expressions.CombinedExpression(models.F('valor_total'), '/', models.F('quantidade')), output_field=models.DecimalField(decimal_places=4, max_digits=10)), output_field=models.DecimalField(decimal_places=4, max_digits=10))),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='posicoes_estoque', to='core.item')),
+            ],
+            options={
+                'verbose_name': 'Posição de Estoque',
+                'verbose_name_plural': 'Posições de Estoque',
+                'constraints': [models.UniqueConstraint(fields=('data', 'item'), name='unique_posicao_estoque_data_item')],
+            },
+        ),
+    ]
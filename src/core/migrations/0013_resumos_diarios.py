@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_posicaoestoque'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoDiarioEvento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('quantidade_alocada', models.IntegerField(default=0)),
+                ('quantidade_retornada', models.IntegerField(default=0)),
+                ('custo_liquido', models.DecimalField(decimal_places=4, default=0, max_digits=10)),
+                ('evento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_diarios', to='core.evento')),
+            ],
+            options={
+                'verbose_name': 'Resumo Diário de Evento',
+                'verbose_name_plural': 'Resumos Diários de Eventos',
+                'constraints': [models.UniqueConstraint(fields=('dia', 'evento'), name='unique_resumo_diario_dia_evento')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumoDiarioTransacoes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('tipo', models.CharField(choices=[('compra', 'Compra'), ('alocacao', 'Alocação para Evento'), ('retorno', 'Retorno de Evento'), ('remocao', 'Remoção Manual'), ('adicao', 'Adição Manual'), ('patrocinio', 'Patrocínio'), ('consumo', 'Consumo Interno'), ('saldo_inicial', 'Saldo Inicial')], max_length=20)),
+                ('quantidade', models.IntegerField(default=0)),
+                ('valor_total', models.DecimalField(decimal_places=4, default=0, max_digits=10)),
+                ('transacoes', models.PositiveIntegerField(default=0)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_diarios', to='core.item')),
+            ],
+            options={
+                'verbose_name': 'Resumo Diário de Transações',
+                'verbose_name_plural': 'Resumos Diários de Transações',
+                'constraints': [models.UniqueConstraint(fields=('dia', 'tipo', 'item'), name='unique_resumo_diario_dia_tipo_item')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_resumos_diarios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UltimaCompraItem',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ultima_compra', serialize=False, to='core.item')),
+                ('preco_unidade', models.DecimalField(decimal_places=4, max_digits=10, verbose_name='Último preço de compra')),
+                ('timestamp', models.DateTimeField(verbose_name='Data da última compra')),
+            ],
+            options={
+                'verbose_name': 'Última Compra de Item',
+                'verbose_name_plural': 'Últimas Compras de Itens',
+            },
+        ),
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO core_ultimacompraitem (item_id, preco_unidade, "timestamp")
+                SELECT id, ultimo_preco_compra, data_ultima_compra
+                FROM core_item
+                WHERE ultimo_preco_compra IS NOT NULL AND data_ultima_compra IS NOT NULL
+            """,
+            reverse_sql="""
+                UPDATE core_item item
+                SET ultimo_preco_compra = ultima_compra.preco_unidade, data_ultima_compra = ultima_compra."timestamp"
+                FROM core_ultimacompraitem ultima_compra
+                WHERE item.id = ultima_compra.item_id
+            """
+        ),
+        migrations.RemoveField(
+            model_name='item',
+            name='data_ultima_compra',
+        ),
+        migrations.RemoveField(
+            model_name='item',
+            name='ultimo_preco_compra',
+        ),
+    ]
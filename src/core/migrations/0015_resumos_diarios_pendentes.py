@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_ultimacompraitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoDiarioEventoPendente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('quantidade_alocada', models.IntegerField()),
+                ('quantidade_retornada', models.IntegerField()),
+                ('custo_liquido', models.DecimalField(decimal_places=4, max_digits=10)),
+                ('evento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.evento')),
+            ],
+            options={
+                'verbose_name': 'Resumo Diário de Evento Pendente',
+                'verbose_name_plural': 'Resumos Diários de Eventos Pendentes',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumoDiarioTransacoesPendente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('tipo', models.CharField(choices=[('compra', 'Compra'), ('alocacao', 'Alocação para Evento'), ('retorno', 'Retorno de Evento'), ('remocao', 'Remoção Manual'), ('adicao', 'Adição Manual'), ('patrocinio', 'Patrocínio'), ('consumo', 'Consumo Interno'), ('saldo_inicial', 'Saldo Inicial')], max_length=20)),
+                ('quantidade', models.IntegerField()),
+                ('valor_total', models.DecimalField(decimal_places=4, max_digits=10)),
+                ('transacoes', models.PositiveIntegerField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.item')),
+            ],
+            options={
+                'verbose_name': 'Resumo Diário de Transações Pendente',
+                'verbose_name_plural': 'Resumos Diários de Transações Pendentes',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_resumos_diarios_pendentes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerfilSQLRequisicao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('dados', models.JSONField()),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Perfil SQL de Requisição',
+                'verbose_name_plural': 'Perfis SQL de Requisições',
+                'indexes': [models.Index(fields=['usuario', '-id'], name='perfil_sql_usuario_idx')],
+            },
+        ),
+    ]
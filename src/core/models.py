@@ -1,7 +1,16 @@
+import random
+from collections import Counter, defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
-from django.db import models, transaction
+from django.db import connection, models, transaction
+from django.db.models.functions import Cast, Coalesce, TruncDate
+from django.utils import timezone
+
+from .contencao import travar
+from .metricas import contar_transacoes_estoque
 
 
 class TipoTransacao(models.TextChoices):
@@ -12,6 +21,7 @@ class TipoTransacao(models.TextChoices):
     ADICAO_MANUAL = 'adicao', 'Adição Manual'
     PATROCINIO = 'patrocinio', 'Patrocínio'
     CONSUMO_INTERNO = 'consumo', 'Consumo Interno'
+    SALDO_INICIAL = 'saldo_inicial', 'Saldo Inicial'
 
 
 class StatusEvento(models.TextChoices):
@@ -35,6 +45,244 @@ EXPR_CUSTO_LIQUIDO = models.Sum(
     )
 )
 
+TIPOS_ENTRADA_ESTOQUE = (
+    TipoTransacao.COMPRA, TipoTransacao.ADICAO_MANUAL, TipoTransacao.PATROCINIO, TipoTransacao.RETORNO_EVENTO,
+    TipoTransacao.SALDO_INICIAL
+)
+
+EXPR_QUANTIDADE_ESTOQUE = models.Sum(
+    models.Case(
+        models.When(tipo__in=TIPOS_ENTRADA_ESTOQUE, then=models.F('quantidade')),
+        default=-models.F('quantidade'),
+        output_field=models.IntegerField()
+    )
+)
+
+EXPR_VALOR_ESTOQUE = models.Sum(
+    models.Case(
+        models.When(tipo__in=TIPOS_ENTRADA_ESTOQUE, then=models.F('valor_total')),
+        default=-models.F('valor_total'),
+        output_field=models.DecimalField(max_digits=10, decimal_places=4)
+    )
+)
+
+
+class ItemQuerySet(models.QuerySet):
+    def creditar_estoque(self, id_item, quantidade, valor):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {self.model._meta.db_table} '
+                'SET quantidade_em_estoque = quantidade_em_estoque + %s, valor_total = valor_total + %s '
+                'WHERE id = %s '
+                'RETURNING id',
+                [quantidade, valor, id_item]
+            )
+            return cursor.fetchall()
+
+    def debitar_estoque(self, id_item, quantidade, preco_unidade=None):
+        tabela = self.model._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {tabela} item '
+                'SET quantidade_em_estoque = item.quantidade_em_estoque - %(quantidade)s, '
+                'valor_total = item.valor_total - %(quantidade)s * anterior.preco_unidade '
+                'FROM ('
+                f'SELECT id, COALESCE(%(preco_unidade)s::numeric, preco_medio) AS preco_unidade FROM {tabela} '
+                'WHERE id = %(id_item)s FOR NO KEY UPDATE'
+                ') anterior '
+                'WHERE item.id = anterior.id AND item.quantidade_em_estoque >= %(quantidade)s '
+                'RETURNING item.id, anterior.preco_unidade',
+                {'id_item': id_item, 'quantidade': quantidade, 'preco_unidade': preco_unidade}
+            )
+            return cursor.fetchall()
+
+    def com_estoque_total(self):
+        fracoes = FracaoEstoque.objects.filter(
+            item_id=models.OuterRef('id')
+        ).order_by(
+        ).values(
+            'item_id'
+        )
+        quantidade_total_em_estoque = models.F('quantidade_em_estoque') + Coalesce(
+            models.Subquery(fracoes.annotate(total=models.Sum('quantidade_em_estoque')).values('total')),
+            0
+        )
+        valor_total_em_estoque = models.F('valor_total') + Coalesce(
+            models.Subquery(fracoes.annotate(total=models.Sum('valor_total')).values('total')),
+            Decimal(0)
+        )
+
+        return self.annotate(
+            quantidade_total_em_estoque=quantidade_total_em_estoque,
+            valor_total_em_estoque=valor_total_em_estoque
+        ).annotate(
+            preco_medio_total=models.Case(
+                models.When(quantidade_total_em_estoque=0, then=models.Value(Decimal(0))),
+                default=Cast(
+                    models.F('valor_total_em_estoque') / models.F('quantidade_total_em_estoque'),
+                    models.DecimalField(max_digits=10, decimal_places=4)
+                ),
+                output_field=models.DecimalField(max_digits=10, decimal_places=4)
+            )
+        )
+
+    def consolidar_fracoes(self, ids_itens):
+        ids_itens = sorted(ids_itens)
+        if not ids_itens:
+            return
+
+        tabela_fracoes = FracaoEstoque._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id FROM {self.model._meta.db_table} WHERE id = ANY(%s) ORDER BY id FOR NO KEY UPDATE',
+                [ids_itens]
+            )
+            cursor.execute(
+                f'''
+                WITH fracoes AS (
+                    SELECT id, item_id, quantidade_em_estoque, valor_total
+                    FROM {tabela_fracoes}
+                    WHERE item_id = ANY(%(ids_itens)s) AND (quantidade_em_estoque > 0 OR valor_total > 0)
+                    ORDER BY item_id, indice
+                    FOR UPDATE
+                ),
+                fracoes_zeradas AS (
+                    UPDATE {tabela_fracoes} fracao
+                    SET quantidade_em_estoque = 0, valor_total = 0
+                    FROM fracoes
+                    WHERE fracao.id = fracoes.id
+                )
+                UPDATE {self.model._meta.db_table} item
+                SET
+                    quantidade_em_estoque = item.quantidade_em_estoque + total.quantidade,
+                    valor_total = item.valor_total + total.valor
+                FROM (
+                    SELECT item_id, SUM(quantidade_em_estoque) AS quantidade, SUM(valor_total) AS valor
+                    FROM fracoes
+                    GROUP BY item_id
+                ) total
+                WHERE item.id = total.item_id
+                ''',
+                {'ids_itens': ids_itens}
+            )
+
+    def distribuir_fracoes(self, id_item):
+        item = self.select_for_update(no_key=True).get(pk=id_item)
+
+        FracaoEstoque.objects.filter(item_id=id_item, indice__gte=item.quantidade_fracoes).delete()
+        fracoes = {
+            fracao.indice: fracao
+            for fracao in FracaoEstoque.objects.select_for_update().filter(item_id=id_item)
+        }
+
+        quantidade_restante = item.quantidade_em_estoque
+        valor_restante = item.valor_total
+        fracoes_para_criar = []
+        fracoes_para_atualizar = []
+
+        for indice in range(item.quantidade_fracoes):
+            fracao = fracoes.get(indice)
+            if fracao is None:
+                fracao = FracaoEstoque(item_id=id_item, indice=indice)
+                fracoes_para_criar.append(fracao)
+            else:
+                fracoes_para_atualizar.append(fracao)
+
+            fracoes_restantes = item.quantidade_fracoes - indice
+            quantidade_fracao = quantidade_restante // fracoes_restantes
+            if quantidade_fracao == quantidade_restante:
+                valor_fracao = valor_restante
+            else:
+                valor_fracao = (valor_restante * quantidade_fracao / quantidade_restante).quantize(
+                    Decimal('0.0001'),
+                    ROUND_HALF_UP
+                )
+
+            fracao.quantidade_em_estoque = fracao.quantidade_em_estoque + quantidade_fracao
+            fracao.valor_total = fracao.valor_total + valor_fracao
+            quantidade_restante -= quantidade_fracao
+            valor_restante -= valor_fracao
+
+        FracaoEstoque.objects.bulk_create(fracoes_para_criar)
+        FracaoEstoque.objects.bulk_update(fracoes_para_atualizar, ['quantidade_em_estoque', 'valor_total'])
+        self.filter(
+            pk=id_item
+        ).update(
+            quantidade_em_estoque=quantidade_restante,
+            valor_total=valor_restante
+        )
+
+    def creditar_fracao(self, item, quantidade, valor):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {FracaoEstoque._meta.db_table} '
+                'SET quantidade_em_estoque = quantidade_em_estoque + %s, valor_total = valor_total + %s '
+                'WHERE item_id = %s AND indice = %s '
+                'RETURNING id',
+                [quantidade, valor, item.pk, random.randrange(item.quantidade_fracoes)]
+            )
+            linhas_atualizadas = cursor.fetchall()
+
+        return linhas_atualizadas or self.creditar_estoque(item.pk, quantidade, valor)
+
+    def debitar_fracao(self, id_item, quantidade, preco_unidade=None):
+        tabela = FracaoEstoque._meta.db_table
+        linhas_atualizadas = []
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            if preco_unidade is None:
+                cursor.execute(
+                    f'''
+                    SELECT COALESCE(
+                        (SUM(valor_total) / NULLIF(SUM(quantidade_em_estoque), 0))::numeric(10, 4),
+                        0
+                    )
+                    FROM (
+                        SELECT quantidade_em_estoque, valor_total FROM {self.model._meta.db_table} WHERE id = %(id_item)s
+                        UNION ALL
+                        SELECT quantidade_em_estoque, valor_total FROM {tabela} WHERE item_id = %(id_item)s
+                    ) estoque
+                    ''',
+                    {'id_item': id_item}
+                )
+                [(preco_unidade,)] = cursor.fetchall()
+
+            quantidade_restante = quantidade
+            while quantidade_restante > 0:
+                cursor.execute(
+                    f'''
+                    WITH disponivel AS (
+                        SELECT id, LEAST(quantidade_em_estoque, %(quantidade)s) AS quantidade
+                        FROM {tabela}
+                        WHERE item_id = %(id_item)s
+                            AND quantidade_em_estoque > 0
+                            AND valor_total >= LEAST(quantidade_em_estoque, %(quantidade)s) * %(preco_unidade)s
+                        ORDER BY quantidade_em_estoque >= %(quantidade)s DESC, random()
+                        LIMIT 1
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    UPDATE {tabela} fracao
+                    SET
+                        quantidade_em_estoque = fracao.quantidade_em_estoque - disponivel.quantidade,
+                        valor_total = fracao.valor_total - disponivel.quantidade * %(preco_unidade)s
+                    FROM disponivel
+                    WHERE fracao.id = disponivel.id
+                    RETURNING fracao.id, disponivel.quantidade
+                    ''',
+                    {'id_item': id_item, 'quantidade': quantidade_restante, 'preco_unidade': preco_unidade}
+                )
+                fracao_debitada = cursor.fetchone()
+
+                if fracao_debitada is None:
+                    transaction.set_rollback(True)
+                    return []
+
+                id_fracao, quantidade_debitada = fracao_debitada
+                linhas_atualizadas.append((id_fracao, preco_unidade))
+                quantidade_restante -= quantidade_debitada
+
+        return linhas_atualizadas
+
 
 class Item(models.Model):
     class Meta:
@@ -50,7 +298,9 @@ class Item(models.Model):
             )
         ]
 
+    objects = ItemQuerySet.as_manager()
     nome = models.CharField(max_length=100)
+    quantidade_fracoes = models.PositiveSmallIntegerField(default=0, verbose_name='Frações de estoque')
     quantidade_em_estoque = models.IntegerField(default=0, editable=False)
     valor_total = models.DecimalField(max_digits=10, decimal_places=4, default=0, editable=False)
     preco_medio = models.GeneratedField(
@@ -63,26 +313,129 @@ class Item(models.Model):
         db_persist=True
     )
 
+    def save(self, **kwargs):
+        update_fields = kwargs.get('update_fields')
+
+        with transaction.atomic():
+            super().save(**kwargs)
+
+            if (
+                (update_fields is None or 'quantidade_fracoes' in update_fields)
+                and (self.quantidade_fracoes or self.fracoes_estoque.exists())
+            ):
+                Item.objects.consolidar_fracoes([self.pk])
+                Item.objects.distribuir_fracoes(self.pk)
+
+        if update_fields is None or 'nome' in update_fields:
+            Evento.objects.filter(
+                models.Q(solicitacoes__item=self) | models.Q(transacoes__item=self)
+            ).update(
+                versao=models.F('versao') + 1
+            )
+
+    def quantidade_total_em_estoque(self):
+        if not self.quantidade_fracoes:
+            return self.quantidade_em_estoque
+
+        return Item.objects.com_estoque_total().values_list(
+            'quantidade_total_em_estoque',
+            flat=True
+        ).get(
+            pk=self.pk
+        )
+
     def __str__(self):
         return self.nome
 
 
+class FracaoEstoque(models.Model):
+    class Meta:
+        verbose_name = 'Fração de Estoque'
+        verbose_name_plural = 'Frações de Estoque'
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'indice'], name='unique_fracao_estoque_item_indice'),
+            models.CheckConstraint(
+                condition=models.Q(quantidade_em_estoque__gte=0),
+                name='fracao_quantidade_em_estoque_gte_zero'
+            ),
+            models.CheckConstraint(
+                condition=models.Q(valor_total__gte=0),
+                name='fracao_valor_total_gte_zero'
+            )
+        ]
+
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='fracoes_estoque')
+    indice = models.PositiveSmallIntegerField()
+    quantidade_em_estoque = models.IntegerField(default=0)
+    valor_total = models.DecimalField(max_digits=10, decimal_places=4, default=0)
+
+    def __str__(self):
+        return f'{self.item} #{self.indice}'
+
+
+class UltimaCompraItemQuerySet(models.QuerySet):
+    def registrar(self, compras):
+        if not compras:
+            return
+
+        tabela = self.model._meta.db_table
+        ids_itens = sorted(compras)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'''
+                INSERT INTO {tabela} AS ultima_compra (item_id, preco_unidade, "timestamp")
+                SELECT * FROM unnest(%(ids_itens)s::bigint[], %(precos)s::numeric[], %(timestamps)s::timestamptz[])
+                ON CONFLICT (item_id) DO UPDATE
+                SET preco_unidade = EXCLUDED.preco_unidade, "timestamp" = EXCLUDED."timestamp"
+                WHERE ultima_compra."timestamp" <= EXCLUDED."timestamp"
+                ''',
+                {
+                    'ids_itens': ids_itens,
+                    'precos': [compras[id_item][0] for id_item in ids_itens],
+                    'timestamps': [compras[id_item][1] for id_item in ids_itens],
+                }
+            )
+
+
+class UltimaCompraItem(models.Model):
+    class Meta:
+        verbose_name = 'Última Compra de Item'
+        verbose_name_plural = 'Últimas Compras de Itens'
+
+    objects = UltimaCompraItemQuerySet.as_manager()
+    item = models.OneToOneField(Item, on_delete=models.CASCADE, primary_key=True, related_name='ultima_compra')
+    preco_unidade = models.DecimalField(max_digits=10, decimal_places=4, verbose_name='Último preço de compra')
+    timestamp = models.DateTimeField(verbose_name='Data da última compra')
+
+    def __str__(self):
+        return f'{self.item} em {timezone.localtime(self.timestamp).strftime('%d/%m/%Y %H:%M')}'
+
+
 class TransacaoEstoqueQuerySet(models.QuerySet):
-    def ultimo_preco_unidade_pago(self, id_item):
-        return self.filter(
-            item_id=id_item,
-            tipo=TipoTransacao.COMPRA
-        ).order_by(
-            '-timestamp'
+    def get_itens_consumidos_com_preco(self):
+        return self.order_by(
+        ).filter(
+            preco_unidade__gt=0
         ).values(
-            'preco_unidade',
-        )[:1]
+            'item',
+            'preco_unidade'
+        ).annotate(
+            quantidade_consumida=EXPR_QUANTIDADE_LIQUIDA
+        ).filter(
+            quantidade_consumida__gt=0
+        ).values_list(
+            'quantidade_consumida',
+            'item__nome',
+            'preco_unidade'
+        )
 
-    def get_itens_consumidos_com_preco(self):
+    def get_itens_consumidos_com_preco_por_evento(self):
         return self.order_by(
         ).filter(
+            evento__isnull=False,
             preco_unidade__gt=0
         ).values(
+            'evento_id',
             'item',
             'preco_unidade'
         ).annotate(
@@ -90,6 +443,7 @@ class TransacaoEstoqueQuerySet(models.QuerySet):
         ).filter(
             quantidade_consumida__gt=0
         ).values_list(
+            'evento_id',
             'quantidade_consumida',
             'item__nome',
             'preco_unidade'
@@ -110,12 +464,15 @@ class TransacaoEstoque(models.Model):
                 name='preco_positivo'
             )
         ]
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='transacao_timestamp_id_idx')
+        ]
 
     Tipo = TipoTransacao
     objects = TransacaoEstoqueQuerySet.as_manager()
     item = models.ForeignKey(Item, on_delete=models.PROTECT, db_index=True)
     tipo = models.CharField(choices=TipoTransacao.choices, db_index=True, max_length=20)
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    timestamp = models.DateTimeField(auto_now_add=True)
     quantidade = models.IntegerField(validators=[MinValueValidator(1)])
     preco_unidade = models.DecimalField(
         max_digits=10,
@@ -146,12 +503,13 @@ class TransacaoEstoque(models.Model):
 
         if self.tipo in (TipoTransacao.ALOCACAO_EVENTO, TipoTransacao.RETORNO_EVENTO):
             if self.tipo == TipoTransacao.RETORNO_EVENTO:
-                quantidade_maxima_retorno = TransacaoEstoque.objects.filter(
+                quantidade_maxima_retorno = SumarioItemEvento.objects.filter(
                     evento=self.evento,
                     item=self.item
-                ).aggregate(
-                    quantidade_maxima_retorno=EXPR_QUANTIDADE_LIQUIDA
-                )['quantidade_maxima_retorno']
+                ).values_list(
+                    'quantidade_liquida',
+                    flat=True
+                ).first()
 
                 if quantidade_maxima_retorno is None:
                     raise ValidationError({
@@ -167,13 +525,17 @@ class TransacaoEstoque(models.Model):
         elif self.evento:
             raise ValidationError({'evento': 'Só é possível associar transações de alocação e retorno a um evento'})
 
+        if self.pk is None and self.tipo == TipoTransacao.SALDO_INICIAL:
+            raise ValidationError({'tipo': 'Saldos iniciais são gerados somente pela compactação de transações'})
+
         if self.tipo in (TipoTransacao.ADICAO_MANUAL, TipoTransacao.COMPRA) and not self.preco_unidade:
             raise ValidationError({'preco_unidade': 'É necessário informar um valor para compras e adições manuais'})
 
         if self.tipo in (TipoTransacao.ALOCACAO_EVENTO, TipoTransacao.REMOCAO_MANUAL, TipoTransacao.CONSUMO_INTERNO):
-            if self.item.quantidade_em_estoque < self.quantidade:
+            quantidade_em_estoque = self.item.quantidade_total_em_estoque()
+            if quantidade_em_estoque < self.quantidade:
                 raise ValidationError({
-                    'quantidade': f'Estoque insuficiente. Disponível: {self.item.quantidade_em_estoque}'
+                    'quantidade': f'Estoque insuficiente. Disponível: {quantidade_em_estoque}'
                 })
 
     def save(self, **kwargs):
@@ -182,7 +544,23 @@ class TransacaoEstoque(models.Model):
             return
 
         with transaction.atomic():
-            item_para_atualizar = Item.objects.select_for_update().get(pk=self.item.pk)
+            if self.item.quantidade_fracoes:
+                self._movimentar_estoque_fracionado()
+                super().save(**kwargs)
+                registrar_transacoes([self])
+                return
+
+            if settings.ESTOQUE_ATUALIZACAO_CONDICIONAL:
+                self._movimentar_estoque_condicional()
+                super().save(**kwargs)
+                registrar_transacoes([self])
+                return
+
+            item_para_atualizar = travar(
+                'TransacaoEstoque.save',
+                Item,
+                lambda: Item.objects.select_for_update(no_key=True).get(pk=self.item.pk)
+            )
 
             match self.tipo:
                 case TipoTransacao.COMPRA | TipoTransacao.ADICAO_MANUAL | TipoTransacao.PATROCINIO | TipoTransacao.RETORNO_EVENTO:
@@ -201,13 +579,135 @@ class TransacaoEstoque(models.Model):
 
             item_para_atualizar.save(update_fields=['quantidade_em_estoque', 'valor_total'])
             super().save(**kwargs)
+            registrar_transacoes([self])
+
+    def _movimentar_estoque_fracionado(self):
+        match self.tipo:
+            case TipoTransacao.COMPRA | TipoTransacao.ADICAO_MANUAL | TipoTransacao.PATROCINIO | TipoTransacao.RETORNO_EVENTO:
+                if self.tipo == TipoTransacao.PATROCINIO:
+                    self.preco_unidade = 0
+
+                travar(
+                    'TransacaoEstoque.save',
+                    FracaoEstoque,
+                    lambda: Item.objects.creditar_fracao(self.item, self.quantidade, self.quantidade * self.preco_unidade)
+                )
+            case TipoTransacao.ALOCACAO_EVENTO | TipoTransacao.REMOCAO_MANUAL | TipoTransacao.CONSUMO_INTERNO:
+                preco_unidade_informado = (
+                    self.preco_unidade if self.tipo == TipoTransacao.REMOCAO_MANUAL and self.preco_unidade else None
+                )
+                linhas_atualizadas = travar(
+                    'TransacaoEstoque.save',
+                    FracaoEstoque,
+                    lambda: Item.objects.debitar_fracao(self.item_id, self.quantidade, preco_unidade_informado)
+                )
+
+                if not linhas_atualizadas:
+                    Item.objects.consolidar_fracoes([self.item_id])
+                    linhas_atualizadas = Item.objects.debitar_estoque(
+                        self.item_id,
+                        self.quantidade,
+                        preco_unidade_informado
+                    )
+
+                    if not linhas_atualizadas:
+                        quantidade_em_estoque = Item.objects.filter(
+                            pk=self.item_id
+                        ).values_list(
+                            'quantidade_em_estoque',
+                            flat=True
+                        ).first()
+                        raise ValidationError({
+                            'quantidade': f'Estoque insuficiente. Disponível: {quantidade_em_estoque}'
+                        })
+
+                    Item.objects.distribuir_fracoes(self.item_id)
+
+                [(_, self.preco_unidade), *_] = linhas_atualizadas
+
+    def _movimentar_estoque_condicional(self):
+        match self.tipo:
+            case TipoTransacao.COMPRA | TipoTransacao.ADICAO_MANUAL | TipoTransacao.PATROCINIO | TipoTransacao.RETORNO_EVENTO:
+                if self.tipo == TipoTransacao.PATROCINIO:
+                    self.preco_unidade = 0
+
+                travar(
+                    'TransacaoEstoque.save',
+                    Item,
+                    lambda: Item.objects.creditar_estoque(
+                        self.item_id,
+                        self.quantidade,
+                        self.quantidade * self.preco_unidade
+                    )
+                )
+            case TipoTransacao.ALOCACAO_EVENTO | TipoTransacao.REMOCAO_MANUAL | TipoTransacao.CONSUMO_INTERNO:
+                preco_unidade_informado = (
+                    self.preco_unidade if self.tipo == TipoTransacao.REMOCAO_MANUAL and self.preco_unidade else None
+                )
+                linhas_atualizadas = travar(
+                    'TransacaoEstoque.save',
+                    Item,
+                    lambda: Item.objects.debitar_estoque(self.item_id, self.quantidade, preco_unidade_informado)
+                )
+
+                if not linhas_atualizadas:
+                    quantidade_em_estoque = Item.objects.filter(
+                        pk=self.item_id
+                    ).values_list(
+                        'quantidade_em_estoque',
+                        flat=True
+                    ).first()
+                    raise ValidationError({
+                        'quantidade': f'Estoque insuficiente. Disponível: {quantidade_em_estoque}'
+                    })
+
+                [(_, self.preco_unidade)] = linhas_atualizadas
 
     def __str__(self):
         return f'{self.get_tipo_display()} de {self.quantidade} {self.item}(s)'
 
 
+class DiaTransacaoEstoqueQuerySet(models.QuerySet):
+    def registrar(self, transacoes):
+        dias = sorted({(timezone.localdate(transacao.timestamp), transacao.tipo) for transacao in transacoes})
+        self.bulk_create([self.model(dia=dia, tipo=tipo) for dia, tipo in dias], ignore_conflicts=True)
+
+    def preencher(self, transacoes=None):
+        if transacoes is None:
+            transacoes = TransacaoEstoque.objects.all()
+
+        self.bulk_create(
+            [
+                self.model(dia=dia, tipo=tipo)
+                for dia, tipo in transacoes.annotate(
+                    dia=TruncDate('timestamp')
+                ).values_list(
+                    'dia',
+                    'tipo'
+                ).distinct()
+            ],
+            ignore_conflicts=True
+        )
+
+
+class DiaTransacaoEstoque(models.Model):
+    class Meta:
+        verbose_name = 'Dia com Transações de Estoque'
+        verbose_name_plural = 'Dias com Transações de Estoque'
+        constraints = [
+            models.UniqueConstraint(fields=['dia', 'tipo'], name='unique_dia_tipo_transacao')
+        ]
+
+    objects = DiaTransacaoEstoqueQuerySet.as_manager()
+    dia = models.DateField()
+    tipo = models.CharField(choices=TipoTransacao.choices, max_length=20)
+
+    def __str__(self):
+        return f'{self.dia} {self.get_tipo_display()}'
+
+
 class EventoQuerySet(models.QuerySet):
-    def com_custo_total(self):
+    def com_custo_total_calculado(self):
         return self.annotate(
             custo_total_calculado=models.Subquery(
                 TransacaoEstoque.objects.filter(
@@ -234,44 +734,362 @@ class Evento(models.Model):
     nome = models.CharField(max_length=100)
     data = models.DateField()
     status = models.CharField(max_length=20, choices=StatusEvento.choices, default=StatusEvento.EM_ANDAMENTO)
+    custo_total = models.DecimalField(max_digits=10, decimal_places=4, default=0, editable=False)
+    versao = models.PositiveBigIntegerField(default=0, editable=False)
+
+    def __str__(self):
+        return f'{self.nome} {self.data.strftime('%d/%m/%Y')}'
+
+
+class SumarioItemEventoQuerySet(models.QuerySet):
+    def registrar_movimentos(self, movimentos):
+        if not movimentos:
+            return
+
+        tabela = self.model._meta.db_table
+        parametros = []
+        for (id_evento, id_item), (quantidade_alocada, quantidade_retornada, custo) in sorted(movimentos.items()):
+            parametros.extend((id_evento, id_item, quantidade_alocada, quantidade_retornada, custo))
 
-    @property
-    def custo_total(self):
-        if hasattr(self, 'custo_total_calculado'):
-            return self.custo_total_calculado
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {tabela} (evento_id, item_id, quantidade_alocada, quantidade_retornada, custo_liquido) '
+                f'VALUES {', '.join(['(%s, %s, %s, %s, %s)'] * len(movimentos))} '
+                'ON CONFLICT (evento_id, item_id) DO UPDATE SET '
+                f'quantidade_alocada = {tabela}.quantidade_alocada + EXCLUDED.quantidade_alocada, '
+                f'quantidade_retornada = {tabela}.quantidade_retornada + EXCLUDED.quantidade_retornada, '
+                f'custo_liquido = {tabela}.custo_liquido + EXCLUDED.custo_liquido',
+                parametros
+            )
 
-        custo_total = self.transacoes.aggregate(
-            custo_total=EXPR_CUSTO_LIQUIDO
-        )['custo_total']
 
-        return custo_total
+class SumarioItemEvento(models.Model):
+    class Meta:
+        verbose_name = 'Sumário de Item do Evento'
+        verbose_name_plural = 'Sumários de Itens dos Eventos'
+        constraints = [
+            models.UniqueConstraint(fields=['evento', 'item'], name='unique_sumario_item_evento')
+        ]
+
+    objects = SumarioItemEventoQuerySet.as_manager()
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='sumarios_itens')
+    item = models.ForeignKey(Item, on_delete=models.CASCADE)
+    quantidade_alocada = models.IntegerField(default=0)
+    quantidade_retornada = models.IntegerField(default=0)
+    quantidade_liquida = models.GeneratedField(
+        expression=models.F('quantidade_alocada') - models.F('quantidade_retornada'),
+        output_field=models.IntegerField(),
+        db_persist=True
+    )
+    custo_liquido = models.DecimalField(max_digits=10, decimal_places=4, default=0)
 
     def __str__(self):
-        return f'{self.nome} {self.data.strftime('%d/%m/%Y')}'
+        return f'{self.item} em {self.evento}'
+
+
+class LoteAlocacao(models.Model):
+    class Meta:
+        verbose_name = 'Lote de Alocação'
+        verbose_name_plural = 'Lotes de Alocação'
+        indexes = [
+            models.Index(fields=['evento', 'item', 'id'], name='lote_alocacao_evento_item_idx')
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(quantidade_restante__gt=0),
+                name='lote_quantidade_restante_maior_que_zero'
+            )
+        ]
+
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='lotes_alocacao')
+    item = models.ForeignKey(Item, on_delete=models.CASCADE)
+    quantidade_restante = models.IntegerField()
+    preco_unidade = models.DecimalField(max_digits=10, decimal_places=4)
+
+    def __str__(self):
+        return f'{self.quantidade_restante} {self.item}(s) em {self.evento}'
+
+
+def _acumular_resumos(modelo, colunas_chave, colunas_valor, origem, parametros, consulta_auxiliar=''):
+    tabela = modelo._meta.db_table
+    atualizacoes = ', '.join(f'{coluna} = {tabela}.{coluna} + EXCLUDED.{coluna}' for coluna in colunas_valor)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{consulta_auxiliar}INSERT INTO {tabela} ({', '.join(colunas_chave + colunas_valor)}) {origem} '
+            f'ON CONFLICT ({', '.join(colunas_chave)}) DO UPDATE SET {atualizacoes}',
+            parametros
+        )
+
+
+def _consolidar_resumos_pendentes(modelo, modelo_pendente, colunas_chave, colunas_valor):
+    colunas_agrupamento = ', '.join(colunas_chave)
+    somas = ', '.join(f'sum({coluna})' for coluna in colunas_valor)
+
+    _acumular_resumos(
+        modelo,
+        colunas_chave,
+        colunas_valor,
+        f'SELECT {colunas_agrupamento}, {somas} FROM pendentes '
+        f'GROUP BY {colunas_agrupamento} ORDER BY {colunas_agrupamento}',
+        None,
+        f'WITH pendentes AS ('
+        f'DELETE FROM {modelo_pendente._meta.db_table} RETURNING {', '.join(colunas_chave + colunas_valor)}'
+        f') '
+    )
+
+
+def _parametros_preenchimento(desde, **parametros):
+    filtro = '' if desde is None else ' AND "timestamp" >= %(desde)s'
+    return filtro, {'fuso': timezone.get_current_timezone_name(), 'desde': desde, **parametros}
+
+
+class ResumoDiarioTransacoesQuerySet(models.QuerySet):
+    COLUNAS_CHAVE = ('dia', 'tipo', 'item_id')
+    COLUNAS_VALOR = ('quantidade', 'valor_total', 'transacoes')
+
+    def registrar(self, transacoes):
+        resumos = defaultdict(lambda: [0, Decimal(0), 0])
+        for transacao in transacoes:
+            resumo = resumos[(timezone.localdate(transacao.timestamp), transacao.tipo, transacao.item_id)]
+            resumo[0] += transacao.quantidade
+            resumo[1] += transacao.quantidade * transacao.preco_unidade
+            resumo[2] += 1
+
+        ResumoDiarioTransacoesPendente.objects.bulk_create([
+            ResumoDiarioTransacoesPendente(
+                dia=dia,
+                tipo=tipo,
+                item_id=id_item,
+                quantidade=quantidade,
+                valor_total=valor_total,
+                transacoes=quantidade_transacoes
+            )
+            for (dia, tipo, id_item), (quantidade, valor_total, quantidade_transacoes) in resumos.items()
+        ])
+
+    def consolidar_pendentes(self):
+        _consolidar_resumos_pendentes(
+            self.model,
+            ResumoDiarioTransacoesPendente,
+            self.COLUNAS_CHAVE,
+            self.COLUNAS_VALOR
+        )
+
+    def preencher(self, desde=None):
+        filtro, parametros = _parametros_preenchimento(desde, saldo_inicial=TipoTransacao.SALDO_INICIAL)
+        _acumular_resumos(
+            self.model,
+            self.COLUNAS_CHAVE,
+            self.COLUNAS_VALOR,
+            '(SELECT ("timestamp" AT TIME ZONE %(fuso)s)::date, tipo, item_id, sum(quantidade), sum(valor_total), '
+            f'count(*) FROM {TransacaoEstoque._meta.db_table} WHERE tipo <> %(saldo_inicial)s{filtro} GROUP BY 1, 2, 3)',
+            parametros
+        )
+
+
+class ResumoDiarioTransacoes(models.Model):
+    class Meta:
+        verbose_name = 'Resumo Diário de Transações'
+        verbose_name_plural = 'Resumos Diários de Transações'
+        constraints = [
+            models.UniqueConstraint(fields=['dia', 'tipo', 'item'], name='unique_resumo_diario_dia_tipo_item')
+        ]
+
+    objects = ResumoDiarioTransacoesQuerySet.as_manager()
+    dia = models.DateField()
+    tipo = models.CharField(choices=TipoTransacao.choices, max_length=20)
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='resumos_diarios')
+    quantidade = models.IntegerField(default=0)
+    valor_total = models.DecimalField(max_digits=10, decimal_places=4, default=0)
+    transacoes = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.get_tipo_display()} de {self.item} em {self.dia.strftime('%d/%m/%Y')}'
+
+
+class ResumoDiarioTransacoesPendente(models.Model):
+    class Meta:
+        verbose_name = 'Resumo Diário de Transações Pendente'
+        verbose_name_plural = 'Resumos Diários de Transações Pendentes'
+
+    dia = models.DateField()
+    tipo = models.CharField(choices=TipoTransacao.choices, max_length=20)
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='+')
+    quantidade = models.IntegerField()
+    valor_total = models.DecimalField(max_digits=10, decimal_places=4)
+    transacoes = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f'{self.get_tipo_display()} de {self.item} em {self.dia.strftime('%d/%m/%Y')}'
+
+
+class ResumoDiarioEventoQuerySet(models.QuerySet):
+    COLUNAS_CHAVE = ('dia', 'evento_id')
+    COLUNAS_VALOR = ('quantidade_alocada', 'quantidade_retornada', 'custo_liquido')
+
+    def registrar(self, transacoes):
+        resumos = defaultdict(lambda: [0, 0, Decimal(0)])
+        for transacao in transacoes:
+            if transacao.evento_id is None:
+                continue
+
+            resumo = resumos[(timezone.localdate(transacao.timestamp), transacao.evento_id)]
+            valor_transacao = transacao.quantidade * transacao.preco_unidade
+
+            match transacao.tipo:
+                case TipoTransacao.ALOCACAO_EVENTO:
+                    resumo[0] += transacao.quantidade
+                    resumo[2] += valor_transacao
+                case TipoTransacao.RETORNO_EVENTO:
+                    resumo[1] += transacao.quantidade
+                    resumo[2] -= valor_transacao
+
+        ResumoDiarioEventoPendente.objects.bulk_create([
+            ResumoDiarioEventoPendente(
+                dia=dia,
+                evento_id=id_evento,
+                quantidade_alocada=quantidade_alocada,
+                quantidade_retornada=quantidade_retornada,
+                custo_liquido=custo_liquido
+            )
+            for (dia, id_evento), (quantidade_alocada, quantidade_retornada, custo_liquido) in resumos.items()
+        ])
+
+    def consolidar_pendentes(self):
+        _consolidar_resumos_pendentes(
+            self.model,
+            ResumoDiarioEventoPendente,
+            self.COLUNAS_CHAVE,
+            self.COLUNAS_VALOR
+        )
+
+    def preencher(self, desde=None):
+        filtro, parametros = _parametros_preenchimento(
+            desde,
+            alocacao=TipoTransacao.ALOCACAO_EVENTO,
+            retorno=TipoTransacao.RETORNO_EVENTO
+        )
+        _acumular_resumos(
+            self.model,
+            self.COLUNAS_CHAVE,
+            self.COLUNAS_VALOR,
+            '(SELECT ("timestamp" AT TIME ZONE %(fuso)s)::date, evento_id, '
+            'COALESCE(sum(quantidade) FILTER (WHERE tipo = %(alocacao)s), 0), '
+            'COALESCE(sum(quantidade) FILTER (WHERE tipo = %(retorno)s), 0), '
+            'sum(CASE WHEN tipo = %(alocacao)s THEN valor_total ELSE -valor_total END) '
+            f'FROM {TransacaoEstoque._meta.db_table} '
+            f'WHERE evento_id IS NOT NULL AND tipo IN (%(alocacao)s, %(retorno)s){filtro} GROUP BY 1, 2)',
+            parametros
+        )
+
+
+class ResumoDiarioEvento(models.Model):
+    class Meta:
+        verbose_name = 'Resumo Diário de Evento'
+        verbose_name_plural = 'Resumos Diários de Eventos'
+        constraints = [
+            models.UniqueConstraint(fields=['dia', 'evento'], name='unique_resumo_diario_dia_evento')
+        ]
+
+    objects = ResumoDiarioEventoQuerySet.as_manager()
+    dia = models.DateField()
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='resumos_diarios')
+    quantidade_alocada = models.IntegerField(default=0)
+    quantidade_retornada = models.IntegerField(default=0)
+    custo_liquido = models.DecimalField(max_digits=10, decimal_places=4, default=0)
+
+    def __str__(self):
+        return f'{self.evento} em {self.dia.strftime('%d/%m/%Y')}'
+
+
+class ResumoDiarioEventoPendente(models.Model):
+    class Meta:
+        verbose_name = 'Resumo Diário de Evento Pendente'
+        verbose_name_plural = 'Resumos Diários de Eventos Pendentes'
+
+    dia = models.DateField()
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='+')
+    quantidade_alocada = models.IntegerField()
+    quantidade_retornada = models.IntegerField()
+    custo_liquido = models.DecimalField(max_digits=10, decimal_places=4)
+
+    def __str__(self):
+        return f'{self.evento} em {self.dia.strftime('%d/%m/%Y')}'
+
+
+def registrar_transacoes(transacoes):
+    movimentos = defaultdict(lambda: [0, 0, Decimal(0)])
+    lotes_para_criar = []
+    compras = {}
+
+    for transacao in transacoes:
+        if transacao.tipo == TipoTransacao.COMPRA:
+            compras[transacao.item_id] = (transacao.preco_unidade, transacao.timestamp)
+
+        if transacao.evento_id is None:
+            continue
+
+        movimento = movimentos[(transacao.evento_id, transacao.item_id)]
+        valor_transacao = transacao.quantidade * transacao.preco_unidade
+
+        match transacao.tipo:
+            case TipoTransacao.ALOCACAO_EVENTO:
+                movimento[0] += transacao.quantidade
+                movimento[2] += valor_transacao
+                lotes_para_criar.append(
+                    LoteAlocacao(
+                        evento_id=transacao.evento_id,
+                        item_id=transacao.item_id,
+                        quantidade_restante=transacao.quantidade,
+                        preco_unidade=transacao.preco_unidade
+                    )
+                )
+            case TipoTransacao.RETORNO_EVENTO:
+                movimento[1] += transacao.quantidade
+                movimento[2] -= valor_transacao
+
+    SumarioItemEvento.objects.registrar_movimentos(movimentos)
+    LoteAlocacao.objects.bulk_create(lotes_para_criar)
+    UltimaCompraItem.objects.registrar(compras)
+    DiaTransacaoEstoque.objects.registrar(transacoes)
+    ResumoDiarioTransacoes.objects.registrar(transacoes)
+    ResumoDiarioEvento.objects.registrar(transacoes)
+
+    custos_eventos = defaultdict(Decimal)
+    for (id_evento, _), (_, _, custo) in movimentos.items():
+        custos_eventos[id_evento] += custo
+
+    for id_evento, custo in sorted(custos_eventos.items()):
+        Evento.objects.filter(
+            id=id_evento
+        ).update(
+            custo_total=models.F('custo_total') + custo,
+            versao=models.F('versao') + 1
+        )
+
+    quantidades_por_tipo = Counter(transacao.tipo for transacao in transacoes)
+    transaction.on_commit(lambda: contar_transacoes_estoque(quantidades_por_tipo))
 
 
 class SolicitacaoEventoQuerySet(models.QuerySet):
     def com_sumario_de_itens(self, id_evento):
-        transacoes_subquery = TransacaoEstoque.objects.filter(
+        sumario_subquery = SumarioItemEvento.objects.filter(
             evento_id=id_evento,
             item_id=models.OuterRef('item_id')
-        ).values('item_id')
+        )
 
         return self.filter(
             evento_id=id_evento
         ).annotate(
             quantidade_consumida = models.Subquery(
-                transacoes_subquery.annotate(
-                    quantidade_consumida=EXPR_QUANTIDADE_LIQUIDA
-                ).values(
-                    'quantidade_consumida'
+                sumario_subquery.values(
+                    'quantidade_liquida'
                 )
             ),
             custo = models.Subquery(
-                transacoes_subquery.annotate(
-                    custo=EXPR_CUSTO_LIQUIDO
-                ).values(
-                    'custo'
+                sumario_subquery.values(
+                    'custo_liquido'
                 )
             )
         )
@@ -322,5 +1140,129 @@ class SolicitacaoEvento(models.Model):
                 }
             )
 
+    def save(self, **kwargs):
+        super().save(**kwargs)
+        Evento.objects.filter(id=self.evento_id).update(versao=models.F('versao') + 1)
+
+    def delete(self, **kwargs):
+        resultado = super().delete(**kwargs)
+        Evento.objects.filter(id=self.evento_id).update(versao=models.F('versao') + 1)
+        return resultado
+
     def __str__(self):
         return f'{self.quantidade_solicitada} {self.item.nome}(s) para {self.evento}'
+
+
+class StatusTarefa(models.TextChoices):
+    PENDENTE = 'pendente', 'Pendente'
+    EXECUTANDO = 'executando', 'Executando'
+    CONCLUIDA = 'concluida', 'Concluída'
+    ERRO = 'erro', 'Erro'
+
+
+class TarefaRelatorio(models.Model):
+    class Meta:
+        verbose_name = 'Tarefa de Relatório'
+        verbose_name_plural = 'Tarefas de Relatórios'
+        indexes = [
+            models.Index(fields=['status', 'id'], name='tarefa_relatorio_status_idx')
+        ]
+
+    Status = StatusTarefa
+
+    tipo = models.CharField(max_length=30)
+    chave = models.CharField(max_length=64, db_index=True)
+    evento = models.ForeignKey(Evento, on_delete=models.SET_NULL, null=True, related_name='tarefas_relatorio')
+    ids_selecionados = models.JSONField(default=list)
+    nome_arquivo = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=StatusTarefa.choices, default=StatusTarefa.PENDENTE)
+    solicitante = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    iniciado_em = models.DateTimeField(null=True)
+    concluido_em = models.DateTimeField(null=True)
+    erro = models.TextField(blank=True)
+
+    def __str__(self):
+        return self.nome_arquivo
+
+
+class PerfilSQLRequisicaoQuerySet(models.QuerySet):
+    def registrar(self, usuario, dados, limite):
+        perfil = self.create(usuario=usuario, dados=dados)
+        self.filter(
+            usuario=usuario
+        ).exclude(
+            id__in=self.filter(usuario=usuario).order_by('-id').values('id')[:limite]
+        ).delete()
+
+        return perfil
+
+    def historico(self, usuario):
+        return self.filter(usuario=usuario).order_by('-id')
+
+
+class PerfilSQLRequisicao(models.Model):
+    class Meta:
+        verbose_name = 'Perfil SQL de Requisição'
+        verbose_name_plural = 'Perfis SQL de Requisições'
+        indexes = [
+            models.Index(fields=['usuario', '-id'], name='perfil_sql_usuario_idx')
+        ]
+
+    objects = PerfilSQLRequisicaoQuerySet.as_manager()
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    criado_em = models.DateTimeField(auto_now_add=True)
+    dados = models.JSONField()
+
+    def __str__(self):
+        return f'{self.dados['metodo']} {self.dados['caminho']}'
+
+
+class FormatoArquivoCompactacao(models.TextChoices):
+    JSONL = 'jsonl', 'JSON Lines'
+    CSV = 'csv', 'CSV'
+
+
+class CompactacaoTransacoes(models.Model):
+    class Meta:
+        verbose_name = 'Compactação de Transações'
+        verbose_name_plural = 'Compactações de Transações'
+
+    Formato = FormatoArquivoCompactacao
+
+    corte = models.DateTimeField()
+    formato = models.CharField(max_length=10, choices=FormatoArquivoCompactacao.choices)
+    nome_arquivo = models.CharField(max_length=255)
+    transacoes_arquivadas = models.PositiveIntegerField(default=0)
+    ids_entradas = models.JSONField(default=list)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    restaurado_em = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.nome_arquivo
+
+
+class PosicaoEstoque(models.Model):
+    class Meta:
+        verbose_name = 'Posição de Estoque'
+        verbose_name_plural = 'Posições de Estoque'
+        constraints = [
+            models.UniqueConstraint(fields=['data', 'item'], name='unique_posicao_estoque_data_item')
+        ]
+
+    data = models.DateField()
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='posicoes_estoque')
+    quantidade = models.IntegerField()
+    valor_total = models.DecimalField(max_digits=10, decimal_places=4)
+    preco_medio = models.GeneratedField(
+        expression=models.Case(
+            models.When(quantidade=0, then=models.Value('0.00')),
+            default=models.F('valor_total') / models.F('quantidade'),
+            output_field=models.DecimalField(max_digits=10, decimal_places=4)
+        ),
+        output_field=models.DecimalField(max_digits=10, decimal_places=4),
+        db_persist=True
+    )
+
+    def __str__(self):
+        return f'{self.item} em {self.data.strftime('%d/%m/%Y')}'
@@ -0,0 +1,107 @@
+from datetime import datetime
+
+from django.db import ProgrammingError, transaction
+from django.utils import timezone
+
+GRANULARIDADE_MENSAL = 'mensal'
+GRANULARIDADE_ANUAL = 'anual'
+GRANULARIDADES = (GRANULARIDADE_MENSAL, GRANULARIDADE_ANUAL)
+SQLSTATE_SOBREPOSICAO = '42P17'
+
+
+def inicio_periodo(momento, granularidade):
+    momento = timezone.localtime(momento)
+    mes = momento.month if granularidade == GRANULARIDADE_MENSAL else 1
+    return timezone.make_aware(datetime(momento.year, mes, 1))
+
+
+def proximo_periodo(inicio, granularidade):
+    if granularidade == GRANULARIDADE_ANUAL or inicio.month == 12:
+        return timezone.make_aware(datetime(inicio.year + 1, 1, 1))
+
+    return timezone.make_aware(datetime(inicio.year, inicio.month + 1, 1))
+
+
+def fim_antecipado(periodos, granularidade):
+    fim = inicio_periodo(timezone.now(), granularidade)
+    for _ in range(periodos):
+        fim = proximo_periodo(fim, granularidade)
+
+    return fim
+
+
+def nome_particao(tabela, inicio, granularidade):
+    if granularidade == GRANULARIDADE_ANUAL:
+        return f'{tabela}_{inicio.year}'
+
+    return f'{tabela}_{inicio.year}_{inicio.month:02d}'
+
+
+def nome_particao_padrao(tabela):
+    return f'{tabela}_padrao'
+
+
+def colunas_gravaveis(cursor, tabela):
+    cursor.execute(
+        'SELECT column_name FROM information_schema.columns '
+        'WHERE table_schema = current_schema() AND table_name = %s AND is_generated = %s '
+        'ORDER BY ordinal_position',
+        [tabela, 'NEVER']
+    )
+    return [f'"{coluna}"' for coluna, in cursor.fetchall()]
+
+
+def _criar_particao(cursor, tabela, inicio, fim, granularidade):
+    particao = nome_particao(tabela, inicio, granularidade)
+    padrao = nome_particao_padrao(tabela)
+    colunas = ', '.join(colunas_gravaveis(cursor, tabela))
+
+    try:
+        with transaction.atomic():
+            cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [particao])
+            if cursor.fetchone()[0]:
+                return None
+
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {particao}_movidas ON COMMIT DROP AS '
+                f'WITH movidas AS ('
+                f'DELETE FROM {padrao} WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING {colunas}'
+                f') SELECT * FROM movidas',
+                [inicio, fim]
+            )
+            cursor.execute(
+                f'CREATE TABLE {particao} PARTITION OF {tabela} '
+                f"FOR VALUES FROM ('{inicio.isoformat()}') TO ('{fim.isoformat()}')"
+            )
+            cursor.execute(f'INSERT INTO {tabela} ({colunas}) SELECT {colunas} FROM {particao}_movidas')
+            linhas_movidas = cursor.rowcount
+            cursor.execute(f'DROP TABLE {particao}_movidas')
+    except ProgrammingError as erro:
+        if getattr(erro.__cause__, 'sqlstate', None) != SQLSTATE_SOBREPOSICAO:
+            raise
+        return None
+
+    return particao, linhas_movidas
+
+
+def criar_particoes(cursor, tabela, inicio, fim, granularidade):
+    criadas = []
+    periodo = inicio_periodo(inicio, granularidade)
+    while periodo <= fim:
+        proximo = proximo_periodo(periodo, granularidade)
+        criada = _criar_particao(cursor, tabela, periodo, proximo, granularidade)
+        if criada:
+            criadas.append(criada)
+        periodo = proximo
+
+    return criadas
+
+
+def primeiro_timestamp_particao_padrao(cursor, tabela):
+    cursor.execute(f'SELECT min("timestamp") FROM {nome_particao_padrao(tabela)}')
+    return cursor.fetchone()[0]
+
+
+def linhas_particao_padrao(cursor, tabela):
+    cursor.execute(f'SELECT count(*) FROM {nome_particao_padrao(tabela)}')
+    return cursor.fetchone()[0]
@@ -0,0 +1,99 @@
+import json
+import logging
+import re
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from .models import PerfilSQLRequisicao
+
+logger = logging.getLogger('core.perfil_sql')
+
+CHAVE_SESSAO_ATIVO = 'perfil_sql_ativo'
+
+_REGEX_LISTA_PARAMETROS = re.compile(r'\((?:%s, )+%s\)')
+_REGEX_LISTA_VALORES = re.compile(r'(\((?:%s, )*%s\))(?:, \1)+')
+
+
+def impressao_digital(sql):
+    return _REGEX_LISTA_PARAMETROS.sub('(...)', _REGEX_LISTA_VALORES.sub(r'\1, ...', sql))
+
+
+class PerfilSQL:
+    def __init__(self):
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append({
+                'sql': sql,
+                'params': params,
+                'many': many,
+                'duracao_ms': (time.perf_counter() - inicio) * 1000,
+            })
+
+    def _explicar(self, consulta):
+        if consulta['many'] or not consulta['sql'].lstrip().upper().startswith('SELECT'):
+            return None
+
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {consulta['sql']}', consulta['params'])
+                plano = '\n'.join(linha for linha, in cursor.fetchall())
+                transaction.set_rollback(True)
+        except DatabaseError as erro:
+            return f'EXPLAIN indisponível: {erro}'
+
+        return plano
+
+    def resumo(self, request, response):
+        grupos = defaultdict(list)
+        for consulta in self.consultas:
+            grupos[impressao_digital(consulta['sql'])].append(consulta)
+
+        consultas_agrupadas = []
+        for sql, consultas in grupos.items():
+            duracao_maxima = max(consulta['duracao_ms'] for consulta in consultas)
+            consultas_agrupadas.append({
+                'sql': sql,
+                'execucoes': len(consultas),
+                'duracao_total_ms': round(sum(consulta['duracao_ms'] for consulta in consultas), 3),
+                'duracao_maxima_ms': round(duracao_maxima, 3),
+                'n_mais_um': (
+                    len(consultas) >= settings.PERFIL_SQL_LIMITE_REPETICOES
+                    and sql.lstrip().upper().startswith('SELECT')
+                ),
+                'lenta': duracao_maxima >= settings.PERFIL_SQL_LIMITE_LENTO_MS,
+                'explain': None,
+            })
+
+        consultas_agrupadas.sort(key=lambda consulta: consulta['duracao_total_ms'], reverse=True)
+
+        for consulta_agrupada in consultas_agrupadas[:settings.PERFIL_SQL_EXPLAIN]:
+            pior_execucao = max(grupos[consulta_agrupada['sql']], key=lambda consulta: consulta['duracao_ms'])
+            consulta_agrupada['explain'] = self._explicar(pior_execucao)
+
+        return {
+            'momento': timezone.now().isoformat(),
+            'metodo': request.method,
+            'caminho': request.get_full_path(),
+            'status': response.status_code,
+            'usuario': request.user.get_username(),
+            'total_consultas': len(self.consultas),
+            'duracao_total_ms': round(sum(consulta['duracao_ms'] for consulta in self.consultas), 3),
+            'consultas_n_mais_um': sum(1 for consulta in consultas_agrupadas if consulta['n_mais_um']),
+            'consultas_lentas': sum(1 for consulta in consultas_agrupadas if consulta['lenta']),
+            'consultas': consultas_agrupadas,
+        }
+
+
+def registrar_perfil(request, perfil):
+    logger.info(json.dumps(perfil, ensure_ascii=False))
+
+    PerfilSQLRequisicao.objects.registrar(request.user, perfil, settings.PERFIL_SQL_HISTORICO)
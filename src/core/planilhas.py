@@ -1,6 +1,8 @@
 import io
 import xlsxwriter
 
+from .metricas import medir_funcao
+
 
 def _adicionar_estilos_base(workbook):
     estilos = {
@@ -55,12 +57,22 @@ def _adicionar_estilos_base(workbook):
     return estilos
 
 
-def _setup_planilha(worksheet_name, nome_evento, col_span):
-    output = io.BytesIO()
-    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-    worksheet = workbook.add_worksheet(worksheet_name)
+def _setup_planilha(worksheet_name, nome_evento, col_span, arquivo=None):
+    if arquivo is None:
+        output = io.BytesIO()
+        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+    else:
+        output = arquivo
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
 
     estilos = _adicionar_estilos_base(workbook)
+    worksheet = _adicionar_aba(workbook, estilos, worksheet_name, nome_evento, col_span)
+
+    return output, workbook, worksheet, estilos
+
+
+def _adicionar_aba(workbook, estilos, worksheet_name, nome_evento, col_span):
+    worksheet = workbook.add_worksheet(worksheet_name)
 
     worksheet.set_row(0, 25)
     worksheet.set_row(1, 30)
@@ -78,18 +90,23 @@ def _setup_planilha(worksheet_name, nome_evento, col_span):
 
     worksheet.set_footer('&CPágina &P de &N')
 
-    return output, workbook, worksheet, estilos
+    return worksheet
 
 
 def _finalizar_planilha(workbook, output):
     workbook.close()
     output.seek(0)
-    return output.getvalue()
 
+    if isinstance(output, io.BytesIO):
+        return output.getvalue()
+
+    return output
 
-def gerar_checklist(lista_itens, nome_evento):
+
+@medir_funcao
+def gerar_checklist(lista_itens, nome_evento, arquivo=None):
     col_count = 5
-    output, workbook, worksheet, estilos = _setup_planilha('Checklist', nome_evento, col_count)
+    output, workbook, worksheet, estilos = _setup_planilha('Checklist', nome_evento, col_count, arquivo)
 
     worksheet.set_column(0, 0, 5)  # QTD
     worksheet.set_column(1, 1, 40)  # Item
@@ -112,9 +129,10 @@ def gerar_checklist(lista_itens, nome_evento):
     return _finalizar_planilha(workbook, output)
 
 
-def gerar_lista_compras(itens_para_compra, nome_evento):
+@medir_funcao
+def gerar_lista_compras(itens_para_compra, nome_evento, arquivo=None):
     col_count = 4
-    output, workbook, worksheet, estilos = _setup_planilha('Lista Compras', nome_evento, col_count)
+    output, workbook, worksheet, estilos = _setup_planilha('Lista Compras', nome_evento, col_count, arquivo)
 
     worksheet.set_column(0, 0, 12)  # Quantidade
     worksheet.set_column(1, 1, 40)  # Item
@@ -145,9 +163,10 @@ def gerar_lista_compras(itens_para_compra, nome_evento):
     return _finalizar_planilha(workbook, output)
 
 
-def gerar_custo_evento(itens_consumidos, nome_evento):
+@medir_funcao
+def gerar_custo_evento(itens_consumidos, nome_evento, arquivo=None):
     col_count = 4
-    output, workbook, worksheet, estilos = _setup_planilha('Custo Evento', nome_evento, col_count)
+    output, workbook, worksheet, estilos = _setup_planilha('Custo Evento', nome_evento, col_count, arquivo)
 
     worksheet.set_column(0, 0, 12)  # Quantidade
     worksheet.set_column(1, 1, 40)  # Item
@@ -173,3 +192,102 @@ def gerar_custo_evento(itens_consumidos, nome_evento):
     worksheet.write(row, 3, custo_total, estilos['total_money'])
 
     return _finalizar_planilha(workbook, output)
+
+
+@medir_funcao
+def gerar_posicao_estoque(itens_em_estoque, titulo, arquivo=None):
+    col_count = 4
+    output, workbook, worksheet, estilos = _setup_planilha('Posição Estoque', titulo, col_count, arquivo)
+
+    worksheet.set_column(0, 0, 12)  # Quantidade
+    worksheet.set_column(1, 1, 40)  # Item
+    worksheet.set_column(2, 2, 15)  # Preço Médio
+    worksheet.set_column(3, 3, 15)  # Valor Total Item
+
+    headers = ['Quantidade', 'Item', 'Preço Médio', 'Valor Total Item']
+    worksheet.write_row(1, 0, headers, estilos['header'])
+
+    row = 2
+    valor_total = 0
+    for quantidade, item, preco_medio, valor_item in itens_em_estoque:
+        valor_total += valor_item
+
+        worksheet.write(row, 0, quantidade, estilos['qty'])
+        worksheet.write(row, 1, item, estilos['item'])
+        worksheet.write(row, 2, preco_medio, estilos['money'])
+        worksheet.write(row, 3, valor_item, estilos['money'])
+        row += 1
+
+    worksheet.merge_range(row, 0, row, 2, 'Valor Total em Estoque', estilos['total_label'])
+    worksheet.write(row, 3, valor_total, estilos['total_money'])
+
+    return _finalizar_planilha(workbook, output)
+
+
+@medir_funcao
+def gerar_analise_periodo(gastos_por_tipo, custos_eventos, itens_mais_consumidos, titulo, arquivo=None):
+    output, workbook, worksheet, estilos = _setup_planilha('Gastos por Tipo', titulo, 4, arquivo)
+
+    worksheet.set_column(0, 0, 12)  # Mês
+    worksheet.set_column(1, 1, 25)  # Tipo
+    worksheet.set_column(2, 2, 12)  # Quantidade
+    worksheet.set_column(3, 3, 15)  # Valor Total
+
+    headers = ['Mês', 'Tipo', 'Quantidade', 'Valor Total']
+    worksheet.write_row(1, 0, headers, estilos['header'])
+
+    row = 2
+    for mes, tipo, quantidade, valor_total in gastos_por_tipo:
+        worksheet.write(row, 0, mes.strftime('%m/%Y'), estilos['qty'])
+        worksheet.write(row, 1, tipo, estilos['item'])
+        worksheet.write(row, 2, quantidade, estilos['qty'])
+        worksheet.write(row, 3, valor_total, estilos['money'])
+        row += 1
+
+    worksheet = _adicionar_aba(workbook, estilos, 'Custo Eventos', titulo, 3)
+
+    worksheet.set_column(0, 0, 12)  # Mês
+    worksheet.set_column(1, 1, 12)  # Eventos
+    worksheet.set_column(2, 2, 15)  # Custo Eventos
+
+    headers = ['Mês', 'Eventos', 'Custo Eventos']
+    worksheet.write_row(1, 0, headers, estilos['header'])
+
+    row = 2
+    custo_total = 0
+    for mes, eventos, custo in custos_eventos:
+        custo_total += custo
+
+        worksheet.write(row, 0, mes.strftime('%m/%Y'), estilos['qty'])
+        worksheet.write(row, 1, eventos, estilos['qty'])
+        worksheet.write(row, 2, custo, estilos['money'])
+        row += 1
+
+    worksheet.merge_range(row, 0, row, 1, 'Custo Total', estilos['total_label'])
+    worksheet.write(row, 2, custo_total, estilos['total_money'])
+
+    worksheet = _adicionar_aba(workbook, estilos, 'Itens Mais Consumidos', titulo, 3)
+
+    worksheet.set_column(0, 0, 40)  # Item
+    worksheet.set_column(1, 1, 12)  # Quantidade
+    worksheet.set_column(2, 2, 15)  # Valor Consumido
+
+    headers = ['Item', 'Quantidade', 'Valor Consumido']
+    worksheet.write_row(1, 0, headers, estilos['header'])
+
+    row = 2
+    for item, quantidade, valor_consumido in itens_mais_consumidos:
+        worksheet.write(row, 0, item, estilos['item'])
+        worksheet.write(row, 1, quantidade, estilos['qty'])
+        worksheet.write(row, 2, valor_consumido, estilos['money'])
+        row += 1
+
+    return _finalizar_planilha(workbook, output)
+
+
+def gerar_planilhas_evento(titulo, lista_itens_checklist, itens_para_compra, itens_consumidos):
+    return (
+        gerar_checklist(lista_itens_checklist, titulo),
+        gerar_lista_compras(itens_para_compra, titulo),
+        gerar_custo_evento(itens_consumidos, titulo),
+    )
@@ -0,0 +1,289 @@
+import hashlib
+import multiprocessing
+import shutil
+import traceback
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from .cache_planilhas import obter_planilha_em_cache, gravar_planilha_em_cache
+from .models import Evento, SolicitacaoEvento, TransacaoEstoque, TarefaRelatorio
+from .planilhas import gerar_checklist, gerar_lista_compras, gerar_custo_evento, gerar_planilhas_evento
+
+TAMANHO_LOTE_CURSOR_PLANILHA = 2000
+
+TIPO_PACOTE_EVENTOS = 'pacote_eventos'
+
+
+def linhas_checklist(solicitacoes):
+    return solicitacoes.filter(
+        quantidade_alocada__gt=0
+    ).values_list(
+        'quantidade_alocada',
+        'item__nome'
+    )
+
+
+def linhas_lista_compras(solicitacoes):
+    return solicitacoes.filter(
+        quantidade_faltando__gt=0
+    ).annotate(
+        nome=models.F('item__nome'),
+        ultimo_preco_unidade_pago=models.F('item__ultima_compra__preco_unidade')
+    ).values_list(
+        'quantidade_faltando',
+        'nome',
+        'ultimo_preco_unidade_pago'
+    )
+
+
+def linhas_custo_evento(transacoes):
+    return transacoes.get_itens_consumidos_com_preco()
+
+
+def _versao_ultima_compra():
+    return TransacaoEstoque.objects.filter(
+        tipo=TransacaoEstoque.Tipo.COMPRA
+    ).order_by(
+        '-id'
+    ).values_list(
+        'id',
+        flat=True
+    ).first()
+
+
+RELATORIOS = {
+    'checklist': {
+        'modelo': SolicitacaoEvento,
+        'nome_arquivo': 'Checklist',
+        'gerar_planilha': gerar_checklist,
+        'obter_linhas': linhas_checklist,
+        'versoes_adicionais': (),
+    },
+    'lista_compras': {
+        'modelo': SolicitacaoEvento,
+        'nome_arquivo': 'Lista Compras',
+        'gerar_planilha': gerar_lista_compras,
+        'obter_linhas': linhas_lista_compras,
+        'versoes_adicionais': (_versao_ultima_compra,),
+    },
+    'custo_evento': {
+        'modelo': TransacaoEstoque,
+        'nome_arquivo': 'Custo Evento',
+        'gerar_planilha': gerar_custo_evento,
+        'obter_linhas': linhas_custo_evento,
+        'versoes_adicionais': (),
+    },
+}
+
+
+def chave_relatorio(tipo, evento, queryset):
+    ids_selecionados = ','.join(
+        str(id_selecionado) for id_selecionado in queryset.order_by('id').values_list('id', flat=True)
+    )
+    versoes_adicionais = [str(obter_versao()) for obter_versao in RELATORIOS[tipo]['versoes_adicionais']]
+
+    return ':'.join([
+        tipo,
+        str(evento.id),
+        str(evento.versao),
+        str(evento),
+        hashlib.sha256(ids_selecionados.encode()).hexdigest(),
+        *versoes_adicionais
+    ])
+
+
+def nome_arquivo_relatorio(tipo, evento):
+    return f'{RELATORIOS[tipo]['nome_arquivo']} {str(evento).replace('/', '-')}.xlsx'
+
+
+def obter_planilha_relatorio(tipo, evento, queryset):
+    chave = chave_relatorio(tipo, evento, queryset)
+
+    arquivo = obter_planilha_em_cache(chave)
+    if arquivo is not None:
+        return arquivo
+
+    relatorio = RELATORIOS[tipo]
+    linhas = relatorio['obter_linhas'](queryset).iterator(chunk_size=TAMANHO_LOTE_CURSOR_PLANILHA)
+
+    return gravar_planilha_em_cache(
+        chave,
+        lambda arquivo_destino: relatorio['gerar_planilha'](linhas, str(evento), arquivo_destino)
+    )
+
+
+def caminho_arquivo_tarefa(tarefa):
+    return Path(settings.RELATORIOS_DIR) / f'{tarefa.id}{Path(tarefa.nome_arquivo).suffix}'
+
+
+def enfileirar_relatorio(tipo, evento, queryset, solicitante, chave):
+    chave = hashlib.sha256(chave.encode()).hexdigest()
+
+    tarefa_existente = TarefaRelatorio.objects.filter(
+        chave=chave,
+        status__in=(TarefaRelatorio.Status.PENDENTE, TarefaRelatorio.Status.EXECUTANDO)
+    ).first()
+
+    if tarefa_existente is not None:
+        return tarefa_existente
+
+    return TarefaRelatorio.objects.create(
+        tipo=tipo,
+        chave=chave,
+        evento=evento,
+        ids_selecionados=list(queryset.order_by('id').values_list('id', flat=True)),
+        nome_arquivo=nome_arquivo_relatorio(tipo, evento),
+        solicitante=solicitante
+    )
+
+
+def enfileirar_pacote_eventos(eventos, solicitante):
+    versoes_eventos = list(eventos.order_by('id').values_list('id', 'versao'))
+    chave = hashlib.sha256(
+        f'{TIPO_PACOTE_EVENTOS}:{versoes_eventos}:{_versao_ultima_compra()}'.encode()
+    ).hexdigest()
+
+    tarefa_existente = TarefaRelatorio.objects.filter(
+        chave=chave,
+        status__in=(TarefaRelatorio.Status.PENDENTE, TarefaRelatorio.Status.EXECUTANDO)
+    ).first()
+
+    if tarefa_existente is not None:
+        return tarefa_existente
+
+    return TarefaRelatorio.objects.create(
+        tipo=TIPO_PACOTE_EVENTOS,
+        chave=chave,
+        ids_selecionados=[id_evento for id_evento, _ in versoes_eventos],
+        nome_arquivo=f'Planilhas {len(versoes_eventos)} eventos {timezone.localdate().strftime('%d-%m-%Y')}.zip',
+        solicitante=solicitante
+    )
+
+
+def _agrupar_por_evento(linhas):
+    linhas_por_evento = defaultdict(list)
+    for id_evento, *linha in linhas:
+        linhas_por_evento[id_evento].append(linha)
+
+    return linhas_por_evento
+
+
+def gerar_pacote_eventos(ids_eventos, caminho):
+    eventos = list(Evento.objects.filter(id__in=ids_eventos).order_by('data', 'nome'))
+    solicitacoes = SolicitacaoEvento.objects.filter(evento_id__in=ids_eventos).order_by('evento_id', 'id')
+
+    checklists = _agrupar_por_evento(
+        solicitacoes.filter(
+            quantidade_alocada__gt=0
+        ).values_list(
+            'evento_id',
+            'quantidade_alocada',
+            'item__nome'
+        )
+    )
+    listas_compras = _agrupar_por_evento(
+        linhas_lista_compras(solicitacoes).values_list(
+            'evento_id',
+            'quantidade_faltando',
+            'nome',
+            'ultimo_preco_unidade_pago'
+        )
+    )
+    custos = _agrupar_por_evento(
+        TransacaoEstoque.objects.filter(
+            evento_id__in=ids_eventos
+        ).get_itens_consumidos_com_preco_por_evento()
+    )
+
+    titulos = [str(evento) for evento in eventos]
+
+    with (
+        ProcessPoolExecutor(
+            max_workers=settings.RELATORIOS_PROCESSOS,
+            mp_context=multiprocessing.get_context('spawn')
+        ) as executor,
+        zipfile.ZipFile(caminho, 'w') as pacote
+    ):
+        planilhas_eventos = executor.map(
+            gerar_planilhas_evento,
+            titulos,
+            [checklists[evento.id] for evento in eventos],
+            [listas_compras[evento.id] for evento in eventos],
+            [custos[evento.id] for evento in eventos],
+        )
+
+        for titulo, planilhas in zip(titulos, planilhas_eventos):
+            titulo_arquivo = titulo.replace('/', '-')
+            for tipo, planilha in zip(('checklist', 'lista_compras', 'custo_evento'), planilhas):
+                pacote.writestr(f'{titulo_arquivo}/{RELATORIOS[tipo]['nome_arquivo']} {titulo_arquivo}.xlsx', planilha)
+
+
+def reenfileirar_tarefas_interrompidas():
+    return TarefaRelatorio.objects.filter(
+        status=TarefaRelatorio.Status.EXECUTANDO,
+        iniciado_em__lt=timezone.now() - timedelta(seconds=settings.RELATORIOS_TEMPO_MAXIMO)
+    ).update(
+        status=TarefaRelatorio.Status.PENDENTE,
+        iniciado_em=None
+    )
+
+
+def remover_tarefas_expiradas():
+    tarefas_expiradas = TarefaRelatorio.objects.filter(
+        status__in=(TarefaRelatorio.Status.CONCLUIDA, TarefaRelatorio.Status.ERRO),
+        criado_em__lt=timezone.now() - timedelta(days=settings.RELATORIOS_RETENCAO_DIAS)
+    )
+
+    for tarefa in tarefas_expiradas:
+        caminho_arquivo_tarefa(tarefa).unlink(missing_ok=True)
+
+    return tarefas_expiradas.delete()
+
+
+def processar_proxima_tarefa():
+    with transaction.atomic():
+        tarefa = TarefaRelatorio.objects.select_for_update(
+            skip_locked=True
+        ).filter(
+            status=TarefaRelatorio.Status.PENDENTE
+        ).order_by(
+            'id'
+        ).first()
+
+        if tarefa is None:
+            return None
+
+        tarefa.status = TarefaRelatorio.Status.EXECUTANDO
+        tarefa.iniciado_em = timezone.now()
+        tarefa.save(update_fields=('status', 'iniciado_em'))
+
+    try:
+        caminho = caminho_arquivo_tarefa(tarefa)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+
+        if tarefa.tipo == TIPO_PACOTE_EVENTOS:
+            gerar_pacote_eventos(tarefa.ids_selecionados, caminho)
+        else:
+            queryset = RELATORIOS[tarefa.tipo]['modelo'].objects.filter(id__in=tarefa.ids_selecionados)
+            with (
+                obter_planilha_relatorio(tarefa.tipo, tarefa.evento, queryset) as planilha,
+                open(caminho, 'wb') as destino
+            ):
+                shutil.copyfileobj(planilha, destino)
+    except Exception:
+        tarefa.status = TarefaRelatorio.Status.ERRO
+        tarefa.erro = traceback.format_exc()
+    else:
+        tarefa.status = TarefaRelatorio.Status.CONCLUIDA
+
+    tarefa.concluido_em = timezone.now()
+    tarefa.save(update_fields=('status', 'erro', 'concluido_em'))
+
+    return tarefa
@@ -1,16 +1,34 @@
-from django.core.exceptions import ValidationError
-from django.db import models, transaction
-from django.db.models.functions import Coalesce
-
-from .models import SolicitacaoEvento, TransacaoEstoque, Item, Evento
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
 
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, models, transaction
+from django.db.models.functions import Cast, Coalesce, Lower, TruncMonth
+from django.utils import timezone
+
+from .contencao import travar
+from .importacao import converter_decimal, converter_inteiro, normalizar_texto
+from .metricas import medir_funcao
+from .models import (
+    SolicitacaoEvento, TransacaoEstoque, Item, Evento, SumarioItemEvento, LoteAlocacao, PosicaoEstoque,
+    CompactacaoTransacoes, ResumoDiarioTransacoes, ResumoDiarioEvento, ResumoDiarioTransacoesPendente,
+    ResumoDiarioEventoPendente, TipoTransacao, registrar_transacoes, EXPR_QUANTIDADE_ESTOQUE, EXPR_VALOR_ESTOQUE
+)
+
+@medir_funcao
 def alocar_item_para_evento(id_item, quantidade_a_alocar, id_evento, responsavel):
     if quantidade_a_alocar <= 0:
         raise ValidationError({'quantidade': 'A Quantidade deve ser positva'})
 
     with transaction.atomic():
         try:
-            solicitacao = SolicitacaoEvento.objects.select_for_update().get(evento_id=id_evento, item_id=id_item)
+            solicitacao = travar(
+                'alocar_item_para_evento',
+                SolicitacaoEvento,
+                lambda: SolicitacaoEvento.objects.select_for_update().get(evento_id=id_evento, item_id=id_item)
+            )
         except SolicitacaoEvento.DoesNotExist:
             raise ValidationError('Não existe uma solicitação para o item no evento')
 
@@ -26,91 +44,158 @@ def alocar_item_para_evento(id_item, quantidade_a_alocar, id_evento, responsavel
         solicitacao.save()
 
 
+@medir_funcao
 def retornar_item_de_evento(id_item, quantidade_a_retornar, id_evento, responsavel):
     if not Evento.objects.filter(id=id_evento).exists():
         raise ValidationError({'id_evento': 'Não existe nenhum evento com o id informado'})
 
-    try:
-        item = Item.objects.select_for_update().get(id=id_item)
-    except Item.DoesNotExist:
-        raise ValidationError({'id_item': 'Não existe nenhum item com o id informado'})
-
-    agregados = TransacaoEstoque.objects.filter(
-        evento_id=id_evento,
-        item_id=id_item
-    ).aggregate(
-        quantidade_alocada=Coalesce(
-            models.Sum(
-                models.F('quantidade'),
-                filter=models.Q(tipo=TransacaoEstoque.Tipo.ALOCACAO_EVENTO)
-            ),
-            models.Value(0)
-        ),
-        quantidade_retornada=Coalesce(
-            models.Sum(
-                models.F('quantidade'),
-                filter=models.Q(tipo=TransacaoEstoque.Tipo.RETORNO_EVENTO)
-            ),
-            models.Value(0)
-        )
-    )
+    with transaction.atomic():
+        try:
+            item = travar(
+                'retornar_item_de_evento',
+                Item,
+                lambda: Item.objects.select_for_update(no_key=True).get(id=id_item)
+            )
+        except Item.DoesNotExist:
+            raise ValidationError({'id_item': 'Não existe nenhum item com o id informado'})
 
-    quantidade_disponivel_retorno = agregados['quantidade_alocada'] - agregados['quantidade_retornada']
+        quantidade_disponivel_retorno = SumarioItemEvento.objects.filter(
+            evento_id=id_evento,
+            item_id=id_item
+        ).values_list(
+            'quantidade_liquida',
+            flat=True
+        ).first() or 0
 
-    if quantidade_a_retornar > quantidade_disponivel_retorno:
-        raise ValidationError({
-            'quantidade_a_retornar': 'Não é possível retornar mais itens do que foram alocados. '
-                                     f'Quantidade disponível para retorno {quantidade_disponivel_retorno}'
-        })
+        if quantidade_a_retornar > quantidade_disponivel_retorno:
+            raise ValidationError({
+                'quantidade_a_retornar': 'Não é possível retornar mais itens do que foram alocados. '
+                                         f'Quantidade disponível para retorno {quantidade_disponivel_retorno}'
+            })
 
-    quantidade_retornada_anterior_total = agregados['quantidade_retornada']
+        _retornar_lotes_alocacao(id_evento, {id_item: item}, {id_item: quantidade_a_retornar}, responsavel)
 
-    alocacoes = TransacaoEstoque.objects.filter(
-        evento_id=id_evento,
-        item_id=id_item,
-        tipo=TransacaoEstoque.Tipo.ALOCACAO_EVENTO
-    ).order_by(
-        'timestamp'
-    ).values_list(
-        'quantidade',
-        'preco_unidade'
-    )
 
-    transacoes_criar = []
+@medir_funcao
+def retornar_itens_de_evento(id_evento, responsavel, quantidades=None):
+    if not Evento.objects.filter(id=id_evento).exists():
+        raise ValidationError({'id_evento': 'Não existe nenhum evento com o id informado'})
 
     with transaction.atomic():
-        for quantidade_alocada, preco_unidade in alocacoes:
-            quantidade_retornada_anterior_alocacao = min(quantidade_retornada_anterior_total, quantidade_alocada)
-            saldo_liquido = quantidade_alocada - quantidade_retornada_anterior_alocacao
-            quantidade_retornada_anterior_total -= quantidade_retornada_anterior_alocacao
+        sumarios_evento = SumarioItemEvento.objects.filter(
+            evento_id=id_evento,
+            quantidade_liquida__gt=0
+        )
 
-            if saldo_liquido <= 0:
-                continue
+        if quantidades is None:
+            ids_itens = list(sumarios_evento.values_list('item_id', flat=True))
+        else:
+            ids_itens = list(quantidades)
 
-            if quantidade_a_retornar <= 0:
-                break
+        itens = travar(
+            'retornar_itens_de_evento',
+            Item,
+            lambda: Item.objects.select_for_update(no_key=True).order_by('id').in_bulk(ids_itens)
+        )
 
-            quantidade_retornada_atual_alocacao = min(saldo_liquido, quantidade_a_retornar)
-            item.quantidade_em_estoque += quantidade_retornada_atual_alocacao
-            item.valor_total += quantidade_retornada_atual_alocacao * preco_unidade
+        quantidades_disponiveis_retorno = dict(
+            sumarios_evento.filter(
+                item_id__in=ids_itens
+            ).values_list(
+                'item_id',
+                'quantidade_liquida'
+            )
+        )
 
-            transacoes_criar.append(
-                TransacaoEstoque(
-                    item_id=id_item,
-                    tipo=TransacaoEstoque.Tipo.RETORNO_EVENTO,
-                    evento_id=id_evento,
-                    quantidade=quantidade_retornada_atual_alocacao,
-                    preco_unidade=preco_unidade,
-                    responsavel=responsavel
+        if quantidades is None:
+            quantidades = quantidades_disponiveis_retorno
+
+        erros = []
+        for id_item, quantidade_a_retornar in quantidades.items():
+            if id_item not in itens:
+                erros.append(f'Não existe nenhum item com o id {id_item}')
+                continue
+
+            quantidade_disponivel_retorno = quantidades_disponiveis_retorno.get(id_item, 0)
+            if not 0 < quantidade_a_retornar <= quantidade_disponivel_retorno:
+                erros.append(
+                    f'{itens[id_item]}: não é possível retornar {quantidade_a_retornar} itens. '
+                    f'Quantidade disponível para retorno {quantidade_disponivel_retorno}'
                 )
+
+        if erros:
+            raise ValidationError({'quantidades': erros})
+
+        return _retornar_lotes_alocacao(id_evento, itens, quantidades, responsavel)
+
+
+def _retornar_lotes_alocacao(id_evento, itens, quantidades, responsavel):
+    if not quantidades:
+        return []
+
+    lotes_consumidos = LoteAlocacao.objects.filter(
+        evento_id=id_evento,
+        item_id__in=quantidades
+    ).annotate(
+        quantidade_anterior=models.Window(
+            models.Sum('quantidade_restante'),
+            partition_by='item_id',
+            order_by='id'
+        ) - models.F('quantidade_restante'),
+        quantidade_a_retornar=models.Case(
+            *(
+                models.When(item_id=id_item, then=models.Value(quantidade_a_retornar))
+                for id_item, quantidade_a_retornar in quantidades.items()
+            ),
+            output_field=models.IntegerField()
+        )
+    ).filter(
+        quantidade_anterior__lt=models.F('quantidade_a_retornar')
+    ).order_by(
+        'item_id',
+        'id'
+    )
+
+    quantidades_restantes = dict(quantidades)
+    transacoes_criar = []
+    lotes_parciais = []
+    ids_lotes_consumidos = []
+
+    for lote in lotes_consumidos:
+        item = itens[lote.item_id]
+        quantidade_retornada_lote = min(lote.quantidade_restante, quantidades_restantes[lote.item_id])
+        item.quantidade_em_estoque += quantidade_retornada_lote
+        item.valor_total += quantidade_retornada_lote * lote.preco_unidade
+
+        transacoes_criar.append(
+            TransacaoEstoque(
+                item_id=lote.item_id,
+                tipo=TransacaoEstoque.Tipo.RETORNO_EVENTO,
+                evento_id=id_evento,
+                quantidade=quantidade_retornada_lote,
+                preco_unidade=lote.preco_unidade,
+                responsavel=responsavel
             )
+        )
 
-            quantidade_a_retornar -= quantidade_retornada_atual_alocacao
+        if quantidade_retornada_lote == lote.quantidade_restante:
+            ids_lotes_consumidos.append(lote.id)
+        else:
+            lote.quantidade_restante -= quantidade_retornada_lote
+            lotes_parciais.append(lote)
 
-        TransacaoEstoque.objects.bulk_create(transacoes_criar)
-        item.save(update_fields=('quantidade_em_estoque', 'valor_total'))
+        quantidades_restantes[lote.item_id] -= quantidade_retornada_lote
+
+    LoteAlocacao.objects.filter(id__in=ids_lotes_consumidos).delete()
+    LoteAlocacao.objects.bulk_update(lotes_parciais, ['quantidade_restante'])
+    TransacaoEstoque.objects.bulk_create(transacoes_criar)
+    registrar_transacoes(transacoes_criar)
+    Item.objects.bulk_update(itens.values(), ['quantidade_em_estoque', 'valor_total'])
+
+    return transacoes_criar
 
 
+@medir_funcao
 def alocar_quantidade_disponivel_estoque_solicitacoes(solicitacoes, user):
     transacoes_para_criar = []
     solicitacoes_para_atualizar = []
@@ -120,27 +205,44 @@ def alocar_quantidade_disponivel_estoque_solicitacoes(solicitacoes, user):
     ids_itens_para_travar = solicitacoes_para_processar.values('item_id')
 
     with transaction.atomic():
-        items_map = {
-            item.id: item for item in
-            Item.objects.select_for_update().filter(id__in=ids_itens_para_travar, quantidade_em_estoque__gt=0)
-        }
+        ids_itens_fracionados = list(
+            Item.objects.filter(
+                id__in=ids_itens_para_travar,
+                quantidade_fracoes__gt=0
+            ).values_list(
+                'id',
+                flat=True
+            )
+        )
+        Item.objects.consolidar_fracoes(ids_itens_fracionados)
+
+        items_map = travar(
+            'alocar_quantidade_disponivel_estoque_solicitacoes',
+            Item,
+            lambda: {
+                item.id: item for item in
+                Item.objects.select_for_update(no_key=True).filter(id__in=ids_itens_para_travar, quantidade_em_estoque__gt=0)
+            }
+        )
 
         for solicitacao in solicitacoes_para_processar:
-            item = items_map.get(solicitacao.item.id)
+            item = items_map.get(solicitacao.item_id)
 
             if not item:
                 continue
 
             quantidade_a_alocar = min(item.quantidade_em_estoque, solicitacao.quantidade_faltando)
 
+            if quantidade_a_alocar <= 0:
+                continue
+
             item.quantidade_em_estoque -= quantidade_a_alocar
             item.valor_total -= quantidade_a_alocar * item.preco_medio
 
-
             transacoes_para_criar.append(
                 TransacaoEstoque(
                     tipo=TransacaoEstoque.Tipo.ALOCACAO_EVENTO,
-                    evento=solicitacao.evento,
+                    evento_id=solicitacao.evento_id,
                     item=item,
                     quantidade=quantidade_a_alocar,
                     responsavel=user,
@@ -165,3 +267,730 @@ def alocar_quantidade_disponivel_estoque_solicitacoes(solicitacoes, user):
 
         if transacoes_para_criar:
             TransacaoEstoque.objects.bulk_create(transacoes_para_criar)
+            registrar_transacoes(transacoes_para_criar)
+
+        for id_item in ids_itens_fracionados:
+            Item.objects.distribuir_fracoes(id_item)
+
+
+class PrioridadeAlocacao(models.TextChoices):
+    DATA_EVENTO = 'data_evento', 'Data do Evento'
+    SOLICITACAO = 'solicitacao', 'Ordem de Solicitação'
+
+
+ORDENACAO_PRIORIDADE_ALOCACAO = {
+    PrioridadeAlocacao.DATA_EVENTO: 'evento.data, solicitacao.id',
+    PrioridadeAlocacao.SOLICITACAO: 'solicitacao.id',
+}
+
+
+@medir_funcao
+def alocar_quantidade_disponivel_estoque_solicitacoes_sql(solicitacoes, user, prioridade=PrioridadeAlocacao.SOLICITACAO):
+    if prioridade not in ORDENACAO_PRIORIDADE_ALOCACAO:
+        raise ValidationError(
+            f'Prioridade de alocação "{prioridade}" inválida. Use uma de: {', '.join(PrioridadeAlocacao.values)}'
+        )
+
+    ordenacao = ORDENACAO_PRIORIDADE_ALOCACAO[prioridade]
+    timestamp = timezone.now()
+
+    with transaction.atomic():
+        solicitacoes_travadas = travar(
+            'alocar_quantidade_disponivel_estoque_solicitacoes_sql',
+            SolicitacaoEvento,
+            lambda: list(
+                solicitacoes.filter(
+                    quantidade_faltando__gt=0
+                ).select_for_update(
+                    of=('self',)
+                ).order_by(
+                    'id'
+                ).values_list(
+                    'id',
+                    'item_id'
+                )
+            )
+        )
+
+        if not solicitacoes_travadas:
+            return []
+
+        ids_solicitacoes = [id_solicitacao for id_solicitacao, _ in solicitacoes_travadas]
+        ids_itens = {id_item for _, id_item in solicitacoes_travadas}
+
+        ids_itens_fracionados = [
+            id_item for id_item, quantidade_fracoes in travar(
+                'alocar_quantidade_disponivel_estoque_solicitacoes_sql',
+                Item,
+                lambda: list(
+                    Item.objects.select_for_update(no_key=True).filter(
+                        id__in=ids_itens
+                    ).order_by(
+                        'id'
+                    ).values_list(
+                        'id',
+                        'quantidade_fracoes'
+                    )
+                )
+            )
+            if quantidade_fracoes
+        ]
+        Item.objects.consolidar_fracoes(ids_itens_fracionados)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'''
+                WITH alocacoes AS (
+                    SELECT
+                        solicitacao.id AS id_solicitacao,
+                        solicitacao.evento_id,
+                        solicitacao.item_id,
+                        item.preco_medio,
+                        LEAST(
+                            solicitacao.quantidade_faltando,
+                            item.quantidade_em_estoque - (
+                                SUM(solicitacao.quantidade_faltando) OVER (
+                                    PARTITION BY solicitacao.item_id ORDER BY {ordenacao}
+                                ) - solicitacao.quantidade_faltando
+                            )
+                        ) AS quantidade
+                    FROM {SolicitacaoEvento._meta.db_table} solicitacao
+                    JOIN {Item._meta.db_table} item ON item.id = solicitacao.item_id
+                    JOIN {Evento._meta.db_table} evento ON evento.id = solicitacao.evento_id
+                    WHERE solicitacao.id = ANY(%(ids_solicitacoes)s) AND item.quantidade_em_estoque > 0
+                ),
+                alocacoes_efetivas AS (
+                    SELECT * FROM alocacoes WHERE quantidade > 0
+                ),
+                itens_atualizados AS (
+                    UPDATE {Item._meta.db_table} item
+                    SET
+                        quantidade_em_estoque = item.quantidade_em_estoque - total.quantidade,
+                        valor_total = item.valor_total - total.quantidade * total.preco_medio
+                    FROM (
+                        SELECT item_id, preco_medio, SUM(quantidade) AS quantidade
+                        FROM alocacoes_efetivas
+                        GROUP BY item_id, preco_medio
+                    ) total
+                    WHERE item.id = total.item_id
+                ),
+                solicitacoes_atualizadas AS (
+                    UPDATE {SolicitacaoEvento._meta.db_table} solicitacao
+                    SET quantidade_alocada = solicitacao.quantidade_alocada + alocacao.quantidade
+                    FROM alocacoes_efetivas alocacao
+                    WHERE solicitacao.id = alocacao.id_solicitacao
+                )
+                INSERT INTO {TransacaoEstoque._meta.db_table} (
+                    item_id, tipo, timestamp, quantidade, preco_unidade, evento_id, responsavel_id
+                )
+                SELECT item_id, %(tipo)s, %(timestamp)s, quantidade, preco_medio, evento_id, %(id_responsavel)s
+                FROM alocacoes_efetivas
+                ORDER BY id_solicitacao
+                RETURNING id, item_id, evento_id, quantidade, preco_unidade
+                ''',
+                {
+                    'ids_solicitacoes': ids_solicitacoes,
+                    'tipo': TransacaoEstoque.Tipo.ALOCACAO_EVENTO,
+                    'timestamp': timestamp,
+                    'id_responsavel': user.pk,
+                }
+            )
+
+            transacoes_criadas = [
+                TransacaoEstoque(
+                    id=id_transacao,
+                    item_id=id_item,
+                    evento_id=id_evento,
+                    tipo=TransacaoEstoque.Tipo.ALOCACAO_EVENTO,
+                    timestamp=timestamp,
+                    quantidade=quantidade,
+                    preco_unidade=preco_unidade,
+                    responsavel=user
+                )
+                for id_transacao, id_item, id_evento, quantidade, preco_unidade in cursor.fetchall()
+            ]
+
+        registrar_transacoes(transacoes_criadas)
+
+        for id_item in ids_itens_fracionados:
+            Item.objects.distribuir_fracoes(id_item)
+
+    return transacoes_criadas
+
+
+@medir_funcao
+def distribuir_estoque_entre_eventos(user, solicitacoes=None, prioridade=None):
+    if solicitacoes is None:
+        solicitacoes = SolicitacaoEvento.objects.filter(evento__status=Evento.Status.EM_ANDAMENTO)
+
+    if prioridade is None:
+        prioridade = settings.ALOCACAO_PRIORIDADE
+
+    ids_solicitacoes = list(solicitacoes.values_list('id', flat=True))
+
+    with transaction.atomic():
+        alocar_quantidade_disponivel_estoque_solicitacoes_sql(
+            SolicitacaoEvento.objects.filter(id__in=ids_solicitacoes),
+            user,
+            prioridade
+        )
+
+        return list(
+            Evento.objects.filter(
+                solicitacoes__id__in=ids_solicitacoes
+            ).annotate(
+                quantidade_solicitada=models.Sum('solicitacoes__quantidade_solicitada'),
+                quantidade_alocada=models.Sum('solicitacoes__quantidade_alocada')
+            ).order_by(
+                'data',
+                'nome'
+            )
+        )
+
+
+
+TIPOS_IMPORTACAO_ENTRADA = (
+    TransacaoEstoque.Tipo.COMPRA,
+    TransacaoEstoque.Tipo.ADICAO_MANUAL,
+    TransacaoEstoque.Tipo.PATROCINIO,
+)
+TIPOS_IMPORTACAO_SAIDA = (
+    TransacaoEstoque.Tipo.REMOCAO_MANUAL,
+    TransacaoEstoque.Tipo.CONSUMO_INTERNO,
+)
+COLUNAS_IMPORTACAO_TRANSACOES = ('item', 'quantidade')
+
+_TIPOS_IMPORTACAO_POR_NOME = {
+    normalizar_texto(nome): tipo
+    for tipo in (*TIPOS_IMPORTACAO_ENTRADA, *TIPOS_IMPORTACAO_SAIDA)
+    for nome in (tipo.value, tipo.label)
+}
+
+
+def _ler_linha_importacao(linha):
+    erros = []
+
+    nome_tipo = linha.get('tipo') or TransacaoEstoque.Tipo.COMPRA
+    tipo = _TIPOS_IMPORTACAO_POR_NOME.get(normalizar_texto(nome_tipo))
+    if tipo is None:
+        erros.append(f'tipo "{nome_tipo}" inválido ou não permitido na importação')
+
+    quantidade = None
+    try:
+        quantidade = converter_inteiro(linha.get('quantidade'))
+        if quantidade <= 0:
+            erros.append('a quantidade deve ser positiva')
+    except ValueError:
+        erros.append(f'quantidade "{linha.get('quantidade')}" inválida')
+
+    preco_unidade = None
+    if linha.get('preco_unidade') not in (None, ''):
+        try:
+            preco_unidade = converter_decimal(linha['preco_unidade'])
+            if preco_unidade < 0:
+                erros.append('o preço unidade não pode ser negativo')
+        except ValueError:
+            erros.append(f'preço unidade "{linha['preco_unidade']}" inválido')
+
+    if tipo in (TransacaoEstoque.Tipo.COMPRA, TransacaoEstoque.Tipo.ADICAO_MANUAL) and not preco_unidade:
+        erros.append('é necessário informar um valor para compras e adições manuais')
+
+    if tipo == TransacaoEstoque.Tipo.PATROCINIO:
+        preco_unidade = Decimal(0)
+
+    return tipo, quantidade, preco_unidade, linha.get('nota') or None, erros
+
+
+def _erro_importacao(erros):
+    return ValidationError([f'Linha {numero_linha}: {erro}' for numero_linha, erro in sorted(erros)])
+
+
+def _ids_itens_por_nome(linhas_lidas, erros):
+    ids_itens_por_nome = {}
+    for id_item, nome in Item.objects.annotate(
+        nome_minusculo=Lower('nome')
+    ).filter(
+        nome_minusculo__in={nome_item.lower() for _, nome_item, *_ in linhas_lidas}
+    ).values_list(
+        'id',
+        'nome_minusculo'
+    ):
+        ids_itens_por_nome.setdefault(nome, []).append(id_item)
+
+    for numero_linha, nome_item, *_ in linhas_lidas:
+        ids_itens = ids_itens_por_nome.get(nome_item.lower(), [])
+        if nome_item and not ids_itens:
+            erros.append((numero_linha, f'não existe nenhum item com o nome "{nome_item}"'))
+        elif len(ids_itens) > 1:
+            erros.append((numero_linha, f'existe mais de um item com o nome "{nome_item}"'))
+
+    return {nome: ids_itens[0] for nome, ids_itens in ids_itens_por_nome.items() if len(ids_itens) == 1}
+
+
+@medir_funcao
+def importar_transacoes_estoque(linhas, responsavel):
+    linhas_lidas = []
+    erros = []
+
+    for numero_linha, linha in linhas:
+        nome_item = str(linha.get('item') or '').strip()
+        tipo, quantidade, preco_unidade, nota, erros_linha = _ler_linha_importacao(linha)
+        if not nome_item:
+            erros_linha.insert(0, 'o item não foi informado')
+
+        erros.extend((numero_linha, erro) for erro in erros_linha)
+        linhas_lidas.append((numero_linha, nome_item, tipo, quantidade, preco_unidade, nota))
+
+    if not linhas_lidas:
+        raise ValidationError('A planilha não possui nenhuma transação')
+
+    ids_itens_por_nome = _ids_itens_por_nome(linhas_lidas, erros)
+    if erros:
+        raise _erro_importacao(erros)
+
+    ids_itens = sorted(set(ids_itens_por_nome.values()))
+
+    with transaction.atomic():
+        ids_itens_fracionados = [
+            id_item for id_item, quantidade_fracoes in travar(
+                'importar_transacoes_estoque',
+                Item,
+                lambda: list(
+                    Item.objects.select_for_update(no_key=True).filter(
+                        id__in=ids_itens
+                    ).order_by(
+                        'id'
+                    ).values_list(
+                        'id',
+                        'quantidade_fracoes'
+                    )
+                )
+            )
+            if quantidade_fracoes
+        ]
+        Item.objects.consolidar_fracoes(ids_itens_fracionados)
+
+        itens = Item.objects.in_bulk(ids_itens)
+        transacoes_criar = []
+
+        for numero_linha, nome_item, tipo, quantidade, preco_unidade, nota in linhas_lidas:
+            item = itens[ids_itens_por_nome[nome_item.lower()]]
+
+            if tipo in TIPOS_IMPORTACAO_SAIDA:
+                if item.quantidade_em_estoque < quantidade:
+                    erros.append(
+                        (numero_linha, f'estoque insuficiente de {item}. Disponível: {item.quantidade_em_estoque}')
+                    )
+                    continue
+
+                if tipo != TransacaoEstoque.Tipo.REMOCAO_MANUAL or not preco_unidade:
+                    preco_unidade = item.preco_medio
+                if item.valor_total < quantidade * preco_unidade:
+                    erros.append(
+                        (numero_linha, f'o valor em estoque de {item} ({item.valor_total}) é menor que o da saída')
+                    )
+                    continue
+
+                item.quantidade_em_estoque -= quantidade
+                item.valor_total -= quantidade * preco_unidade
+            else:
+                item.quantidade_em_estoque += quantidade
+                item.valor_total += quantidade * preco_unidade
+
+            item.preco_medio = (
+                (item.valor_total / item.quantidade_em_estoque).quantize(Decimal('0.0001'), ROUND_HALF_UP)
+                if item.quantidade_em_estoque else Decimal(0)
+            )
+
+            transacoes_criar.append(
+                TransacaoEstoque(
+                    item=item,
+                    tipo=tipo,
+                    quantidade=quantidade,
+                    preco_unidade=preco_unidade,
+                    nota=nota,
+                    responsavel=responsavel
+                )
+            )
+
+        if erros:
+            raise _erro_importacao(erros)
+
+        TransacaoEstoque.objects.bulk_create(transacoes_criar)
+        registrar_transacoes(transacoes_criar)
+        Item.objects.bulk_update(itens.values(), ['quantidade_em_estoque', 'valor_total'])
+
+        for id_item in ids_itens_fracionados:
+            Item.objects.distribuir_fracoes(id_item)
+
+    return transacoes_criar
+
+
+COLUNAS_IMPORTACAO_SOLICITACOES = ('item', 'quantidade')
+
+
+@medir_funcao
+def importar_solicitacoes_evento(id_evento, linhas):
+    if not Evento.objects.filter(id=id_evento, status=Evento.Status.EM_ANDAMENTO).exists():
+        raise ValidationError('Só é possível importar solicitações para eventos em andamento')
+
+    linhas_lidas = []
+    erros = []
+
+    for numero_linha, linha in linhas:
+        nome_item = str(linha.get('item') or '').strip()
+        if not nome_item:
+            erros.append((numero_linha, 'o item não foi informado'))
+
+        quantidade = None
+        try:
+            quantidade = converter_inteiro(linha.get('quantidade'))
+            if quantidade <= 0:
+                erros.append((numero_linha, 'a quantidade deve ser positiva'))
+        except ValueError:
+            erros.append((numero_linha, f'quantidade "{linha.get('quantidade')}" inválida'))
+
+        linhas_lidas.append((numero_linha, nome_item, quantidade))
+
+    if not linhas_lidas:
+        raise ValidationError('A planilha não possui nenhuma solicitação')
+
+    ids_itens_por_nome = _ids_itens_por_nome(linhas_lidas, erros)
+    if erros:
+        raise _erro_importacao(erros)
+
+    quantidades = defaultdict(int)
+    linhas_por_item = defaultdict(list)
+    for numero_linha, nome_item, quantidade in linhas_lidas:
+        id_item = ids_itens_por_nome[nome_item.lower()]
+        quantidades[id_item] += quantidade
+        linhas_por_item[id_item].append(numero_linha)
+
+    ids_itens = sorted(quantidades)
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'''
+                INSERT INTO {SolicitacaoEvento._meta.db_table} AS solicitacao (
+                    evento_id, item_id, quantidade_solicitada, quantidade_alocada
+                )
+                SELECT %(id_evento)s, linha.item_id, linha.quantidade, 0
+                FROM unnest(%(ids_itens)s::bigint[], %(quantidades)s::integer[]) AS linha(item_id, quantidade)
+                ORDER BY linha.item_id
+                ON CONFLICT (evento_id, item_id) DO UPDATE
+                SET quantidade_solicitada = EXCLUDED.quantidade_solicitada
+                WHERE solicitacao.quantidade_alocada <= EXCLUDED.quantidade_solicitada
+                RETURNING solicitacao.item_id, solicitacao.xmax = 0
+                ''',
+                {
+                    'id_evento': id_evento,
+                    'ids_itens': ids_itens,
+                    'quantidades': [quantidades[id_item] for id_item in ids_itens],
+                }
+            )
+            inseridas = dict(cursor.fetchall())
+
+        ids_itens_recusados = set(ids_itens) - set(inseridas)
+        if ids_itens_recusados:
+            for id_item, nome_item, quantidade_alocada in SolicitacaoEvento.objects.filter(
+                evento_id=id_evento,
+                item_id__in=ids_itens_recusados
+            ).values_list(
+                'item_id',
+                'item__nome',
+                'quantidade_alocada'
+            ):
+                erros.extend(
+                    (
+                        numero_linha,
+                        f'já foram alocados {quantidade_alocada} {nome_item}(s). Não é possível mudar a quantidade '
+                        f'solicitada para {quantidades[id_item]}'
+                    )
+                    for numero_linha in linhas_por_item[id_item]
+                )
+
+            raise _erro_importacao(erros)
+
+        Evento.objects.filter(id=id_evento).update(versao=models.F('versao') + 1)
+
+    quantidade_criadas = sum(1 for inserida in inseridas.values() if inserida)
+    return quantidade_criadas, len(inseridas) - quantidade_criadas
+
+
+@medir_funcao
+def copiar_solicitacoes_evento(id_evento_origem, id_evento_destino, fator=1):
+    if fator <= 0:
+        raise ValidationError({'fator': 'O fator deve ser positivo'})
+
+    if id_evento_origem == id_evento_destino:
+        raise ValidationError('O evento de origem deve ser diferente do evento de destino')
+
+    if not Evento.objects.filter(id=id_evento_destino, status=Evento.Status.EM_ANDAMENTO).exists():
+        raise ValidationError('Só é possível copiar solicitações para eventos em andamento')
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'''
+                INSERT INTO {SolicitacaoEvento._meta.db_table} (
+                    evento_id, item_id, quantidade_solicitada, quantidade_alocada
+                )
+                SELECT %(id_evento_destino)s, item_id, GREATEST(CEIL(quantidade_solicitada * %(fator)s::numeric), 1), 0
+                FROM {SolicitacaoEvento._meta.db_table}
+                WHERE evento_id = %(id_evento_origem)s
+                ORDER BY item_id
+                ON CONFLICT (evento_id, item_id) DO NOTHING
+                ''',
+                {'id_evento_origem': id_evento_origem, 'id_evento_destino': id_evento_destino, 'fator': fator}
+            )
+            quantidade_copiadas = cursor.rowcount
+
+        if quantidade_copiadas:
+            Evento.objects.filter(id=id_evento_destino).update(versao=models.F('versao') + 1)
+
+    return quantidade_copiadas
+
+
+def momento_fechamento(data):
+    return timezone.make_aware(datetime.combine(data + timedelta(days=1), time.min))
+
+
+def _variacao_estoque(inicio, fim):
+    transacoes = TransacaoEstoque.objects.filter(
+        item_id=models.OuterRef('id'),
+        timestamp__gte=inicio,
+        timestamp__lt=fim
+    ).order_by(
+    ).values(
+        'item_id'
+    )
+
+    return (
+        Coalesce(models.Subquery(transacoes.annotate(total=EXPR_QUANTIDADE_ESTOQUE).values('total')), 0),
+        Coalesce(models.Subquery(transacoes.annotate(total=EXPR_VALOR_ESTOQUE).values('total')), Decimal(0))
+    )
+
+
+def _corte_compactacao_ativa():
+    return CompactacaoTransacoes.objects.filter(
+        restaurado_em__isnull=True
+    ).aggregate(
+        corte=models.Max('corte')
+    )['corte']
+
+
+def _base_posicao_estoque(data):
+    momento = momento_fechamento(data)
+    corte = _corte_compactacao_ativa()
+
+    posicoes = PosicaoEstoque.objects.all()
+    if corte is not None:
+        if momento < corte:
+            if posicoes.filter(data=data).exists():
+                return data
+            raise ValidationError(
+                f'As transações anteriores a {timezone.localdate(corte):%d/%m/%Y} foram compactadas e não há posição '
+                f'registrada em {data:%d/%m/%Y}'
+            )
+        posicoes = posicoes.filter(data__gte=timezone.localdate(corte) - timedelta(days=1))
+
+    datas_base = posicoes.aggregate(
+        anterior=models.Max('data', filter=models.Q(data__lte=data)),
+        posterior=models.Min('data', filter=models.Q(data__gt=data))
+    )
+
+    candidatas = [(abs(timezone.now() - momento), None)]
+    for data_base in datas_base.values():
+        if data_base is not None:
+            candidatas.append((abs(momento_fechamento(data_base) - momento), data_base))
+
+    return min(candidatas, key=lambda candidata: candidata[0])[1]
+
+
+def posicao_estoque_em(data):
+    if data > timezone.localdate():
+        raise ValidationError('Não é possível consultar a posição de estoque de uma data futura')
+
+    momento = momento_fechamento(data)
+    data_base = _base_posicao_estoque(data)
+
+    if data_base is None:
+        quantidade_variacao, valor_variacao = _variacao_estoque(momento, timezone.now() + timedelta(days=1))
+        itens = Item.objects.com_estoque_total().annotate(
+            quantidade_na_data=models.F('quantidade_total_em_estoque') - quantidade_variacao,
+            valor_na_data=models.F('valor_total_em_estoque') - valor_variacao
+        )
+    else:
+        posicao = PosicaoEstoque.objects.filter(data=data_base, item_id=models.OuterRef('id'))
+        quantidade_base = Coalesce(models.Subquery(posicao.values('quantidade')), 0)
+        valor_base = Coalesce(models.Subquery(posicao.values('valor_total')), Decimal(0))
+
+        momento_base = momento_fechamento(data_base)
+        if momento_base <= momento:
+            quantidade_variacao, valor_variacao = _variacao_estoque(momento_base, momento)
+        else:
+            quantidade_variacao, valor_variacao = _variacao_estoque(momento, momento_base)
+            quantidade_variacao, valor_variacao = -quantidade_variacao, -valor_variacao
+
+        itens = Item.objects.annotate(
+            quantidade_na_data=quantidade_base + quantidade_variacao,
+            valor_na_data=valor_base + valor_variacao
+        )
+
+    linhas = itens.filter(
+        ~models.Q(quantidade_na_data=0) | ~models.Q(valor_na_data=0)
+    ).annotate(
+        preco_medio_na_data=models.Case(
+            models.When(quantidade_na_data=0, then=models.Value(Decimal(0))),
+            default=Cast(
+                models.F('valor_na_data') / models.F('quantidade_na_data'),
+                models.DecimalField(max_digits=10, decimal_places=4)
+            ),
+            output_field=models.DecimalField(max_digits=10, decimal_places=4)
+        )
+    ).order_by(
+        'nome',
+        'id'
+    ).values_list(
+        'id',
+        'nome',
+        'quantidade_na_data',
+        'preco_medio_na_data',
+        'valor_na_data',
+        named=True
+    )
+
+    return list(linhas), data_base
+
+
+@medir_funcao
+def registrar_posicao_estoque(data):
+    if data >= timezone.localdate():
+        raise ValidationError('Só é possível registrar a posição de estoque de dias já encerrados')
+
+    with transaction.atomic():
+        PosicaoEstoque.objects.filter(data=data).delete()
+        linhas, _ = posicao_estoque_em(data)
+        PosicaoEstoque.objects.bulk_create(
+            [
+                PosicaoEstoque(
+                    data=data,
+                    item_id=linha.id,
+                    quantidade=linha.quantidade_na_data,
+                    valor_total=linha.valor_na_data
+                )
+                for linha in linhas
+            ],
+            batch_size=1000
+        )
+
+    return len(linhas)
+
+
+ITENS_MAIS_CONSUMIDOS = 20
+
+
+@medir_funcao
+def consolidar_resumos_pendentes():
+    with transaction.atomic():
+        ResumoDiarioTransacoes.objects.consolidar_pendentes()
+        ResumoDiarioEvento.objects.consolidar_pendentes()
+
+
+@medir_funcao
+def reconstruir_resumos_transacoes(desde=None):
+    corte = _corte_compactacao_ativa()
+    if corte is not None and (desde is None or desde < timezone.localdate(corte)):
+        desde = timezone.localdate(corte)
+
+    modelos = (ResumoDiarioTransacoes, ResumoDiarioEvento)
+    tabelas = [
+        modelo._meta.db_table
+        for modelo in (ResumoDiarioTransacoesPendente, ResumoDiarioEventoPendente, *modelos)
+    ]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {', '.join(tabelas)} IN EXCLUSIVE MODE')
+
+        for modelo in modelos:
+            modelo.objects.consolidar_pendentes()
+            resumos = modelo.objects.all()
+            if desde is not None:
+                resumos = resumos.filter(dia__gte=desde)
+            resumos.delete()
+            modelo.objects.preencher(None if desde is None else momento_fechamento(desde - timedelta(days=1)))
+
+    return desde
+
+
+def analise_periodo(inicio, fim):
+    consolidar_resumos_pendentes()
+
+    resumos = ResumoDiarioTransacoes.objects.filter(dia__range=(inicio, fim))
+
+    gastos_por_tipo = [
+        (mes, TipoTransacao(tipo).label, quantidade, valor_total)
+        for mes, tipo, quantidade, valor_total in resumos.annotate(
+            mes=TruncMonth('dia')
+        ).values(
+            'mes',
+            'tipo'
+        ).annotate(
+            quantidade_total=models.Sum('quantidade'),
+            valor=models.Sum('valor_total')
+        ).order_by(
+            'mes',
+            'tipo'
+        ).values_list(
+            'mes',
+            'tipo',
+            'quantidade_total',
+            'valor'
+        )
+    ]
+
+    custos_eventos = ResumoDiarioEvento.objects.filter(
+        dia__range=(inicio, fim)
+    ).annotate(
+        mes=TruncMonth('dia')
+    ).values(
+        'mes'
+    ).annotate(
+        eventos=models.Count('evento_id', distinct=True),
+        custo=models.Sum('custo_liquido')
+    ).order_by(
+        'mes'
+    ).values_list(
+        'mes',
+        'eventos',
+        'custo'
+    )
+
+    def consumo(campo):
+        return models.Sum(
+            models.Case(
+                models.When(tipo=TipoTransacao.RETORNO_EVENTO, then=-models.F(campo)),
+                default=models.F(campo)
+            )
+        )
+
+    itens_mais_consumidos = resumos.filter(
+        tipo__in=(TipoTransacao.ALOCACAO_EVENTO, TipoTransacao.RETORNO_EVENTO, TipoTransacao.CONSUMO_INTERNO)
+    ).values(
+        'item__nome'
+    ).annotate(
+        quantidade_consumida=consumo('quantidade'),
+        valor_consumido=consumo('valor_total')
+    ).filter(
+        quantidade_consumida__gt=0
+    ).order_by(
+        '-valor_consumido',
+        '-quantidade_consumida',
+        'item__nome'
+    ).values_list(
+        'item__nome',
+        'quantidade_consumida',
+        'valor_consumido'
+    )[:ITENS_MAIS_CONSUMIDOS]
+
+    return gastos_por_tipo, list(custos_eventos), list(itens_mais_consumidos)
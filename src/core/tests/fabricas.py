@@ -0,0 +1,104 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+
+from core.models import (
+    Evento, Item, SolicitacaoEvento, SumarioItemEvento, TransacaoEstoque, EXPR_CUSTO_LIQUIDO, EXPR_QUANTIDADE_ESTOQUE,
+    EXPR_QUANTIDADE_LIQUIDA, EXPR_VALOR_ESTOQUE
+)
+
+ARMAZENAMENTO_SEM_MANIFESTO = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+def criar_usuario(username='estoquista'):
+    return get_user_model().objects.create_user(username)
+
+
+def criar_item(nome, quantidade_fracoes=0):
+    return Item.objects.create(nome=nome, quantidade_fracoes=quantidade_fracoes)
+
+
+def criar_evento(nome, data=date(2026, 1, 10)):
+    return Evento.objects.create(nome=nome, data=data)
+
+
+def solicitar(evento, item, quantidade_solicitada):
+    return SolicitacaoEvento.objects.create(evento=evento, item=item, quantidade_solicitada=quantidade_solicitada)
+
+
+def registrar(item, tipo, quantidade, preco_unidade=None, evento=None, responsavel=None):
+    transacao = TransacaoEstoque(
+        item=item,
+        tipo=tipo,
+        quantidade=quantidade,
+        preco_unidade=preco_unidade,
+        evento=evento,
+        responsavel=responsavel
+    )
+    transacao.save()
+    return transacao
+
+
+def comprar(item, quantidade, preco_unidade):
+    return registrar(item, TransacaoEstoque.Tipo.COMPRA, quantidade, Decimal(preco_unidade))
+
+
+def estoque_total(item):
+    return Item.objects.com_estoque_total().values_list(
+        'quantidade_total_em_estoque',
+        'valor_total_em_estoque'
+    ).get(
+        pk=item.pk
+    )
+
+
+def estoque_pelo_historico(item):
+    quantidade, valor = TransacaoEstoque.objects.filter(
+        item=item
+    ).values(
+        'item_id'
+    ).annotate(
+        quantidade=EXPR_QUANTIDADE_ESTOQUE,
+        valor=EXPR_VALOR_ESTOQUE
+    ).values_list(
+        'quantidade',
+        'valor'
+    ).get()
+
+    return quantidade, valor
+
+
+def sumarios_pelo_historico():
+    return {
+        (id_evento, id_item): (quantidade_liquida, custo_liquido)
+        for id_evento, id_item, quantidade_liquida, custo_liquido in TransacaoEstoque.objects.filter(
+            evento__isnull=False
+        ).values(
+            'evento_id',
+            'item_id'
+        ).annotate(
+            quantidade_liquida=EXPR_QUANTIDADE_LIQUIDA,
+            custo_liquido=EXPR_CUSTO_LIQUIDO
+        ).values_list(
+            'evento_id',
+            'item_id',
+            'quantidade_liquida',
+            'custo_liquido'
+        )
+    }
+
+
+def sumarios_persistidos():
+    return {
+        (id_evento, id_item): (quantidade_liquida, custo_liquido)
+        for id_evento, id_item, quantidade_liquida, custo_liquido in SumarioItemEvento.objects.values_list(
+            'evento_id',
+            'item_id',
+            'quantidade_liquida',
+            'custo_liquido'
+        )
+    }
@@ -0,0 +1,131 @@
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.models import Item, SolicitacaoEvento, TransacaoEstoque
+from core.services import (
+    alocar_item_para_evento, alocar_quantidade_disponivel_estoque_solicitacoes,
+    alocar_quantidade_disponivel_estoque_solicitacoes_sql
+)
+
+from .fabricas import comprar, criar_evento, criar_item, criar_usuario, solicitar
+
+
+class AlocacaoDisponivelTests(TestCase):
+    def setUp(self):
+        self.usuario = criar_usuario()
+        self.show = criar_evento('Show')
+        self.festa = criar_evento('Festa')
+        self.feira = criar_evento('Feira')
+
+        copo = criar_item('Copo')
+        comprar(copo, 6, '2.00')
+        comprar(copo, 4, '3.00')
+        solicitar(self.show, copo, 6)
+        solicitar(self.festa, copo, 8)
+        solicitar(self.feira, copo, 3)
+
+        prato = criar_item('Prato')
+        comprar(prato, 20, '1.3333')
+        solicitar(self.show, prato, 12)
+        alocar_item_para_evento(prato.id, 5, self.show.id, self.usuario)
+        solicitar(self.festa, prato, 4)
+
+        guardanapo = criar_item('Guardanapo')
+        comprar(guardanapo, 5, '0.10')
+        solicitar(self.festa, guardanapo, 10)
+        alocar_item_para_evento(guardanapo.id, 2, self.festa.id, self.usuario)
+
+        gelo = criar_item('Gelo')
+        solicitar(self.show, gelo, 5)
+
+        talher = criar_item('Talher')
+        comprar(talher, 3, '4.00')
+        solicitar(self.show, talher, 3)
+        alocar_item_para_evento(talher.id, 3, self.show.id, self.usuario)
+
+        self.ultima_transacao_anterior = TransacaoEstoque.objects.order_by('-id').values_list('id', flat=True).first()
+
+    def _alocar(self, alocar):
+        with transaction.atomic():
+            alocar(SolicitacaoEvento.objects.order_by('id'), self.usuario)
+
+            resultado = (
+                list(SolicitacaoEvento.objects.order_by('id').values_list('id', 'quantidade_alocada')),
+                list(
+                    TransacaoEstoque.objects.filter(
+                        id__gt=self.ultima_transacao_anterior
+                    ).order_by(
+                        'id'
+                    ).values_list(
+                        'tipo',
+                        'evento_id',
+                        'item_id',
+                        'quantidade',
+                        'preco_unidade'
+                    )
+                ),
+                list(Item.objects.order_by('id').values_list('id', 'quantidade_em_estoque', 'valor_total')),
+            )
+            transaction.set_rollback(True)
+
+        return resultado
+
+    def test_caminho_sql_aloca_o_mesmo_que_o_caminho_python(self):
+        resultado_python = self._alocar(alocar_quantidade_disponivel_estoque_solicitacoes)
+        resultado_sql = self._alocar(alocar_quantidade_disponivel_estoque_solicitacoes_sql)
+
+        solicitacoes_python, transacoes_python, itens_python = resultado_python
+        solicitacoes_sql, transacoes_sql, itens_sql = resultado_sql
+
+        self.assertEqual(solicitacoes_sql, solicitacoes_python)
+        self.assertEqual(transacoes_sql, transacoes_python)
+        self.assertEqual(itens_sql, itens_python)
+
+        self.assertTrue(transacoes_python)
+        self.assertTrue(
+            all(tipo == TransacaoEstoque.Tipo.ALOCACAO_EVENTO and quantidade > 0 for tipo, _, _, quantidade, _ in transacoes_python)
+        )
+        self.assertTrue(all(quantidade_em_estoque >= 0 for _, quantidade_em_estoque, _ in itens_python))
+
+    def test_estoque_escasso_atende_as_solicitacoes_em_ordem(self):
+        alocar_quantidade_disponivel_estoque_solicitacoes_sql(SolicitacaoEvento.objects.all(), self.usuario)
+
+        copo = Item.objects.get(nome='Copo')
+        self.assertEqual(copo.quantidade_em_estoque, 0)
+        self.assertEqual(
+            list(
+                SolicitacaoEvento.objects.filter(
+                    item=copo
+                ).order_by(
+                    'id'
+                ).values_list(
+                    'quantidade_alocada',
+                    flat=True
+                )
+            ),
+            [6, 4, 0]
+        )
+        self.assertEqual(SolicitacaoEvento.objects.get(item__nome='Gelo').quantidade_alocada, 0)
+
+    def test_recusa_prioridade_desconhecida(self):
+        transacoes = TransacaoEstoque.objects.count()
+
+        with self.assertRaises(ValidationError):
+            alocar_quantidade_disponivel_estoque_solicitacoes_sql(
+                SolicitacaoEvento.objects.all(),
+                self.usuario,
+                'data_do_evento'
+            )
+
+        self.assertEqual(TransacaoEstoque.objects.count(), transacoes)
+
+
+class ConfiguracaoPrioridadeAlocacaoTests(SimpleTestCase):
+    def test_recusa_prioridade_desconhecida_ao_iniciar(self):
+        with override_settings(ALOCACAO_PRIORIDADE='data_do_evento'), self.assertRaises(ImproperlyConfigured):
+            apps.get_app_config('core').ready()
+
+        with override_settings(ALOCACAO_PRIORIDADE='solicitacao'):
+            apps.get_app_config('core').ready()
@@ -0,0 +1,25 @@
+from django.test import TestCase
+
+from core.benchmarks import ALVOS_CENARIOS, CENARIOS, comparar_resultados, executar_benchmarks
+
+from .fabricas import comprar, criar_item
+
+
+class BenchmarksTests(TestCase):
+    def test_cenarios_sem_alvo_nos_dados_nao_sao_medidos(self):
+        comprar(criar_item('Copo'), 10, '2.00')
+
+        resultados = executar_benchmarks(1)
+
+        self.assertEqual(list(resultados), list(CENARIOS))
+        self.assertEqual(resultados['retornar_item_de_evento'], {'alvos_ausentes': ['sumario']})
+        self.assertEqual(resultados['TransacaoEstoque.save'], {'alvos_ausentes': ['item_alocado']})
+        self.assertEqual(resultados['gerar_lista_compras'], {'alvos_ausentes': ['evento_em_andamento']})
+        for nome in ('TransacaoEstoque.save_fracionado_credito', 'com_custo_total_calculado'):
+            self.assertEqual(set(resultados[nome]), {'mediana_ms', 'minimo_ms', 'consultas'})
+        self.assertTrue(set(ALVOS_CENARIOS) <= set(CENARIOS))
+
+        referencia = {'1': {nome: {'mediana_ms': 0, 'minimo_ms': 0, 'consultas': 0} for nome in CENARIOS}}
+        regressoes = comparar_resultados({'1': resultados}, referencia, 0)
+        self.assertFalse([regressao for regressao in regressoes if 'retornar_item_de_evento' in regressao])
+        self.assertTrue([regressao for regressao in regressoes if 'com_custo_total_calculado' in regressao])
@@ -0,0 +1,131 @@
+import tempfile
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core.compactacao import caminho_arquivo_compactacao, compactar_transacoes, restaurar_compactacao
+from core.models import CompactacaoTransacoes, Evento, TransacaoEstoque, UltimaCompraItem
+from core.services import alocar_item_para_evento, retornar_item_de_evento
+
+from .fabricas import (
+    comprar, criar_evento, criar_item, criar_usuario, estoque_pelo_historico, estoque_total, registrar, solicitar,
+    sumarios_pelo_historico, sumarios_persistidos
+)
+
+
+def historico():
+    return list(
+        TransacaoEstoque.objects.order_by(
+            'id'
+        ).values_list(
+            'id',
+            'timestamp',
+            'tipo',
+            'item_id',
+            'evento_id',
+            'quantidade',
+            'preco_unidade',
+            'valor_total'
+        )
+    )
+
+
+class CompactacaoTransacoesTests(TransactionTestCase):
+    def setUp(self):
+        self.usuario = criar_usuario()
+        self.copo = criar_item('Copo')
+        self.gelo = criar_item('Gelo')
+        self.show = criar_evento('Show')
+        solicitar(self.show, self.copo, 8)
+        solicitar(self.show, self.gelo, 5)
+
+        comprar(self.copo, 10, '2.00')
+        alocar_item_para_evento(self.copo.id, 5, self.show.id, self.usuario)
+        retornar_item_de_evento(self.copo.id, 2, self.show.id, self.usuario)
+        comprar(self.gelo, 7, '1.3333')
+        alocar_item_para_evento(self.gelo.id, 4, self.show.id, self.usuario)
+        registrar(self.gelo, TransacaoEstoque.Tipo.CONSUMO_INTERNO, 1)
+        comprar(self.copo, 10, '3.00')
+        comprar(self.gelo, 3, '1.00')
+        alocar_item_para_evento(self.copo.id, 2, self.show.id, self.usuario)
+
+        TransacaoEstoque.objects.update(timestamp=models.F('timestamp') - timedelta(days=30))
+        UltimaCompraItem.objects.update(timestamp=models.F('timestamp') - timedelta(days=30))
+        Evento.objects.update(status=Evento.Status.CONCLUIDO)
+
+        self.historico = historico()
+        self.estoques = {item: estoque_total(item) for item in (self.copo, self.gelo)}
+        self.sumarios = sumarios_persistidos()
+        self.custos = dict(Evento.objects.values_list('id', 'custo_total'))
+
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        configuracao = override_settings(TRANSACOES_COMPACTACAO_DIR=diretorio.name)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def assertEstoquesSumariosECustosPreservados(self):
+        for item, estoque in self.estoques.items():
+            self.assertEqual(estoque_total(item), estoque, item)
+            self.assertEqual(estoque_pelo_historico(item), estoque, item)
+        self.assertEqual(sumarios_persistidos(), self.sumarios)
+        self.assertEqual(sumarios_pelo_historico(), self.sumarios)
+        self.assertEqual(dict(Evento.objects.values_list('id', 'custo_total')), self.custos)
+
+    def test_compactacao_troca_historico_anterior_a_ultima_compra_por_saldos_iniciais(self):
+        compactacao, ids_itens_mantidos = compactar_transacoes(timezone.localdate() - timedelta(days=1))
+
+        self.assertEqual(ids_itens_mantidos, [])
+        self.assertEqual(compactacao.transacoes_arquivadas, 6)
+        self.assertTrue(caminho_arquivo_compactacao(compactacao).exists())
+        self.assertEqual(
+            TransacaoEstoque.objects.count(),
+            len(self.historico) - compactacao.transacoes_arquivadas + len(compactacao.ids_entradas)
+        )
+        self.assertEqual(
+            set(
+                TransacaoEstoque.objects.filter(
+                    id__in=compactacao.ids_entradas
+                ).values_list(
+                    'tipo',
+                    'item_id',
+                    'quantidade'
+                )
+            ),
+            {
+                (TransacaoEstoque.Tipo.SALDO_INICIAL, self.copo.id, 10),
+                (TransacaoEstoque.Tipo.SALDO_INICIAL, self.gelo.id, 6),
+                (TransacaoEstoque.Tipo.ALOCACAO_EVENTO, self.copo.id, 3),
+                (TransacaoEstoque.Tipo.ALOCACAO_EVENTO, self.gelo.id, 4),
+            }
+        )
+        self.assertEstoquesSumariosECustosPreservados()
+
+    def test_restauracao_devolve_o_historico_original(self):
+        for formato in CompactacaoTransacoes.Formato:
+            with self.subTest(formato=formato):
+                compactacao, _ = compactar_transacoes(timezone.localdate() - timedelta(days=1), formato)
+
+                restaurar_compactacao(compactacao)
+
+                self.assertEqual(historico(), self.historico)
+                self.assertFalse(TransacaoEstoque.objects.filter(tipo=TransacaoEstoque.Tipo.SALDO_INICIAL).exists())
+                self.assertEstoquesSumariosECustosPreservados()
+
+                with self.assertRaises(ValidationError):
+                    restaurar_compactacao(compactacao)
+
+    def test_restauracao_recusa_saldos_iniciais_alterados(self):
+        compactacao, _ = compactar_transacoes(timezone.localdate() - timedelta(days=1))
+        TransacaoEstoque.objects.filter(id=compactacao.ids_entradas[0]).delete()
+        compactado = historico()
+
+        with self.assertRaises(ValidationError):
+            restaurar_compactacao(compactacao)
+
+        self.assertEqual(historico(), compactado)
+        compactacao.refresh_from_db()
+        self.assertIsNone(compactacao.restaurado_em)
@@ -0,0 +1,75 @@
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import models
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.compactacao import compactar_transacoes
+from core.models import Evento, SolicitacaoEvento, TransacaoEstoque, UltimaCompraItem
+from core.services import (
+    alocar_item_para_evento, alocar_quantidade_disponivel_estoque_solicitacoes_sql, retornar_item_de_evento,
+    retornar_itens_de_evento
+)
+
+from .fabricas import comprar, criar_evento, criar_item, criar_usuario, solicitar
+
+
+class CustoTotalEventoTests(TestCase):
+    def setUp(self):
+        self.usuario = criar_usuario()
+        self.copo = criar_item('Copo')
+        self.gelo = criar_item('Gelo')
+        comprar(self.copo, 10, '2.00')
+        comprar(self.copo, 10, '3.00')
+        comprar(self.gelo, 7, '1.3333')
+        self.show = criar_evento('Show')
+        self.festa = criar_evento('Festa')
+        for evento in (self.show, self.festa):
+            solicitar(evento, self.copo, 8)
+            solicitar(evento, self.gelo, 5)
+
+    def assertCustoConfereComTransacoes(self):
+        for evento in Evento.objects.com_custo_total_calculado():
+            self.assertEqual(evento.custo_total, evento.custo_total_calculado or Decimal(0), evento)
+
+    def test_custo_total_acompanha_alocacoes_e_retornos(self):
+        alocar_item_para_evento(self.copo.id, 6, self.show.id, self.usuario)
+        self.assertCustoConfereComTransacoes()
+
+        comprar(self.copo, 4, '7.00')
+        alocar_item_para_evento(self.copo.id, 2, self.show.id, self.usuario)
+        alocar_quantidade_disponivel_estoque_solicitacoes_sql(
+            SolicitacaoEvento.objects.filter(evento=self.festa),
+            self.usuario
+        )
+        self.assertCustoConfereComTransacoes()
+
+        retornar_item_de_evento(self.copo.id, 7, self.show.id, self.usuario)
+        self.assertCustoConfereComTransacoes()
+
+        retornar_itens_de_evento(self.festa.id, self.usuario)
+        self.assertCustoConfereComTransacoes()
+
+        self.festa.refresh_from_db()
+        self.assertEqual(self.festa.custo_total, 0)
+        self.show.refresh_from_db()
+        self.assertGreater(self.show.custo_total, 0)
+
+    def test_custo_total_confere_apos_compactacao(self):
+        alocar_item_para_evento(self.copo.id, 8, self.show.id, self.usuario)
+        alocar_item_para_evento(self.gelo.id, 5, self.show.id, self.usuario)
+        retornar_item_de_evento(self.copo.id, 3, self.show.id, self.usuario)
+        alocar_item_para_evento(self.gelo.id, 2, self.festa.id, self.usuario)
+
+        TransacaoEstoque.objects.update(timestamp=models.F('timestamp') - timedelta(days=30))
+        UltimaCompraItem.objects.update(timestamp=models.F('timestamp') - timedelta(days=30))
+        Evento.objects.update(status=Evento.Status.CONCLUIDO)
+        custos_antes = dict(Evento.objects.values_list('id', 'custo_total'))
+
+        with tempfile.TemporaryDirectory() as diretorio, override_settings(TRANSACOES_COMPACTACAO_DIR=diretorio):
+            compactar_transacoes(timezone.localdate() - timedelta(days=1))
+
+        self.assertEqual(dict(Evento.objects.values_list('id', 'custo_total')), custos_antes)
+        self.assertCustoConfereComTransacoes()
@@ -0,0 +1,132 @@
+import threading
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+
+from core.models import FracaoEstoque, Item, TransacaoEstoque, UltimaCompraItem
+
+from .fabricas import comprar, criar_item, estoque_pelo_historico, estoque_total, registrar
+
+
+def redistribuir(item):
+    with transaction.atomic():
+        Item.objects.consolidar_fracoes([item.pk])
+        Item.objects.distribuir_fracoes(item.pk)
+
+
+def fracoes(item):
+    return list(
+        FracaoEstoque.objects.filter(
+            item=item
+        ).order_by(
+            'indice'
+        ).values_list(
+            'quantidade_em_estoque',
+            'valor_total'
+        )
+    )
+
+
+class EstoqueFracionadoTests(TestCase):
+    def setUp(self):
+        self.copo = criar_item('Copo', quantidade_fracoes=4)
+
+    def test_credito_cai_em_uma_unica_fracao(self):
+        compra = comprar(self.copo, 10, '2.00')
+
+        self.assertEqual(estoque_total(self.copo), (10, Decimal('20.00')))
+        self.assertEqual(estoque_pelo_historico(self.copo), (10, Decimal('20.00')))
+        self.assertEqual(sorted(fracoes(self.copo)), [(0, 0), (0, 0), (0, 0), (10, Decimal('20.00'))])
+        self.assertEqual(Item.objects.values_list('quantidade_em_estoque', flat=True).get(pk=self.copo.pk), 0)
+        self.assertEqual(
+            UltimaCompraItem.objects.values_list('preco_unidade', 'timestamp').get(item=self.copo),
+            (Decimal('2.00'), compra.timestamp)
+        )
+
+    def test_debito_maior_que_uma_fracao_usa_varias_fracoes(self):
+        comprar(self.copo, 12, '2.00')
+        redistribuir(self.copo)
+
+        transacao = registrar(self.copo, TransacaoEstoque.Tipo.CONSUMO_INTERNO, 7)
+
+        self.assertEqual(transacao.preco_unidade, Decimal('2.00'))
+        self.assertEqual(sorted(quantidade for quantidade, _ in fracoes(self.copo)), [0, 0, 2, 3])
+        self.assertEqual(estoque_total(self.copo), (5, Decimal('10.00')))
+        self.assertEqual(estoque_pelo_historico(self.copo), (5, Decimal('10.00')))
+
+    def test_debito_usa_o_preco_medio_do_item_inteiro(self):
+        comprar(self.copo, 8, '2.00')
+        FracaoEstoque.objects.filter(item=self.copo).delete()
+        FracaoEstoque.objects.bulk_create([
+            FracaoEstoque(item=self.copo, indice=0, quantidade_em_estoque=4, valor_total=Decimal('4.00')),
+            FracaoEstoque(item=self.copo, indice=1, quantidade_em_estoque=4, valor_total=Decimal('12.00')),
+        ])
+
+        for _ in range(3):
+            transacao = registrar(self.copo, TransacaoEstoque.Tipo.CONSUMO_INTERNO, 1)
+            self.assertEqual(transacao.preco_unidade, Decimal('2.00'))
+
+        self.assertEqual(estoque_total(self.copo), (5, Decimal('10.00')))
+
+    def test_fracoes_sem_valor_suficiente_caem_na_consolidacao(self):
+        comprar(self.copo, 8, '2.00')
+        FracaoEstoque.objects.filter(item=self.copo).delete()
+        FracaoEstoque.objects.bulk_create([
+            FracaoEstoque(item=self.copo, indice=0, quantidade_em_estoque=4, valor_total=Decimal('0.40')),
+            FracaoEstoque(item=self.copo, indice=1, quantidade_em_estoque=4, valor_total=Decimal('15.60')),
+        ])
+        Item.objects.filter(pk=self.copo.pk).update(quantidade_fracoes=2)
+
+        transacao = registrar(self.copo, TransacaoEstoque.Tipo.CONSUMO_INTERNO, 6)
+
+        self.assertEqual(transacao.preco_unidade, Decimal('2.00'))
+        self.assertEqual(fracoes(self.copo), [(1, Decimal('2.00')), (1, Decimal('2.00'))])
+        self.assertEqual(estoque_total(self.copo), (2, Decimal('4.00')))
+
+    def test_debito_sem_estoque_suficiente_nao_altera_fracoes(self):
+        comprar(self.copo, 6, '2.00')
+        redistribuir(self.copo)
+        antes = fracoes(self.copo)
+
+        with self.assertRaises(ValidationError):
+            registrar(self.copo, TransacaoEstoque.Tipo.CONSUMO_INTERNO, 7)
+
+        self.assertEqual(fracoes(self.copo), antes)
+        self.assertEqual(estoque_total(self.copo), (6, Decimal('12.00')))
+        self.assertEqual(TransacaoEstoque.objects.filter(tipo=TransacaoEstoque.Tipo.CONSUMO_INTERNO).count(), 0)
+
+
+class EstoqueFracionadoConcorrenteTests(TransactionTestCase):
+    def test_debito_pula_fracao_travada(self):
+        copo = criar_item('Copo', quantidade_fracoes=4)
+        comprar(copo, 12, '2.00')
+        redistribuir(copo)
+        fracao_travada = FracaoEstoque.objects.get(item=copo, indice=0)
+
+        travada = threading.Event()
+        liberar = threading.Event()
+
+        def travar_fracao():
+            try:
+                with transaction.atomic():
+                    FracaoEstoque.objects.select_for_update().get(pk=fracao_travada.pk)
+                    travada.set()
+                    liberar.wait(10)
+            finally:
+                connection.close()
+
+        concorrente = threading.Thread(target=travar_fracao)
+        concorrente.start()
+        try:
+            self.assertTrue(travada.wait(10))
+            registrar(copo, TransacaoEstoque.Tipo.CONSUMO_INTERNO, 5)
+        finally:
+            liberar.set()
+            concorrente.join()
+
+        fracao_travada.refresh_from_db()
+        self.assertEqual(fracao_travada.quantidade_em_estoque, 3)
+        self.assertEqual(Item.objects.values_list('quantidade_em_estoque', flat=True).get(pk=copo.pk), 0)
+        self.assertEqual(estoque_total(copo), (7, Decimal('14.00')))
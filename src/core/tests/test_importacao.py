@@ -0,0 +1,144 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase
+
+from core.importacao import converter_decimal, converter_inteiro
+from core.models import Evento, SolicitacaoEvento, TransacaoEstoque
+from core.services import alocar_item_para_evento, importar_solicitacoes_evento, importar_transacoes_estoque
+
+from .fabricas import comprar, criar_evento, criar_item, criar_usuario, solicitar
+
+
+class ConversaoNumerosTests(SimpleTestCase):
+    def test_converte_formatos_aceitos(self):
+        casos = {
+            '10': Decimal('10'),
+            '2.5': Decimal('2.5'),
+            '0.500': Decimal('0.5'),
+            '2,50': Decimal('2.50'),
+            'R$ 1.234,56': Decimal('1234.56'),
+            '1.000,00': Decimal('1000.00'),
+            ' -3,5 ': Decimal('-3.5'),
+            3: Decimal(3),
+            1.1: Decimal('1.1'),
+            Decimal('4.25'): Decimal('4.25'),
+        }
+
+        for valor, esperado in casos.items():
+            with self.subTest(valor=valor):
+                self.assertEqual(converter_decimal(valor), esperado)
+
+    def test_rejeita_valores_invalidos_ou_ambiguos(self):
+        for valor in (
+            'inf', '-Infinity', 'nan', 'NaN', 'sNaN', float('inf'), float('nan'), Decimal('Infinity'), Decimal('NaN'),
+            '1.000', '12.345.678', '1,000.50', '1,2,3', 'abc', '', None
+        ):
+            with self.subTest(valor=valor):
+                with self.assertRaises(ValueError):
+                    converter_decimal(valor)
+
+    def test_converte_inteiros(self):
+        self.assertEqual(converter_inteiro('7'), 7)
+        self.assertEqual(converter_inteiro('7,0'), 7)
+        self.assertEqual(converter_inteiro(7.0), 7)
+        self.assertEqual(converter_inteiro('1.000,00'), 1000)
+
+        for valor in ('inf', 'nan', 'sNaN', '1.000', '7,5', float('inf')):
+            with self.subTest(valor=valor):
+                with self.assertRaises(ValueError):
+                    converter_inteiro(valor)
+
+
+class ImportacaoValoresInvalidosTests(TestCase):
+    def test_valores_nao_finitos_viram_erros_de_linha(self):
+        criar_item('Copo')
+
+        with self.assertRaises(ValidationError) as contexto:
+            importar_transacoes_estoque(
+                [
+                    (2, {'item': 'Copo', 'quantidade': 'inf', 'preco_unidade': '2,00'}),
+                    (3, {'item': 'Copo', 'quantidade': '5', 'preco_unidade': 'NaN'}),
+                    (4, {'item': 'Copo', 'quantidade': '1.000', 'preco_unidade': '2,00'}),
+                ],
+                criar_usuario()
+            )
+
+        self.assertEqual(
+            contexto.exception.messages,
+            [
+                'Linha 2: quantidade "inf" inválida',
+                'Linha 3: preço unidade "NaN" inválido',
+                'Linha 3: é necessário informar um valor para compras e adições manuais',
+                'Linha 4: quantidade "1.000" inválida',
+            ]
+        )
+        self.assertFalse(TransacaoEstoque.objects.exists())
+
+
+class ImportacaoSolicitacoesTests(TestCase):
+    def setUp(self):
+        self.copo = criar_item('Copo')
+        self.gelo = criar_item('Gelo')
+        self.prato = criar_item('Prato')
+        self.show = criar_evento('Show')
+
+    def solicitadas(self):
+        return dict(
+            SolicitacaoEvento.objects.filter(
+                evento=self.show
+            ).values_list(
+                'item__nome',
+                'quantidade_solicitada'
+            )
+        )
+
+    def test_conta_solicitacoes_criadas_e_atualizadas(self):
+        solicitar(self.show, self.copo, 3)
+        versao = Evento.objects.values_list('versao', flat=True).get(pk=self.show.pk)
+
+        resultado = importar_solicitacoes_evento(
+            self.show.id,
+            [
+                (2, {'item': 'copo', 'quantidade': '10'}),
+                (3, {'item': 'Gelo', 'quantidade': '4'}),
+                (4, {'item': 'GELO', 'quantidade': '2'}),
+            ]
+        )
+
+        self.assertEqual(resultado, (1, 1))
+        self.assertEqual(self.solicitadas(), {'Copo': 10, 'Gelo': 6})
+        self.assertEqual(Evento.objects.values_list('versao', flat=True).get(pk=self.show.pk), versao + 1)
+
+        resultado = importar_solicitacoes_evento(
+            self.show.id,
+            [(2, {'item': 'Copo', 'quantidade': '10'}), (3, {'item': 'Prato', 'quantidade': '1'})]
+        )
+
+        self.assertEqual(resultado, (1, 1))
+        self.assertEqual(self.solicitadas(), {'Copo': 10, 'Gelo': 6, 'Prato': 1})
+
+    def test_recusa_quantidade_menor_que_a_alocada(self):
+        solicitar(self.show, self.copo, 5)
+        comprar(self.copo, 5, '2.00')
+        alocar_item_para_evento(self.copo.id, 4, self.show.id, criar_usuario())
+
+        with self.assertRaises(ValidationError) as contexto:
+            importar_solicitacoes_evento(
+                self.show.id,
+                [(2, {'item': 'Copo', 'quantidade': '3'}), (3, {'item': 'Gelo', 'quantidade': '1'})]
+            )
+
+        self.assertEqual(
+            contexto.exception.messages,
+            ['Linha 2: já foram alocados 4 Copo(s). Não é possível mudar a quantidade solicitada para 3']
+        )
+        self.assertEqual(self.solicitadas(), {'Copo': 5})
+
+    def test_recusa_evento_concluido(self):
+        Evento.objects.filter(pk=self.show.pk).update(status=Evento.Status.CONCLUIDO)
+
+        with self.assertRaises(ValidationError):
+            importar_solicitacoes_evento(self.show.id, [(2, {'item': 'Copo', 'quantidade': '1'})])
+
+        self.assertFalse(SolicitacaoEvento.objects.exists())
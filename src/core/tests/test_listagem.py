@@ -0,0 +1,64 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.admin import TransacaoEstoqueAdmin
+from core.models import TransacaoEstoque
+
+from .fabricas import ARMAZENAMENTO_SEM_MANIFESTO, comprar, criar_item
+
+TRANSACOES_POR_PAGINA = 3
+
+
+@override_settings(STORAGES=ARMAZENAMENTO_SEM_MANIFESTO)
+@mock.patch.object(TransacaoEstoqueAdmin, 'list_per_page', TRANSACOES_POR_PAGINA)
+class ListagemPorCursorTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin'))
+        self.url = reverse('admin:core_transacaoestoque_changelist')
+
+        copo = criar_item('Copo')
+        for quantidade in range(1, 9):
+            comprar(copo, quantidade, '1.00')
+
+        momento = timezone.now() - timedelta(days=1)
+        ids = list(TransacaoEstoque.objects.order_by('id').values_list('id', flat=True))
+        TransacaoEstoque.objects.filter(id__in=ids[2:6]).update(timestamp=momento)
+        TransacaoEstoque.objects.filter(id__in=ids[6:]).update(timestamp=momento - timedelta(days=1))
+
+        self.ids_ordenados = list(TransacaoEstoque.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+
+    def pagina(self, query_string=''):
+        resposta = self.client.get(f'{self.url}{query_string}')
+        self.assertEqual(resposta.status_code, 200)
+        listagem = resposta.context['cl']
+        return [transacao.id for transacao in listagem.result_list], listagem
+
+    def test_percorre_todas_as_paginas_sem_repetir_nem_pular(self):
+        paginas = []
+        ids, listagem = self.pagina()
+        paginas.append(ids)
+        self.assertIsNone(listagem.link_anterior)
+
+        while listagem.link_proxima:
+            ids, listagem = self.pagina(listagem.link_proxima)
+            paginas.append(ids)
+
+        self.assertEqual([len(ids) for ids in paginas], [3, 3, 2])
+        self.assertEqual([id_transacao for ids in paginas for id_transacao in ids], self.ids_ordenados)
+
+        paginas_volta = [ids]
+        while listagem.link_anterior:
+            ids, listagem = self.pagina(listagem.link_anterior)
+            paginas_volta.insert(0, ids)
+
+        self.assertEqual(paginas_volta, paginas)
+
+    def test_cursor_invalido_nao_quebra_a_listagem(self):
+        resposta = self.client.get(f'{self.url}?apos=invalido')
+
+        self.assertNotEqual(resposta.status_code, 500)
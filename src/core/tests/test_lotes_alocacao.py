@@ -0,0 +1,87 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.models import LoteAlocacao, SumarioItemEvento, TransacaoEstoque
+from core.services import alocar_item_para_evento, retornar_item_de_evento, retornar_itens_de_evento
+
+from .fabricas import comprar, criar_evento, criar_item, criar_usuario, estoque_pelo_historico, estoque_total, solicitar
+
+
+def lotes(evento, item):
+    return list(
+        LoteAlocacao.objects.filter(
+            evento=evento,
+            item=item
+        ).order_by(
+            'id'
+        ).values_list(
+            'quantidade_restante',
+            'preco_unidade'
+        )
+    )
+
+
+def retornos(evento, item):
+    return list(
+        TransacaoEstoque.objects.filter(
+            evento=evento,
+            item=item,
+            tipo=TransacaoEstoque.Tipo.RETORNO_EVENTO
+        ).order_by(
+            'id'
+        ).values_list(
+            'quantidade',
+            'preco_unidade'
+        )
+    )
+
+
+class LotesAlocacaoTests(TestCase):
+    def setUp(self):
+        self.usuario = criar_usuario()
+        self.copo = criar_item('Copo')
+        self.gelo = criar_item('Gelo')
+        self.show = criar_evento('Show')
+        solicitar(self.show, self.copo, 20)
+        solicitar(self.show, self.gelo, 20)
+
+        comprar(self.copo, 10, '2.00')
+        alocar_item_para_evento(self.copo.id, 4, self.show.id, self.usuario)
+        comprar(self.copo, 10, '5.00')
+        alocar_item_para_evento(self.copo.id, 6, self.show.id, self.usuario)
+
+    def test_cada_alocacao_abre_um_lote_com_o_preco_pago(self):
+        self.assertEqual(lotes(self.show, self.copo), [(4, Decimal('2.00')), (6, Decimal('3.875'))])
+
+    def test_retorno_consome_os_lotes_mais_antigos_primeiro(self):
+        retornar_item_de_evento(self.copo.id, 5, self.show.id, self.usuario)
+
+        self.assertEqual(retornos(self.show, self.copo), [(4, Decimal('2.00')), (1, Decimal('3.875'))])
+        self.assertEqual(lotes(self.show, self.copo), [(5, Decimal('3.875'))])
+
+        sumario = SumarioItemEvento.objects.get(evento=self.show, item=self.copo)
+        self.assertEqual((sumario.quantidade_liquida, sumario.custo_liquido), (5, Decimal('19.375')))
+        self.assertEqual(estoque_total(self.copo), estoque_pelo_historico(self.copo))
+
+    def test_lotes_restantes_somam_o_sumario(self):
+        comprar(self.gelo, 8, '1.3333')
+        alocar_item_para_evento(self.gelo.id, 3, self.show.id, self.usuario)
+        comprar(self.gelo, 8, '0.50')
+        alocar_item_para_evento(self.gelo.id, 7, self.show.id, self.usuario)
+
+        retornar_itens_de_evento(self.show.id, self.usuario, {self.copo.id: 2, self.gelo.id: 4})
+
+        self.assertEqual(retornos(self.show, self.gelo), [(3, Decimal('1.3333')), (1, Decimal('0.8205'))])
+        for item in (self.copo, self.gelo):
+            sumario = SumarioItemEvento.objects.get(evento=self.show, item=item)
+            lotes_item = lotes(self.show, item)
+            self.assertEqual(sum(quantidade for quantidade, _ in lotes_item), sumario.quantidade_liquida)
+            self.assertEqual(sum(quantidade * preco for quantidade, preco in lotes_item), sumario.custo_liquido)
+
+    def test_retorno_total_remove_todos_os_lotes(self):
+        retornar_itens_de_evento(self.show.id, self.usuario)
+
+        self.assertFalse(LoteAlocacao.objects.exists())
+        self.assertEqual(retornos(self.show, self.copo), [(4, Decimal('2.00')), (6, Decimal('3.875'))])
+        self.assertEqual(estoque_total(self.copo), (20, Decimal('70.00')))
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+
+@override_settings(SECURE_SSL_REDIRECT=True, METRICAS_TOKEN='segredo')
+class MetricasTests(TestCase):
+    def test_coleta_sem_https_nao_e_redirecionada(self):
+        resposta = self.client.get(reverse('metricas'), headers={'Authorization': 'Bearer segredo'})
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta['Content-Type'].startswith('text/plain'))
+
+    def test_demais_paginas_continuam_redirecionadas_para_https(self):
+        resposta = self.client.get(reverse('admin:index'))
+
+        self.assertEqual(resposta.status_code, 301)
+        self.assertTrue(resposta['Location'].startswith('https://'))
+
+    def test_recusa_coleta_sem_token_valido(self):
+        self.assertEqual(self.client.get(reverse('metricas')).status_code, 401)
+        self.assertEqual(
+            self.client.get(reverse('metricas'), headers={'Authorization': 'Bearer errado'}).status_code,
+            403
+        )
+
+        self.client.force_login(get_user_model().objects.create_user('estoquista'))
+        self.assertEqual(self.client.get(reverse('metricas')).status_code, 401)
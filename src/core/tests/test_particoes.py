@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import TransacaoEstoque
+from core.particoes import (
+    GRANULARIDADE_ANUAL, GRANULARIDADE_MENSAL, criar_particoes, linhas_particao_padrao, nome_particao,
+    nome_particao_padrao, primeiro_timestamp_particao_padrao
+)
+
+from .fabricas import comprar, criar_item, estoque_pelo_historico, estoque_total
+
+TABELA = TransacaoEstoque._meta.db_table
+
+
+def momento(ano, mes, dia):
+    return timezone.make_aware(datetime(ano, mes, dia, 12))
+
+
+def linhas(cursor, tabela):
+    cursor.execute(f'SELECT count(*) FROM {tabela}')
+    return cursor.fetchone()[0]
+
+
+class ParticoesTests(TestCase):
+    def setUp(self):
+        self.copo = criar_item('Copo')
+        for quantidade in range(1, 6):
+            comprar(self.copo, quantidade, '2.00')
+
+        ids = list(TransacaoEstoque.objects.order_by('id').values_list('id', flat=True))
+        TransacaoEstoque.objects.filter(id__in=ids[:2]).update(timestamp=momento(2000, 3, 10))
+        TransacaoEstoque.objects.filter(id__in=ids[2:4]).update(timestamp=momento(2000, 4, 20))
+        TransacaoEstoque.objects.filter(id__in=ids[4:]).update(timestamp=momento(2001, 7, 1))
+
+    def test_move_transacoes_da_particao_padrao(self):
+        with connection.cursor() as cursor:
+            self.assertEqual(linhas_particao_padrao(cursor, TABELA), 5)
+            self.assertEqual(primeiro_timestamp_particao_padrao(cursor, TABELA), momento(2000, 3, 10))
+
+            criadas = criar_particoes(cursor, TABELA, momento(2000, 3, 10), momento(2000, 5, 5), GRANULARIDADE_MENSAL)
+
+            self.assertEqual(
+                criadas,
+                [
+                    (nome_particao(TABELA, momento(2000, 3, 1), GRANULARIDADE_MENSAL), 2),
+                    (nome_particao(TABELA, momento(2000, 4, 1), GRANULARIDADE_MENSAL), 2),
+                    (nome_particao(TABELA, momento(2000, 5, 1), GRANULARIDADE_MENSAL), 0),
+                ]
+            )
+            self.assertEqual(linhas(cursor, f'{TABELA}_2000_03'), 2)
+            self.assertEqual(linhas(cursor, f'{TABELA}_2000_04'), 2)
+            self.assertEqual(linhas_particao_padrao(cursor, TABELA), 1)
+            self.assertEqual(primeiro_timestamp_particao_padrao(cursor, TABELA), momento(2001, 7, 1))
+
+        self.assertEqual(TransacaoEstoque.objects.count(), 5)
+        self.assertEqual(estoque_total(self.copo), estoque_pelo_historico(self.copo))
+
+    def test_repetir_ou_sobrepor_periodos_nao_cria_nem_move_nada(self):
+        with connection.cursor() as cursor:
+            criar_particoes(cursor, TABELA, momento(2000, 3, 1), momento(2000, 4, 30), GRANULARIDADE_MENSAL)
+
+            self.assertEqual(
+                criar_particoes(cursor, TABELA, momento(2000, 3, 1), momento(2000, 4, 30), GRANULARIDADE_MENSAL),
+                []
+            )
+            self.assertEqual(
+                criar_particoes(cursor, TABELA, momento(2000, 1, 1), momento(2000, 1, 1), GRANULARIDADE_ANUAL),
+                []
+            )
+            self.assertEqual(linhas_particao_padrao(cursor, TABELA), 1)
+
+            self.assertEqual(
+                criar_particoes(cursor, TABELA, momento(2001, 1, 1), momento(2001, 1, 1), GRANULARIDADE_ANUAL),
+                [(nome_particao(TABELA, momento(2001, 1, 1), GRANULARIDADE_ANUAL), 1)]
+            )
+            self.assertEqual(linhas_particao_padrao(cursor, TABELA), 0)
+            self.assertEqual(linhas(cursor, nome_particao_padrao(TABELA)), 0)
@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import PerfilSQLRequisicao
+from core.perfil_sql import CHAVE_SESSAO_ATIVO
+
+from .fabricas import ARMAZENAMENTO_SEM_MANIFESTO
+
+
+@override_settings(STORAGES=ARMAZENAMENTO_SEM_MANIFESTO, PERFIL_SQL_HABILITADO=True, PERFIL_SQL_HISTORICO=2)
+class PerfilSQLTests(TestCase):
+    def setUp(self):
+        self.usuario = get_user_model().objects.create_superuser('admin')
+        self.client.force_login(self.usuario)
+        self.client.post(reverse('core:perfil_sql'), {'acao': 'ativar'})
+
+    def test_guarda_os_perfis_fora_da_sessao_e_somente_os_mais_recentes(self):
+        with self.assertLogs('core.perfil_sql') as registros:
+            for url in ('admin:index', 'admin:core_item_changelist', 'admin:core_evento_changelist'):
+                self.assertEqual(self.client.get(reverse(url)).status_code, 200)
+
+        self.assertEqual(len(registros.output), 3)
+
+        perfis = list(PerfilSQLRequisicao.objects.historico(self.usuario).values_list('dados', flat=True))
+        self.assertEqual(
+            [perfil['caminho'] for perfil in perfis],
+            [reverse('admin:core_evento_changelist'), reverse('admin:core_item_changelist')]
+        )
+        self.assertTrue(all(perfil['total_consultas'] > 0 for perfil in perfis))
+        self.assertEqual(
+            [chave for chave in self.client.session.keys() if not chave.startswith('_auth_user')],
+            [CHAVE_SESSAO_ATIVO]
+        )
+
+        resposta = self.client.get(reverse('core:perfil_sql'))
+        self.assertEqual(resposta.context['historico'], perfis)
+
+    def test_limpar_remove_somente_os_perfis_do_usuario(self):
+        outro_usuario = get_user_model().objects.create_user('estoquista')
+        PerfilSQLRequisicao.objects.create(usuario=outro_usuario, dados={'metodo': 'GET', 'caminho': '/'})
+        with self.assertLogs('core.perfil_sql'):
+            self.client.get(reverse('admin:index'))
+
+        self.client.post(reverse('core:perfil_sql'), {'acao': 'limpar'})
+
+        self.assertFalse(PerfilSQLRequisicao.objects.historico(self.usuario).exists())
+        self.assertTrue(PerfilSQLRequisicao.objects.historico(outro_usuario).exists())
@@ -0,0 +1,142 @@
+from datetime import timedelta
+
+from django.db import models
+from django.db.models.functions import TruncDate
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import (
+    ResumoDiarioEvento, ResumoDiarioEventoPendente, ResumoDiarioTransacoes, ResumoDiarioTransacoesPendente,
+    TransacaoEstoque
+)
+from core.services import (
+    alocar_item_para_evento, analise_periodo, consolidar_resumos_pendentes, reconstruir_resumos_transacoes,
+    retornar_item_de_evento
+)
+
+from .fabricas import comprar, criar_evento, criar_item, criar_usuario, registrar, solicitar
+
+
+def resumos_transacoes():
+    return list(
+        ResumoDiarioTransacoes.objects.order_by(
+            'dia',
+            'tipo',
+            'item_id'
+        ).values_list(
+            'dia',
+            'tipo',
+            'item_id',
+            'quantidade',
+            'valor_total',
+            'transacoes'
+        )
+    )
+
+
+def resumos_transacoes_pelo_historico():
+    return list(
+        TransacaoEstoque.objects.exclude(
+            tipo=TransacaoEstoque.Tipo.SALDO_INICIAL
+        ).annotate(
+            dia=TruncDate('timestamp')
+        ).values(
+            'dia',
+            'tipo',
+            'item_id'
+        ).annotate(
+            soma_quantidade=models.Sum('quantidade'),
+            soma_valor=models.Sum('valor_total'),
+            quantidade_transacoes=models.Count('id')
+        ).order_by(
+            'dia',
+            'tipo',
+            'item_id'
+        ).values_list(
+            'dia',
+            'tipo',
+            'item_id',
+            'soma_quantidade',
+            'soma_valor',
+            'quantidade_transacoes'
+        )
+    )
+
+
+def resumos_eventos():
+    return list(
+        ResumoDiarioEvento.objects.order_by(
+            'dia',
+            'evento_id'
+        ).values_list(
+            'dia',
+            'evento_id',
+            'quantidade_alocada',
+            'quantidade_retornada',
+            'custo_liquido'
+        )
+    )
+
+
+class ResumosDiariosTests(TestCase):
+    def setUp(self):
+        self.usuario = criar_usuario()
+        self.copo = criar_item('Copo')
+        self.gelo = criar_item('Gelo')
+        self.show = criar_evento('Show')
+        solicitar(self.show, self.copo, 10)
+        solicitar(self.show, self.gelo, 4)
+
+        comprar(self.copo, 10, '2.00')
+        comprar(self.gelo, 6, '1.3333')
+        alocar_item_para_evento(self.copo.id, 7, self.show.id, self.usuario)
+        alocar_item_para_evento(self.gelo.id, 4, self.show.id, self.usuario)
+        retornar_item_de_evento(self.copo.id, 2, self.show.id, self.usuario)
+        registrar(self.gelo, TransacaoEstoque.Tipo.CONSUMO_INTERNO, 1)
+
+    def test_transacoes_gravam_somente_resumos_pendentes(self):
+        self.assertFalse(ResumoDiarioTransacoes.objects.exists())
+        self.assertFalse(ResumoDiarioEvento.objects.exists())
+        self.assertEqual(ResumoDiarioTransacoesPendente.objects.count(), TransacaoEstoque.objects.count())
+        self.assertEqual(ResumoDiarioEventoPendente.objects.count(), 3)
+
+    def test_consolidacao_confere_com_o_historico(self):
+        consolidar_resumos_pendentes()
+
+        self.assertFalse(ResumoDiarioTransacoesPendente.objects.exists())
+        self.assertFalse(ResumoDiarioEventoPendente.objects.exists())
+        self.assertEqual(resumos_transacoes(), resumos_transacoes_pelo_historico())
+
+        hoje = timezone.localdate()
+        [(dia, id_evento, quantidade_alocada, quantidade_retornada, custo_liquido)] = resumos_eventos()
+        self.assertEqual((dia, id_evento, quantidade_alocada, quantidade_retornada), (hoje, self.show.id, 11, 2))
+        self.show.refresh_from_db()
+        self.assertEqual(custo_liquido, self.show.custo_total)
+
+        comprar(self.copo, 5, '3.00')
+        consolidar_resumos_pendentes()
+        self.assertEqual(resumos_transacoes(), resumos_transacoes_pelo_historico())
+
+    def test_reconstrucao_nao_conta_pendentes_em_dobro(self):
+        consolidar_resumos_pendentes()
+        esperado = resumos_transacoes()
+        comprar(self.copo, 5, '3.00')
+
+        reconstruir_resumos_transacoes()
+
+        self.assertFalse(ResumoDiarioTransacoesPendente.objects.exists())
+        self.assertEqual(resumos_transacoes(), resumos_transacoes_pelo_historico())
+        self.assertNotEqual(resumos_transacoes(), esperado)
+
+    def test_analise_periodo_inclui_pendentes(self):
+        hoje = timezone.localdate()
+
+        gastos_por_tipo, custos_eventos, _ = analise_periodo(hoje - timedelta(days=1), hoje)
+
+        self.assertFalse(ResumoDiarioTransacoesPendente.objects.exists())
+        self.assertEqual(
+            sum(quantidade for _, tipo, quantidade, _ in gastos_por_tipo if tipo == TransacaoEstoque.Tipo.COMPRA.label),
+            16
+        )
+        [(_, eventos, _)] = custos_eventos
+        self.assertEqual(eventos, 1)
@@ -0,0 +1,78 @@
+from django.contrib.admin import helpers
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import SolicitacaoEvento, SumarioItemEvento, TransacaoEstoque
+from core.services import alocar_item_para_evento
+
+from .fabricas import ARMAZENAMENTO_SEM_MANIFESTO, comprar, criar_evento, criar_item, criar_usuario, solicitar
+
+
+@override_settings(STORAGES=ARMAZENAMENTO_SEM_MANIFESTO)
+class RetornoItensAlocadosAdminTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin'))
+        self.url = reverse('admin:core_solicitacaoevento_changelist')
+
+        usuario = criar_usuario()
+        self.copo = criar_item('Copo')
+        self.gelo = criar_item('Gelo')
+        self.prato = criar_item('Prato')
+        self.show = criar_evento('Show')
+        for item in (self.copo, self.gelo, self.prato):
+            solicitar(self.show, item, 10)
+            comprar(item, 10, '2.00')
+        alocar_item_para_evento(self.copo.id, 8, self.show.id, usuario)
+        alocar_item_para_evento(self.gelo.id, 5, self.show.id, usuario)
+
+        self.ids_solicitacoes = list(
+            SolicitacaoEvento.objects.filter(item__in=(self.copo, self.gelo, self.prato)).values_list('id', flat=True)
+        )
+
+    def executar(self, **dados):
+        return self.client.post(
+            self.url,
+            {'action': 'retornar_itens_alocados', helpers.ACTION_CHECKBOX_NAME: self.ids_solicitacoes, **dados}
+        )
+
+    def alocados(self):
+        return dict(SumarioItemEvento.objects.filter(evento=self.show).values_list('item_id', 'quantidade_liquida'))
+
+    def test_pede_as_quantidades_dos_itens_alocados(self):
+        resposta = self.executar()
+
+        self.assertEqual(resposta.status_code, 200)
+        form = resposta.context['form']
+        self.assertEqual(list(form.fields), [f'item_{self.copo.id}', f'item_{self.gelo.id}'])
+        self.assertEqual(form[f'item_{self.copo.id}'].initial, 8)
+        self.assertFalse(TransacaoEstoque.objects.filter(tipo=TransacaoEstoque.Tipo.RETORNO_EVENTO).exists())
+
+    def test_retorna_somente_as_quantidades_informadas(self):
+        resposta = self.executar(retornar='Retornar', **{f'item_{self.copo.id}': 3, f'item_{self.gelo.id}': 0})
+
+        self.assertEqual(resposta.status_code, 302)
+        self.assertEqual(
+            list(
+                TransacaoEstoque.objects.filter(
+                    tipo=TransacaoEstoque.Tipo.RETORNO_EVENTO
+                ).values_list(
+                    'item_id',
+                    'quantidade'
+                )
+            ),
+            [(self.copo.id, 3)]
+        )
+        self.assertEqual(self.alocados(), {self.copo.id: 5, self.gelo.id: 5})
+
+    def test_recusa_quantidade_maior_que_a_alocada_ou_nenhuma_quantidade(self):
+        for quantidades in ({'copo': 9, 'gelo': 1}, {'copo': 0, 'gelo': 0}):
+            with self.subTest(quantidades=quantidades):
+                resposta = self.executar(
+                    retornar='Retornar',
+                    **{f'item_{self.copo.id}': quantidades['copo'], f'item_{self.gelo.id}': quantidades['gelo']}
+                )
+
+                self.assertEqual(resposta.status_code, 200)
+                self.assertFalse(resposta.context['form'].is_valid())
+                self.assertEqual(self.alocados(), {self.copo.id: 8, self.gelo.id: 5})
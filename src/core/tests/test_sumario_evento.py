@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.models import Evento, SolicitacaoEvento, SumarioItemEvento, TransacaoEstoque
+from core.services import (
+    alocar_item_para_evento, alocar_quantidade_disponivel_estoque_solicitacoes,
+    alocar_quantidade_disponivel_estoque_solicitacoes_sql, distribuir_estoque_entre_eventos, retornar_item_de_evento,
+    retornar_itens_de_evento
+)
+
+from .fabricas import (
+    comprar, criar_evento, criar_item, criar_usuario, registrar, solicitar, sumarios_pelo_historico,
+    sumarios_persistidos
+)
+
+
+class SumarioItemEventoTests(TestCase):
+    def setUp(self):
+        self.usuario = criar_usuario()
+        self.copo = criar_item('Copo')
+        self.gelo = criar_item('Gelo')
+        self.prato = criar_item('Prato', quantidade_fracoes=3)
+        comprar(self.copo, 20, '2.00')
+        comprar(self.gelo, 9, '1.3333')
+        comprar(self.prato, 12, '4.50')
+
+        self.show = criar_evento('Show')
+        self.festa = criar_evento('Festa')
+        for evento in (self.show, self.festa):
+            solicitar(evento, self.copo, 9)
+            solicitar(evento, self.gelo, 6)
+            solicitar(evento, self.prato, 5)
+
+    def assertSumariosConferemComHistorico(self):
+        self.assertEqual(sumarios_persistidos(), sumarios_pelo_historico())
+
+        custos_por_evento = {}
+        for (id_evento, _), (_, custo_liquido) in sumarios_persistidos().items():
+            custos_por_evento[id_evento] = custos_por_evento.get(id_evento, Decimal(0)) + custo_liquido
+
+        for id_evento, custo_total in Evento.objects.values_list('id', 'custo_total'):
+            self.assertEqual(custo_total, custos_por_evento.get(id_evento, Decimal(0)))
+
+    def test_sumarios_acompanham_todos_os_caminhos_de_alocacao_e_retorno(self):
+        alocar_item_para_evento(self.copo.id, 3, self.show.id, self.usuario)
+        alocar_item_para_evento(self.prato.id, 2, self.show.id, self.usuario)
+        self.assertSumariosConferemComHistorico()
+
+        comprar(self.copo, 5, '3.10')
+        alocar_quantidade_disponivel_estoque_solicitacoes(
+            SolicitacaoEvento.objects.filter(evento=self.show).order_by('id'),
+            self.usuario
+        )
+        self.assertSumariosConferemComHistorico()
+
+        alocar_quantidade_disponivel_estoque_solicitacoes_sql(
+            SolicitacaoEvento.objects.filter(evento=self.festa, item=self.copo),
+            self.usuario
+        )
+        self.assertSumariosConferemComHistorico()
+
+        retornar_item_de_evento(self.copo.id, 4, self.show.id, self.usuario)
+        registrar(self.gelo, TransacaoEstoque.Tipo.RETORNO_EVENTO, 2, Decimal('1.3333'), self.show, self.usuario)
+        distribuir_estoque_entre_eventos(self.usuario)
+        self.assertSumariosConferemComHistorico()
+
+        retornar_itens_de_evento(self.festa.id, self.usuario)
+        retornar_itens_de_evento(self.show.id, self.usuario, {self.prato.id: 1, self.gelo.id: 1})
+        self.assertSumariosConferemComHistorico()
+
+        self.assertEqual(
+            set(SumarioItemEvento.objects.filter(evento=self.festa).values_list('quantidade_liquida', 'custo_liquido')),
+            {(0, Decimal(0))}
+        )
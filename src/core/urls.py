@@ -1,8 +1,10 @@
+from django.contrib import admin
 from django.urls import path
 
 from . import views
 
 app_name = 'core'
 urlpatterns = [
-    path('', '')
-]
\ No newline at end of file
+    path('perfil-sql/', admin.site.admin_view(views.perfil_sql), name='perfil_sql'),
+    path('contencao/', admin.site.admin_view(views.contencao), name='contencao'),
+]
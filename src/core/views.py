@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.contrib import admin
+from django.db import connection
+from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.utils.crypto import constant_time_compare
+
+from .contencao import espera_travamento, retencao_travamento, linhas_travadas, linhas_mais_disputadas
+from .metricas import Medidor, exportar_prometheus
+from .models import PerfilSQLRequisicao
+from .perfil_sql import CHAVE_SESSAO_ATIVO
+
+
+def perfil_sql(request):
+    if request.method == 'POST':
+        match request.POST.get('acao'):
+            case 'ativar':
+                request.session[CHAVE_SESSAO_ATIVO] = True
+            case 'desativar':
+                request.session[CHAVE_SESSAO_ATIVO] = False
+            case 'limpar':
+                PerfilSQLRequisicao.objects.historico(request.user).delete()
+
+        return redirect('core:perfil_sql')
+
+    return TemplateResponse(
+        request,
+        'admin/perfil_sql.html',
+        {
+            **admin.site.each_context(request),
+            'title': 'Perfil SQL das Requisições',
+            'habilitado': settings.PERFIL_SQL_HABILITADO,
+            'ativo': request.session.get(CHAVE_SESSAO_ATIVO, False),
+            'historico': [perfil.dados for perfil in PerfilSQLRequisicao.objects.historico(request.user)],
+            'limite_lento_ms': settings.PERFIL_SQL_LIMITE_LENTO_MS,
+            'limite_repeticoes': settings.PERFIL_SQL_LIMITE_REPETICOES,
+        }
+    )
+
+
+def _linhas_histograma(histograma):
+    return [
+        {
+            'secao': secao,
+            'modelo': modelo,
+            'total': total,
+            'media_ms': soma / total * 1000,
+            'p50_ms': histograma.quantil(0.5, valor) * 1000,
+            'p95_ms': histograma.quantil(0.95, valor) * 1000,
+        }
+        for (secao, modelo), valor in sorted(histograma.valores().items())
+        for _, soma, total in (valor,)
+    ]
+
+
+def contencao(request):
+    valores_linhas_travadas = linhas_travadas.valores()
+
+    return TemplateResponse(
+        request,
+        'admin/contencao.html',
+        {
+            **admin.site.each_context(request),
+            'title': 'Contenção de Travas',
+            'esperas': [
+                {**linha, 'linhas': valores_linhas_travadas.get((linha['secao'], linha['modelo']), 0)}
+                for linha in _linhas_histograma(espera_travamento)
+            ],
+            'retencoes': _linhas_histograma(retencao_travamento),
+            'linhas_disputadas': [
+                {'modelo': modelo, 'id': identificador, 'espera_ms': espera * 1000, 'travamentos': travamentos}
+                for modelo, identificador, espera, travamentos in linhas_mais_disputadas(20)
+            ],
+        }
+    )
+
+
+ESTATISTICAS_POOL = {
+    'pool_size': Medidor('backstage_pool_conexoes', 'Conexões abertas no pool'),
+    'pool_available': Medidor('backstage_pool_conexoes_disponiveis', 'Conexões ociosas no pool'),
+    'pool_max': Medidor('backstage_pool_conexoes_maximo', 'Tamanho máximo do pool'),
+    'requests_waiting': Medidor('backstage_pool_requisicoes_aguardando', 'Requisições aguardando uma conexão'),
+    'requests_num': Medidor(
+        'backstage_pool_requisicoes_total', 'Conexões solicitadas ao pool', tipo='counter'
+    ),
+    'requests_queued': Medidor(
+        'backstage_pool_requisicoes_enfileiradas_total', 'Solicitações que precisaram aguardar', tipo='counter'
+    ),
+    'requests_wait_ms': Medidor(
+        'backstage_pool_espera_milissegundos_total', 'Tempo total aguardando conexões do pool', tipo='counter'
+    ),
+    'requests_errors': Medidor(
+        'backstage_pool_requisicoes_erros_total', 'Solicitações ao pool que falharam', tipo='counter'
+    ),
+    'usage_ms': Medidor(
+        'backstage_pool_uso_milissegundos_total', 'Tempo total de uso das conexões do pool', tipo='counter'
+    ),
+}
+conexoes_em_uso_pool = Medidor('backstage_pool_conexoes_em_uso', 'Conexões do pool em uso')
+
+
+def _atualizar_estatisticas_pool():
+    if connection.pool is None:
+        return
+
+    estatisticas = connection.pool.get_stats()
+    for nome, medidor in ESTATISTICAS_POOL.items():
+        medidor.definir(estatisticas.get(nome, 0))
+    conexoes_em_uso_pool.definir(estatisticas.get('pool_size', 0) - estatisticas.get('pool_available', 0))
+
+
+def metricas(request):
+    autorizacao = request.headers.get('Authorization', '')
+    token_valido = bool(settings.METRICAS_TOKEN) and constant_time_compare(
+        autorizacao, f'Bearer {settings.METRICAS_TOKEN}'
+    )
+
+    if not token_valido and not request.user.is_staff:
+        return HttpResponse(status=401 if not autorizacao else 403)
+
+    _atualizar_estatisticas_pool()
+
+    return HttpResponse(exportar_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')